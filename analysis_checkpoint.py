@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+逐条分析的检查点
+analyze_csv.py 的输入超过一块时按固定行数分块分析，每完成一块就把该块的分析结果写入检查点目录
+（output_writer.atomic_write，替换前刷盘），中途崩溃或 Ctrl-C 后加 --resume 重新运行，只重做未完成的块。
+检查点记录输入数据、分类规则源码和分类器文件的指纹，任一有变化时拒绝续跑，避免拼接出不一致的结果
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+import pandas as pd
+
+from ingest import CONTENT_COLUMN, DAYS_COLUMN, DEPT_COLUMN, RECORD_ID_COLUMN
+from output_writer import atomic_write
+
+# 检查点目录和每块行数
+DEFAULT_CHECKPOINT_DIR = '.analysis_checkpoint'
+CHECKPOINT_ROWS = 2000
+
+MANIFEST = 'manifest.json'
+
+# 参与指纹计算的分类规则源码（修改关键词规则后旧检查点失效）
+CLASSIFIER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyze_csv.py')
+
+# 参与指纹计算的列（逐条分析用到以及随结果保存的全部输入，记录ID或归属中心更正后旧检查点失效）
+FINGERPRINT_COLUMNS = ['周报人', '周次', RECORD_ID_COLUMN, '订单项目.立项项目', DEPT_COLUMN, DAYS_COLUMN, CONTENT_COLUMN]
+
+
+def input_fingerprint(df, model_path=None):
+    """输入数据（行号及用到和保存的列）、分类规则源码和分类器文件的指纹"""
+    digest = hashlib.sha256()
+    columns = [column for column in FINGERPRINT_COLUMNS if column in df.columns]
+    # 分类列按取值计算，与普通对象列的指纹一致
+    frame = df[columns].astype(object)
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    with open(CLASSIFIER_SOURCE, 'rb') as f:
+        digest.update(f.read())
+    if model_path:
+        stat = os.stat(model_path)
+        digest.update(f"{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AnalysisCheckpoint:
+    """分块分析结果的检查点，块以起始行位置标识"""
+
+    def __init__(self, fingerprint, rows, chunk_rows=CHECKPOINT_ROWS, directory=DEFAULT_CHECKPOINT_DIR):
+        self.fingerprint = fingerprint
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+        self.directory = directory
+
+    @classmethod
+    def start(cls, fingerprint, rows, chunk_rows=CHECKPOINT_ROWS, directory=DEFAULT_CHECKPOINT_DIR, resume=False):
+        """resume=True 时沿用已有检查点（指纹不一致则报错），否则清除旧检查点重新开始"""
+        manifest_path = os.path.join(directory, MANIFEST)
+        if resume and os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest['fingerprint'] != fingerprint or manifest['rows'] != rows:
+                raise ValueError(f"输入数据或分类器与检查点 {directory} 不一致，无法续跑（去掉 --resume 重新分析）")
+            checkpoint = cls(fingerprint, rows, manifest['chunk_rows'], directory)
+            done = len(checkpoint.completed_chunks())
+            print(f"从检查点恢复: 已完成 {done} 块（每块 {checkpoint.chunk_rows} 行）")
+            return checkpoint
+
+        if resume:
+            print(f"未找到检查点 {directory}，从头开始分析")
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        checkpoint = cls(fingerprint, rows, chunk_rows, directory)
+        checkpoint._write(MANIFEST, lambda f: json.dump(
+            {'fingerprint': fingerprint, 'rows': rows, 'chunk_rows': chunk_rows}, f), mode='w')
+        return checkpoint
+
+    def _chunk_path(self, start):
+        return os.path.join(self.directory, f"chunk_{start:010d}.pkl")
+
+    def _write(self, name, write_fn, mode='wb'):
+        atomic_write(os.path.join(self.directory, name), write_fn, mode=mode, fsync=True)
+
+    def chunk_ranges(self):
+        """各块的 (起始行, 结束行)"""
+        return [(start, min(start + self.chunk_rows, self.rows)) for start in range(0, self.rows, self.chunk_rows)]
+
+    def completed_chunks(self):
+        return [start for start, _ in self.chunk_ranges() if os.path.exists(self._chunk_path(start))]
+
+    def load_chunk(self, start):
+        """已完成块的分析结果，未完成时返回None"""
+        path = self._chunk_path(start)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def save_chunk(self, start, analyses):
+        self._write(os.path.basename(self._chunk_path(start)),
+                    lambda f: pickle.dump(analyses, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def clear(self):
+        """结果文件全部写出后删除检查点"""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -1,28 +1,45 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import numpy as np
 import pandas as pd
 import re
 from collections import defaultdict
 import json
-
-def read_csv_with_encoding(file_path):
-    """尝试不同编码读取CSV文件"""
-    encodings = ['utf-8-sig', 'utf-8', 'gbk', 'gb2312', 'gb18030']
-    
-    for encoding in encodings:
-        try:
-            print(f"尝试使用编码: {encoding}")
-            df = pd.read_csv(file_path, encoding=encoding)
-            print(f"成功使用编码 {encoding} 读取文件")
-            print(f"数据形状: {df.shape}")
-            print(f"列名: {list(df.columns)}")
-            return df, encoding
-        except Exception as e:
-            print(f"编码 {encoding} 失败: {e}")
-            continue
-    
-    raise Exception("无法使用任何编码读取文件")
+import argparse
+
+from analysis_checkpoint import CHECKPOINT_ROWS, DEFAULT_CHECKPOINT_DIR, AnalysisCheckpoint, input_fingerprint
+from archive import DEFAULT_ARCHIVE_DIR, load_reports
+from ingest import DEFAULT_INPUT, DEPT_COLUMN, PARSER_ENGINES, RECORD_ID_COLUMN
+from output_writer import submit_write, wait_for_writes
+from preview import PREVIEW_ROWS, format_estimate, load_preview, print_estimates, print_preview_header
+from search_index import open_index, update_index
+from work_type_model import load_model, predict
+
+# 工作类型的中文名称
+TYPE_NAMES = {
+    'software_development': '软件开发',
+    'software_maintenance': '软件维护',
+    'system_integration': '系统集成',
+    'equipment_tuning': '设备调机',
+    'learning_research': '学习研究',
+    'other_work': '其他工作'
+}
+
+# 技术领域的中文名称
+TECH_AREA_NAMES = {
+    'frontend': '前端开发',
+    'backend': '后端开发',
+    'algorithm_ai': '算法/AI',
+    'device_control': '设备控制',
+    'system_architecture': '系统架构',
+    'data_processing': '数据处理',
+    'testing': '测试验证',
+    'hardware_equipment': '硬件设备',
+    'integration': '系统集成',
+    'general': '通用技术',
+    'unknown': '未分类'
+}
 
 def analyze_work_content_semantic(content, person, project, days):
     """基于语义理解的深度工作内容分析"""
@@ -353,6 +370,39 @@ def _infer_technical_area(content):
     else:
         return 'general'
 
+def describe_predicted_type(content, work_type, confidence):
+    """为统计分类器预测的工作类型补充子类型、技术领域和分析理由"""
+    content_str = str(content)
+
+    if work_type == 'equipment_tuning':
+        subtype, tech_area, reason = _get_tuning_subtype(content_str), 'hardware_equipment', '设备调试、机器调整、硬件配置等非软件开发工作'
+        work_nature = 'equipment_operation'
+    elif work_type == 'software_development':
+        subtype, tech_area, reason = _analyze_development_details(content_str)
+        work_nature = 'development'
+    elif work_type == 'software_maintenance':
+        subtype, tech_area, reason = _analyze_maintenance_details(content_str)
+        work_nature = 'maintenance'
+    elif work_type == 'system_integration':
+        subtype, tech_area, reason = _analyze_integration_details(content_str)
+        work_nature = 'integration'
+    elif work_type == 'learning_research':
+        subtype, tech_area, reason = 'knowledge_acquisition', _infer_technical_area(content_str), '学习、研究、熟悉新技术或系统'
+        work_nature = 'learning'
+    else:
+        tech_area = _infer_technical_area(content_str)
+        subtype, reason = 'unclassified', f'无法明确分类的工作内容，推断技术领域为{tech_area}'
+        work_nature = 'other'
+
+    return {
+        'type': work_type,
+        'subtype': subtype,
+        'technical_area': tech_area,
+        'work_nature': work_nature,
+        'analysis_reason': f'统计模型预测：{reason}',
+        'confidence': float(confidence)
+    }
+
 def extract_requirements_and_bugs(content):
     """提取具体需求和bug修复内容"""
     if pd.isna(content) or content == '':
@@ -382,15 +432,15 @@ def extract_requirements_and_bugs(content):
     
     return {'requirements': requirements, 'bugs': bugs}
 
-def analyze_all_records(df):
-    """逐条分析所有工作记录"""
-
-    print("开始逐条分析工作记录...")
+def _analyze_rows(df, model, start, stop):
+    """逐条分析第 start 到 stop 行（按位置），返回记录分析结果列表"""
+    rows = df.iloc[start:stop]
+    if model is not None:
+        contents = rows['订单项目.本周进度及问题反馈'].fillna('').tolist()
+        predicted_types, confidences = predict(model, contents)
 
-    all_analyses = []
-    work_type_stats = defaultdict(lambda: {'count': 0, 'total_days': 0.0, 'records': []})
-
-    for index, row in df.iterrows():
+    analyses = []
+    for position, (index, row) in enumerate(rows.iterrows()):
         content = row['订单项目.本周进度及问题反馈']
         person = row['周报人']
         project = row['订单项目.立项项目']
@@ -398,32 +448,67 @@ def analyze_all_records(df):
         week = row['周次']
 
         # 进行语义分析
-        analysis = analyze_work_content_semantic(content, person, project, days)
+        if model is not None and not (pd.isna(content) or content == ''):
+            analysis = describe_predicted_type(content, predicted_types[position], confidences[position])
+        else:
+            analysis = analyze_work_content_semantic(content, person, project, days)
 
-        # 构建完整的记录分析
-        record_analysis = {
+        # 构建完整的记录分析；记录ID和归属中心随记录保存，下游按它们关联，不按行号回查原始CSV
+        analyses.append({
             'index': index + 1,
+            'record_id': row.get(RECORD_ID_COLUMN),
+            'department': row.get(DEPT_COLUMN),
             'person': person,
             'project': project,
             'week': week,
             'days': days,
             'content': content,
             'analysis': analysis
-        }
+        })
+
+        # 显示进度
+        if (index + 1) % 50 == 0:
+            print(f"已分析 {index + 1}/{len(df)} 条记录...")
+
+    return analyses
+
+def analyze_all_records(df, model=None, checkpoint=None):
+    """逐条分析所有工作记录
+
+    传入 model（见 work_type_model.py）时使用统计分类器整批预测工作类型，
+    内容为空的记录仍按规则处理。
+    传入 checkpoint（见 analysis_checkpoint.py）时按块分析，每完成一块写入检查点，已完成的块直接读取
+    """
 
-        all_analyses.append(record_analysis)
+    print("开始逐条分析工作记录...")
+
+    all_analyses = []
+    work_type_stats = defaultdict(lambda: {'count': 0, 'total_days': 0.0, 'records': []})
 
-        # 统计各类型工作量
-        work_type = analysis['type']
+    chunks = checkpoint.chunk_ranges() if checkpoint is not None else [(0, len(df))]
+    try:
+        for start, stop in chunks:
+            analyses = checkpoint.load_chunk(start) if checkpoint is not None else None
+            if analyses is None:
+                analyses = _analyze_rows(df, model, start, stop)
+                if checkpoint is not None:
+                    checkpoint.save_chunk(start, analyses)
+            all_analyses.extend(analyses)
+    except KeyboardInterrupt:
+        if checkpoint is not None:
+            print(f"\n⏸️  已中断，完成的 {len(all_analyses)} 条记录已保存在检查点 {checkpoint.directory}，"
+                  f"加 --resume 重新运行即可继续")
+        raise
+
+    # 统计各类型工作量
+    for record_analysis in all_analyses:
+        work_type = record_analysis['analysis']['type']
+        days = record_analysis['days']
         work_type_stats[work_type]['count'] += 1
         if not pd.isna(days):
             work_type_stats[work_type]['total_days'] += days
         work_type_stats[work_type]['records'].append(record_analysis)
 
-        # 显示进度
-        if (index + 1) % 50 == 0:
-            print(f"已分析 {index + 1}/{len(df)} 条记录...")
-
     print(f"分析完成！共分析 {len(df)} 条记录")
 
     return all_analyses, dict(work_type_stats)
@@ -504,18 +589,8 @@ def generate_detailed_report(all_analyses, work_type_stats, project_analysis):
     print(f"{'工作类型':<25} {'记录数':<8} {'工作量(人天)':<12} {'占比':<8}")
     print("-" * 60)
 
-    # 定义工作类型的中文名称
-    type_names = {
-        'software_development': '软件开发',
-        'software_maintenance': '软件维护',
-        'system_integration': '系统集成',
-        'equipment_tuning': '设备调机',
-        'learning_research': '学习研究',
-        'other_work': '其他工作'
-    }
-
     for work_type, stats in sorted(work_type_stats.items(), key=lambda x: x[1]['total_days'], reverse=True):
-        type_name = type_names.get(work_type, work_type)
+        type_name = TYPE_NAMES.get(work_type, work_type)
         count = stats['count']
         days = stats['total_days']
         percentage = (days / total_days) * 100
@@ -538,26 +613,12 @@ def generate_detailed_report(all_analyses, work_type_stats, project_analysis):
         tech_area_stats[tech_area]['count'] += 1
         tech_area_stats[tech_area]['days'] += analysis['days']
 
-    tech_area_names = {
-        'frontend': '前端开发',
-        'backend': '后端开发',
-        'algorithm_ai': '算法/AI',
-        'device_control': '设备控制',
-        'system_architecture': '系统架构',
-        'data_processing': '数据处理',
-        'testing': '测试验证',
-        'hardware_equipment': '硬件设备',
-        'integration': '系统集成',
-        'general': '通用技术',
-        'unknown': '未分类'
-    }
-
     print(f"{'技术领域':<20} {'记录数':<8} {'工作量(人天)':<12} {'占比':<8}")
     print("-" * 55)
 
     for tech_area, stats in sorted(tech_area_stats.items(), key=lambda x: x[1]['days'], reverse=True):
         if stats['days'] > 0:  # 只显示有工作量的领域
-            area_name = tech_area_names.get(tech_area, tech_area)
+            area_name = TECH_AREA_NAMES.get(tech_area, tech_area)
             count = stats['count']
             days = stats['days']
             percentage = (days / total_days) * 100
@@ -587,32 +648,49 @@ def print_detailed_records(all_analyses, limit=20):
         print(f"  - 置信度: {work_analysis['confidence']:.2f}")
         print("-" * 120)
 
-def main():
-    file_path = "2025年1-6.csv"
-
+def preview_main(file_path=DEFAULT_INPUT, rows=PREVIEW_ROWS, sample=False, model_path=None):
+    """快速预览：只读取前 rows 行或分块抽样，在样本上运行同样的分析，不写出文件也不更新索引"""
+    preview = load_preview(file_path, rows, sample)
+    df = preview.frame
+    print_preview_header(preview)
+    print(f"列名: {list(df.columns)}")
+
+    model = load_model(model_path) if model_path else None
+    all_analyses, work_type_stats = analyze_all_records(df, model)
+    project_analysis = analyze_projects_detailed(df, all_analyses)
+    generate_detailed_report(all_analyses, work_type_stats, project_analysis)
+    print_detailed_records(all_analyses, limit=10)
+
+    # 按工作类型估计全量人天
+    days = pd.to_numeric(df['订单项目.本周投入天数（最低半天）'], errors='coerce')
+    work_types = [analysis['analysis']['type'] for analysis in all_analyses]
+    print(f"\n📐 全量估计: 记录 {format_estimate(preview.estimate(np.ones(len(df))), ' 条')}，"
+          f"人天 {format_estimate(preview.estimate(days), ' 天')}")
+    print_estimates("各工作类型人天", preview.estimate_by(days, work_types), ' 天')
+
+def main(file_path=DEFAULT_INPUT, model_path=None, validate=False, lean=False, engine='c',
+         period=None, departments=None, archive_dir=None, resume=False, checkpoint_rows=CHECKPOINT_ROWS):
+    """checkpoint_rows 为每个检查点块的行数（0 为不写检查点，不超过一块的输入也不写）；
+    resume=True 时从上次中断的块继续"""
     try:
-        # 读取CSV文件
-        df, encoding = read_csv_with_encoding(file_path)
+        # 读取CSV文件（支持文件、目录或通配符），指定周期或部门时从归档读取
+        df = load_reports(file_path, period, departments, archive_dir, lean=lean, validate=validate, engine=engine)
 
         print(f"文件基本信息:")
         print(f"总行数: {len(df)}")
         print(f"列数: {len(df.columns)}")
-        print(f"使用编码: {encoding}")
-
-        # 逐条分析所有记录
-        all_analyses, work_type_stats = analyze_all_records(df)
-
-        # 基于详细分析进行项目分组
-        project_analysis = analyze_projects_detailed(df, all_analyses)
 
-        # 生成详细报告
-        generate_detailed_report(all_analyses, work_type_stats, project_analysis)
+        # 逐条分析所有记录（可选使用统计分类器）
+        model = None
+        if model_path:
+            model = load_model(model_path)
+            print(f"使用统计分类器: {model_path}")
 
-        # 打印部分详细记录
-        print_detailed_records(all_analyses, limit=10)
-
-        # 保存详细分析结果
-        save_analysis_results(all_analyses, work_type_stats, project_analysis)
+        checkpoint = None
+        if checkpoint_rows and len(df) > checkpoint_rows:
+            checkpoint = AnalysisCheckpoint.start(input_fingerprint(df, model_path), len(df), checkpoint_rows,
+                                                  resume=resume)
+        all_analyses, work_type_stats, project_analysis = run_analysis(df, model, checkpoint)
 
         print(f"\n分析完成！详细结果已保存到相关文件中。")
 
@@ -624,15 +702,58 @@ def main():
         traceback.print_exc()
         return None, None, None, None
 
+def run_analysis(df, model=None, checkpoint=None):
+    """分析已加载的数据表：写出结果文件、输出报告并更新检索索引，返回 (逐条分析, 类型统计, 项目分析)
+
+    传入 checkpoint 时分块分析并写检查点，结果文件全部写出后删除检查点
+    """
+    all_analyses, work_type_stats = analyze_all_records(df, model, checkpoint)
+
+    # 基于详细分析进行项目分组
+    project_analysis = analyze_projects_detailed(df, all_analyses)
+
+    # 结果文件在后台写出，与报告输出和索引更新并行
+    save_analysis_results(all_analyses, work_type_stats, project_analysis)
+
+    # 生成详细报告
+    generate_detailed_report(all_analyses, work_type_stats, project_analysis)
+
+    # 打印部分详细记录
+    print_detailed_records(all_analyses, limit=10)
+
+    # 增量更新全文检索索引
+    conn = open_index()
+    try:
+        update_index(conn, df, [analysis['analysis']['type'] for analysis in all_analyses])
+    finally:
+        conn.close()
+
+    # 等待结果文件写出完成
+    wait_for_writes()
+    if checkpoint is not None:
+        checkpoint.clear()
+    print(f"已保存以下分析结果文件:")
+    print(f"- detailed_record_analysis.json: 逐条记录分析结果")
+    print(f"- work_type_statistics.json: 工作类型统计")
+    print(f"- project_detailed_analysis.json: 项目详细分析")
+
+    return all_analyses, work_type_stats, project_analysis
+
+def _optional_text(value):
+    """缺失值写为 null"""
+    return None if pd.isna(value) else str(value)
+
 def save_analysis_results(all_analyses, work_type_stats, project_analysis):
-    """保存分析结果到文件"""
+    """保存分析结果到文件（在后台线程中序列化并写出，调用方需 wait_for_writes）"""
 
     # 保存逐条分析结果
-    with open('detailed_record_analysis.json', 'w', encoding='utf-8') as f:
+    def write_record_analysis(f):
         serializable_analyses = []
         for analysis in all_analyses:
             serializable_analysis = {
                 'index': analysis['index'],
+                'record_id': _optional_text(analysis['record_id']),
+                'department': _optional_text(analysis['department']),
                 'person': analysis['person'],
                 'project': analysis['project'],
                 'week': analysis['week'],
@@ -652,7 +773,7 @@ def save_analysis_results(all_analyses, work_type_stats, project_analysis):
         json.dump(serializable_analyses, f, ensure_ascii=False, indent=2)
 
     # 保存工作类型统计
-    with open('work_type_statistics.json', 'w', encoding='utf-8') as f:
+    def write_type_statistics(f):
         serializable_stats = {}
         for work_type, stats in work_type_stats.items():
             serializable_stats[work_type] = {
@@ -663,7 +784,7 @@ def save_analysis_results(all_analyses, work_type_stats, project_analysis):
         json.dump(serializable_stats, f, ensure_ascii=False, indent=2)
 
     # 保存项目分析结果
-    with open('project_detailed_analysis.json', 'w', encoding='utf-8') as f:
+    def write_project_analysis(f):
         serializable_projects = {}
         for project, analysis in project_analysis.items():
             serializable_projects[project] = {
@@ -682,10 +803,33 @@ def save_analysis_results(all_analyses, work_type_stats, project_analysis):
             }
         json.dump(serializable_projects, f, ensure_ascii=False, indent=2)
 
-    print(f"已保存以下分析结果文件:")
-    print(f"- detailed_record_analysis.json: 逐条记录分析结果")
-    print(f"- work_type_statistics.json: 工作类型统计")
-    print(f"- project_detailed_analysis.json: 项目详细分析")
+    submit_write('detailed_record_analysis.json', write_record_analysis)
+    submit_write('work_type_statistics.json', write_type_statistics)
+    submit_write('project_detailed_analysis.json', write_project_analysis)
 
 if __name__ == "__main__":
-    df = main()
+    parser = argparse.ArgumentParser(description="周报工作内容语义分析")
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT,
+                        help="周报CSV文件、目录或通配符（多个文件按记录ID去重）")
+    parser.add_argument('--model', help="使用统计分类器（work_type_model.py 训练得到的模型文件）代替关键词规则")
+    parser.add_argument('--validate', action='store_true', help="导入时做数据质量校验，违规行隔离到 quarantine_rows.csv")
+    parser.add_argument('--lean', action='store_true', help="精简模式加载：只读取用到的列，分类列和紧凑数值类型，降低内存占用")
+    parser.add_argument('--engine', choices=PARSER_ENGINES, default='c',
+                        help="CSV解析引擎：c（默认）或 pyarrow（多线程，需安装pyarrow）")
+    parser.add_argument('--period', help="从周报归档读取指定周期，如 2025Q3、2025、2025:27-39（逗号分隔多个）")
+    parser.add_argument('--dept', nargs='+', help="从周报归档读取指定部门（订单项目.归属中心，T1 包含并入的 T1电子元件）")
+    parser.add_argument('--archive', help=f"周报归档目录：与 --period/--dept 一起使用时从中读取（默认 {DEFAULT_ARCHIVE_DIR}），"
+                                          f"否则把读入的CSV追加到归档")
+    parser.add_argument('--resume', action='store_true',
+                        help=f"从上次中断处继续：读取 {DEFAULT_CHECKPOINT_DIR}/ 中已完成的块，只重做未完成的块（输入数据须一致）")
+    parser.add_argument('--checkpoint-rows', type=int, default=CHECKPOINT_ROWS, metavar='N',
+                        help=f"每分析N行写一次检查点（默认{CHECKPOINT_ROWS}，不超过N行的输入不写；0 为不写检查点）")
+    parser.add_argument('--preview', type=int, nargs='?', const=PREVIEW_ROWS, metavar='N',
+                        help=f"快速预览：只分析前N行（默认{PREVIEW_ROWS}），不写出文件")
+    parser.add_argument('--sample', action='store_true', help="与 --preview 一起使用：改为按文件位置分块随机抽样，给出置信区间")
+    args = parser.parse_args()
+    if args.preview:
+        preview_main(args.input, args.preview, args.sample, args.model)
+    else:
+        df = main(args.input, args.model, args.validate, args.lean, args.engine, args.period, args.dept, args.archive,
+                  args.resume, args.checkpoint_rows)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+周报投入异常检测
+一次遍历导入数据得到各记录的 人员/项目/部门/内容 整数编码后，所有检测都在NumPy数组上向量化完成：
+  - 周投入突增：人员×周次、项目×周次、部门×周次 矩阵上，以前 window 周的滚动中位数和MAD为基线
+    计算稳健z分数，所有序列一次算出；
+  - 新项目突击：人员在此前从未填报过的项目上，首周即填报大量人天；
+  - 复制粘贴：内容相同（忽略空白）的多条记录填报了不同的人天。
+周次轴按 年份+周次 连续排列，跨年数据不会合并不同年份的同一周次，滚动基线也按时间顺序跨过年界。
+结果按得分排序，列出涉及的记录ID
+"""
+
+import argparse
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from ingest import (CONTENT_COLUMN, DAYS_COLUMN, RECORD_ID_COLUMN, YEAR_COLUMN, load_weekly_reports, ordinal_weeks,
+                    week_ordinals)
+
+DEFAULT_OUTPUT = '异常周报.csv'
+
+# 滚动基线的窗口（周）和计算基线所需的最少有效周数
+WINDOW = 8
+MIN_PERIODS = 4
+
+# 稳健z分数阈值（|x-中位数| / (1.4826*MAD)），以及尺度下限（人天），避免基线完全不变时分数无穷大
+Z_THRESHOLD = 3.5
+MAD_SCALE = 1.4826
+MIN_SCALE = 0.5
+
+# 新项目首周人天下限，以及判断"此前有填报历史"所需的最少周数
+NEW_PROJECT_MIN_DAYS = 3.0
+NEW_PROJECT_MIN_HISTORY = 4
+
+# 参与复制粘贴检测的最短内容（去除空白后的字符数）
+MIN_COPY_LENGTH = 10
+
+# 按周次序列检测的维度
+SERIES = {'person': '人员', 'project': '项目', 'dept': '部门'}
+
+# 控制台输出条数
+TOP_N = 20
+
+
+def _encode_records(df):
+    """一次遍历取出检测所需的记录级数组：各维度的整数编码及取值表、周次下标和人天
+
+    周次下标为 (年份, 周次) 的连续周序号减去最早的一周
+    """
+    weeks = pd.to_numeric(df['周次'], errors='coerce')
+    keep = weeks.notna().to_numpy()
+    frame = df[keep]
+    weeks = week_ordinals(frame[YEAR_COLUMN], weeks[keep])
+
+    records = {
+        'record_id': frame[RECORD_ID_COLUMN].astype(object).fillna('').astype(str).to_numpy(),
+        'days': pd.to_numeric(frame[DAYS_COLUMN], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64),
+        'first_week': int(weeks.min()) if len(weeks) else 0,
+        'n_weeks': int(weeks.max() - weeks.min() + 1) if len(weeks) else 0,
+    }
+    records['week'] = weeks - records['first_week']
+
+    columns = {'person': '周报人', 'project': '订单项目.立项项目', 'dept': '订单项目.归属中心'}
+    for key, column in columns.items():
+        codes, values = pd.factorize(frame[column].astype(object).fillna('未知'))
+        records[key] = codes
+        records[f'{key}_values'] = np.asarray(values, dtype=object)
+
+    # 去除空白后的内容，过短的内容不参与复制粘贴检测（编码为-1）
+    content = frame[CONTENT_COLUMN].astype(object).fillna('').astype(str).str.replace(r'\s+', '', regex=True)
+    codes, values = pd.factorize(content.where(content.str.len() >= MIN_COPY_LENGTH))
+    records['content'] = codes
+    records['content_values'] = np.asarray(values, dtype=object)
+    return records
+
+
+def week_labels(records, week_idx):
+    """周次下标对应的显示文本，如 '2025年第3周'"""
+    years, weeks = ordinal_weeks(np.asarray(week_idx, dtype=np.int64) + records['first_week'])
+    return [f"{year}年第{week}周" for year, week in zip(years, weeks)]
+
+
+def series_matrix(codes, n_series, week_idx, n_weeks, days):
+    """按 序列×周次 汇总人天，没有记录的格子为NaN"""
+    flat = codes * n_weeks + week_idx
+    size = n_series * n_weeks
+    totals = np.bincount(flat, weights=days, minlength=size).reshape(n_series, n_weeks)
+    counts = np.bincount(flat, minlength=size).reshape(n_series, n_weeks)
+    return np.where(counts > 0, totals, np.nan)
+
+
+def rolling_robust_z(matrix, window=WINDOW, min_periods=MIN_PERIODS):
+    """对每个序列的每一周，以前 window 周（不含本周）的有效值为基线计算稳健z分数
+
+    返回 (z分数, 基线中位数, 基线尺度)；有效周数不足 min_periods 的格子z分数为NaN
+    """
+    n_series, n_weeks = matrix.shape
+    padded = np.full((n_series, n_weeks + window), np.nan)
+    padded[:, window:] = matrix
+    # 第t周的窗口为原矩阵的第 t-window .. t-1 周
+    windows = np.lib.stride_tricks.sliding_window_view(padded[:, :-1], window, axis=1)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # 全为NaN的窗口
+        median = np.nanmedian(windows, axis=2)
+        mad = np.nanmedian(np.abs(windows - median[:, :, None]), axis=2)
+
+    periods = np.sum(~np.isnan(windows), axis=2)
+    scale = np.maximum(MAD_SCALE * mad, MIN_SCALE)
+    z = (matrix - median) / scale
+    z[periods < min_periods] = np.nan
+    return z, median, scale
+
+
+def _record_ids_by_group(records, group, mask):
+    """取出 mask 选中记录的ID，按 group 编码分组，返回 {编码: 'id1; id2'}"""
+    selected = np.flatnonzero(mask)
+    ids = pd.Series(records['record_id'][selected]).groupby(group[selected]).agg('; '.join)
+    return ids.to_dict()
+
+
+def detect_series_spikes(records, window=WINDOW, threshold=Z_THRESHOLD, min_periods=MIN_PERIODS):
+    """人员/项目/部门 周投入突增：周人天的稳健z分数超过阈值"""
+    n_weeks = records['n_weeks']
+    tables = []
+    for key, label in SERIES.items():
+        codes = records[key]
+        n_series = len(records[f'{key}_values'])
+        matrix = series_matrix(codes, n_series, records['week'], n_weeks, records['days'])
+        z, median, scale = rolling_robust_z(matrix, window, min_periods)
+
+        flagged = np.nan_to_num(z, nan=-np.inf) >= threshold
+        series_idx, week_idx = np.nonzero(flagged)
+        if not len(series_idx):
+            continue
+
+        cell = codes * n_weeks + records['week']
+        ids = _record_ids_by_group(records, cell, flagged.ravel()[cell])
+        tables.append(pd.DataFrame({
+            '类型': f'{label}周投入突增',
+            '对象': records[f'{key}_values'][series_idx],
+            '周次': week_labels(records, week_idx),
+            '人天': matrix[series_idx, week_idx],
+            '基线': median[series_idx, week_idx],
+            '得分': z[series_idx, week_idx],
+            '说明': [f"前{window}周中位数 {m:.1f} 天，尺度 {s:.1f}"
+                   for m, s in zip(median[series_idx, week_idx], scale[series_idx, week_idx])],
+            '记录ID': [ids[c] for c in series_idx * n_weeks + week_idx],
+        }))
+    return tables
+
+
+def detect_new_assignments(records, min_days=NEW_PROJECT_MIN_DAYS, min_history=NEW_PROJECT_MIN_HISTORY):
+    """新项目突击：人员已有 min_history 周以上的填报历史，首次出现在某项目上的那一周就填报至少 min_days 天
+
+    得分为该周人天相对该人员所有 项目×周 人天的稳健z分数
+    """
+    person, project, week, days = records['person'], records['project'], records['week'], records['days']
+    n_persons = len(records['person_values'])
+    n_projects = len(records['project_values'])
+    n_weeks = records['n_weeks']
+    if not len(person):
+        return []
+
+    # 人员、人员×项目 的首次填报周
+    person_first = np.full(n_persons, n_weeks)
+    np.minimum.at(person_first, person, week)
+    pair = person * n_projects + project
+    pair_codes, pair_index = np.unique(pair, return_inverse=True)
+    pair_first = np.full(len(pair_codes), n_weeks)
+    np.minimum.at(pair_first, pair_index, week)
+
+    # 人员×项目×周 人天（稀疏），以及每人的中位数和MAD
+    cell = pair_index * n_weeks + week
+    cell_codes, cell_index = np.unique(cell, return_inverse=True)
+    cell_days = np.bincount(cell_index, weights=days)
+    cell_pair, cell_week = np.divmod(cell_codes, n_weeks)
+    cell_person = pair_codes[cell_pair] // n_projects
+    baseline = pd.Series(cell_days).groupby(cell_person)
+    median = baseline.median().reindex(range(n_persons)).to_numpy()
+    mad = (pd.Series(np.abs(cell_days - median[cell_person])).groupby(cell_person).median()
+           .reindex(range(n_persons)).to_numpy())
+    scale = np.maximum(MAD_SCALE * mad, MIN_SCALE)
+
+    first_cell = cell_week == pair_first[cell_pair]
+    history = cell_week - person_first[cell_person]
+    flagged = first_cell & (history >= min_history) & (cell_days >= min_days)
+    if not flagged.any():
+        return []
+
+    ids = _record_ids_by_group(records, cell_index, flagged[cell_index])
+    chosen = np.flatnonzero(flagged)
+    persons = cell_person[chosen]
+    return [pd.DataFrame({
+        '类型': '新项目突击',
+        '对象': [f"{records['person_values'][p]} / {records['project_values'][c % n_projects]}"
+               for p, c in zip(persons, pair_codes[cell_pair[chosen]])],
+        '周次': week_labels(records, cell_week[chosen]),
+        '人天': cell_days[chosen],
+        '基线': median[persons],
+        '得分': (cell_days[chosen] - median[persons]) / scale[persons],
+        '说明': [f"此前已填报 {h} 周，首次出现在该项目" for h in history[chosen]],
+        '记录ID': [ids[c] for c in chosen],
+    })]
+
+
+def detect_copied_content(records):
+    """复制粘贴：去除空白后内容相同的记录填报了不同的人天
+
+    得分为同内容人天的极差相对全部记录人天稳健尺度的倍数
+    """
+    content, days = records['content'], records['days']
+    valid = content >= 0
+    n_contents = len(records['content_values'])
+    if not n_contents:
+        return []
+
+    counts = np.bincount(content[valid], minlength=n_contents)
+    low = np.full(n_contents, np.inf)
+    high = np.full(n_contents, -np.inf)
+    np.minimum.at(low, content[valid], days[valid])
+    np.maximum.at(high, content[valid], days[valid])
+    flagged = (counts > 1) & (high > low)
+    if not flagged.any():
+        return []
+
+    all_days = days[valid]
+    scale = max(MAD_SCALE * np.median(np.abs(all_days - np.median(all_days))), MIN_SCALE)
+    member = valid & flagged[np.where(valid, content, 0)]
+    ids = _record_ids_by_group(records, content, member)
+    selected = np.flatnonzero(member)
+    groups = pd.DataFrame({
+        'content': content[selected],
+        'person': records['person_values'][records['person'][selected]],
+        'week': records['week'][selected],
+        'days': days[selected],
+    }).groupby('content')
+    persons = groups['person'].agg(lambda values: '、'.join(dict.fromkeys(values)))
+    weeks = groups['week'].agg(lambda values: '、'.join(week_labels(records, sorted(set(values)))))
+    day_values = groups['days'].agg(lambda values: '/'.join(f"{d:g}" for d in sorted(set(values))))
+
+    chosen = np.flatnonzero(flagged)
+    snippets = [text if len(text) <= 30 else text[:27] + '...' for text in records['content_values'][chosen]]
+    return [pd.DataFrame({
+        '类型': '复制粘贴人天不一致',
+        '对象': [f"{persons[c]}：{snippet}" for c, snippet in zip(chosen, snippets)],
+        '周次': weeks.reindex(chosen).to_numpy(),
+        '人天': high[chosen],
+        '基线': low[chosen],
+        '得分': (high[chosen] - low[chosen]) / scale,
+        '说明': [f"{counts[c]} 条相同内容，人天分别为 {day_values[c]}" for c in chosen],
+        '记录ID': [ids[c] for c in chosen],
+    })]
+
+
+def detect_anomalies(df, window=WINDOW, threshold=Z_THRESHOLD, min_periods=MIN_PERIODS,
+                     new_project_days=NEW_PROJECT_MIN_DAYS):
+    """运行全部检测，返回按得分从高到低排列的异常列表"""
+    records = _encode_records(df)
+    tables = (detect_series_spikes(records, window, threshold, min_periods)
+              + detect_new_assignments(records, new_project_days)
+              + detect_copied_content(records))
+    columns = ['类型', '对象', '周次', '人天', '基线', '得分', '说明', '记录ID']
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    table = pd.concat(tables, ignore_index=True)[columns]
+    table[['人天', '基线', '得分']] = table[['人天', '基线', '得分']].round(2)
+    return table.sort_values('得分', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def print_anomalies(table, top=TOP_N):
+    """控制台输出异常摘要和得分最高的若干条"""
+    print(f"\n🚨 共发现 {len(table)} 处异常")
+    for kind, count in table['类型'].value_counts().items():
+        print(f"   {kind}: {count}")
+    if table.empty:
+        return
+    print(f"\n得分最高的 {min(top, len(table))} 处:")
+    for rank, row in enumerate(table.head(top).itertuples(index=False), 1):
+        ids = row.记录ID.split('; ')
+        id_text = '; '.join(ids[:3]) + (f" 等{len(ids)}条" if len(ids) > 3 else '')
+        print(f"{rank:>3}. [{row.类型}] {row.对象} {row.周次}: {row.人天:g} 天（得分 {row.得分:.1f}，{row.说明}）")
+        print(f"       记录ID: {id_text}")
+
+
+def main(source=None, output=DEFAULT_OUTPUT, window=WINDOW, threshold=Z_THRESHOLD, top=TOP_N):
+    from output_writer import submit_write, wait_for_writes
+
+    df = load_weekly_reports(source) if source else load_weekly_reports()
+    table = detect_anomalies(df, window, threshold)
+    submit_write(output, lambda f: table.to_csv(f, index=False), encoding='utf-8-sig', newline='')
+    print_anomalies(table, top)
+    wait_for_writes()
+    print(f"\n✅ 异常列表已保存到: {output}")
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="周报投入异常检测（滚动稳健z分数、新项目突击、复制粘贴）")
+    parser.add_argument('input', nargs='?', help="周报CSV文件、目录或通配符（默认 2025年1-6.csv）")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"异常列表CSV（默认 {DEFAULT_OUTPUT}）")
+    parser.add_argument('--window', type=int, default=WINDOW, help=f"滚动基线窗口周数（默认{WINDOW}）")
+    parser.add_argument('--threshold', type=float, default=Z_THRESHOLD, help=f"稳健z分数阈值（默认{Z_THRESHOLD:g}）")
+    parser.add_argument('--top', type=int, default=TOP_N, help=f"控制台显示条数（默认{TOP_N}）")
+    args = parser.parse_args()
+    main(args.input, args.output, args.window, args.threshold, args.top)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+周报历史归档
+所有导入过的周报记录按 年份/周次 分区保存为Parquet数据集（archive/year=2025/week=14/*.parquet），
+同一记录ID以最新导入的为准。读取时按周期和部门过滤：年份和周次条件只打开匹配的分区目录，
+部门条件下推到Parquet行组统计信息，且只读取调用方需要的列，
+生成Q3报告不会扫描多年的历史数据。需要安装 pyarrow
+"""
+
+import argparse
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from ingest import (DEFAULT_INPUT, DEPT_COLUMN, RECORD_ID_COLUMN, YEAR_COLUMN, deduplicate_records,
+                    expand_departments)
+
+# 归档目录
+DEFAULT_ARCHIVE_DIR = 'archive'
+
+# 分区列（年份分区读取时还原为 YEAR_COLUMN，周次分区与周报的周次列相同，读取时去掉）
+YEAR = 'year'
+WEEK = 'week'
+
+# 各季度的周次范围（与 get_quarter 一致，第53周计入第四季度）
+QUARTER_WEEKS = {1: (1, 13), 2: (14, 26), 3: (27, 39), 4: (40, 53)}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+    except ImportError:
+        raise ImportError("周报归档需要安装 pyarrow（pipenv install pyarrow）") from None
+
+
+def parse_period(spec):
+    """解析周期说明，返回 [(年份, 起始周, 结束周), ...]
+
+    多个周期用逗号分隔，每个可以是 '2025'（全年）、'2025Q3'（季度）、'2025:27-39' 或 '2025:30'（周次）
+    """
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip().upper()
+        match = re.fullmatch(r'(\d{4})(?:Q([1-4])|:(\d+)(?:-(\d+))?)?', part)
+        if not match:
+            raise ValueError(f"无法解析周期: {part}（示例: 2025、2025Q3、2025:27-39）")
+        year, quarter, start, end = match.groups()
+        if quarter:
+            ranges.append((int(year), *QUARTER_WEEKS[int(quarter)]))
+        elif start:
+            ranges.append((int(year), int(start), int(end or start)))
+        else:
+            ranges.append((int(year), 1, 53))
+    return ranges
+
+
+def period_filter(period=None, departments=None):
+    """由周期和部门生成pyarrow过滤表达式，没有条件时返回None
+
+    部门按报告的合并规则展开（如 T1 同时包含 T1电子元件），与报告中的部门口径一致
+    """
+    import pyarrow.dataset as ds
+
+    expression = None
+    if period:
+        ranges = parse_period(period) if isinstance(period, str) else period
+        for year, start, end in ranges:
+            term = (ds.field(YEAR) == year) & (ds.field(WEEK) >= start) & (ds.field(WEEK) <= end)
+            expression = term if expression is None else expression | term
+    if departments:
+        term = ds.field(DEPT_COLUMN).isin(expand_departments(departments))
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def _dataset(directory):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([(YEAR, pa.int16()), (WEEK, pa.int16())]), flavor='hive')
+    return ds.dataset(directory, format='parquet', partitioning=partitioning)
+
+
+def _to_arrow(df):
+    """转换为Arrow表：分类列还原为字符串，保证不同批次导入的分区结构一致"""
+    import pyarrow as pa
+
+    df = df.copy()
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(object)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def append_to_archive(df, directory=DEFAULT_ARCHIVE_DIR):
+    """把一批周报记录（带有 YEAR_COLUMN 年份列，见 load_weekly_reports）追加到归档
+
+    只重写本批记录涉及的分区：分区中已有的记录与本批合并后按记录ID去重（本批优先），
+    记录ID已存在于其他分区的旧记录（如修改过周次）一并移除。返回写入的分区数
+    """
+    _require_pyarrow()
+    import pyarrow.dataset as ds
+
+    incoming = df.rename(columns={YEAR_COLUMN: YEAR})
+    incoming[YEAR] = incoming[YEAR].to_numpy(dtype=np.int16)
+    incoming[WEEK] = pd.to_numeric(incoming['周次'], errors='coerce').fillna(0).to_numpy(dtype=np.int16)
+    partitions = set(zip(incoming[YEAR], incoming[WEEK]))
+
+    existing = None
+    if os.path.isdir(directory) and os.listdir(directory):
+        dataset = _dataset(directory)
+        # 只读记录ID和分区列，找出本批记录在其他分区中的旧版本
+        ids = dataset.to_table(columns=[RECORD_ID_COLUMN, YEAR, WEEK]).to_pandas()
+        moved = ids[ids[RECORD_ID_COLUMN].isin(incoming[RECORD_ID_COLUMN].dropna())]
+        partitions |= set(zip(moved[YEAR], moved[WEEK]))
+
+        touched = [(int(year), int(week), int(week)) for year, week in partitions]
+        existing = dataset.to_table(filter=period_filter(touched)).to_pandas()
+
+    if existing is not None and len(existing):
+        # 旧记录在前、本批在后，去重时保留本批
+        merged = deduplicate_records(pd.concat([existing, incoming], ignore_index=True))
+    else:
+        merged = incoming.reset_index(drop=True)
+
+    # 记录全部移到其他周次的分区不会被重写，直接删除
+    for year, week in partitions - set(zip(merged[YEAR], merged[WEEK])):
+        shutil.rmtree(os.path.join(directory, f'{YEAR}={year}', f'{WEEK}={week}'), ignore_errors=True)
+
+    os.makedirs(directory, exist_ok=True)
+    ds.write_dataset(
+        _to_arrow(merged), directory, format='parquet',
+        partitioning=[YEAR, WEEK], partitioning_flavor='hive',
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='delete_matching',
+    )
+    return len(partitions)
+
+
+def load_archive(period=None, departments=None, columns=None, directory=DEFAULT_ARCHIVE_DIR, lean=False):
+    """读取归档中指定周期和部门的记录，返回与 load_weekly_reports 相同结构的数据表
+
+    columns 为需要的周报列（None 为全部，lean=True 时默认 LEAN_COLUMNS，且人员/项目/中心为分类列、
+    数值列使用紧凑类型），另外总是带有 YEAR_COLUMN 年份列；行按 年份、周次 排列，同一周内保持导入时的顺序
+    """
+    from ingest import CATEGORY_COLUMNS, LEAN_COLUMNS, _compact_numeric_columns
+
+    _require_pyarrow()
+    if not os.path.isdir(directory) or not os.listdir(directory):
+        raise FileNotFoundError(f"未找到周报归档: {directory}（请先运行 archive.py add 导入周报）")
+
+    if columns is None and lean:
+        columns = LEAN_COLUMNS
+    dataset = _dataset(directory)
+    read_columns = None if columns is None else [c for c in columns if c in dataset.schema.names] + [YEAR, WEEK]
+    df = dataset.to_table(columns=read_columns, filter=period_filter(period, departments)).to_pandas()
+    df = df.sort_values([YEAR, WEEK], kind='stable').drop(columns=[WEEK]).reset_index(drop=True)
+    df = df.rename(columns={YEAR: YEAR_COLUMN})
+
+    if lean:
+        for column in CATEGORY_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+        _compact_numeric_columns(df)
+
+    scope = '，'.join(filter(None, [period, '、'.join(departments or [])])) or '全部'
+    print(f"读取归档 {directory}（{scope}）: {len(df)} 行")
+    return df
+
+
+def load_reports(source=DEFAULT_INPUT, period=None, departments=None, archive_dir=None, columns=None,
+                 lean=False, **load_options):
+    """报告脚本的统一数据入口
+
+    指定了 period 或 departments 时从归档读取匹配的分区和 columns 列；
+    否则读取周报CSV（load_weekly_reports 的参数由 load_options 传入），archive_dir 不为空时同时追加到归档
+    """
+    from ingest import load_weekly_reports
+
+    if period or departments:
+        return load_archive(period, departments, columns, archive_dir or DEFAULT_ARCHIVE_DIR, lean)
+    return load_weekly_reports(source, lean=lean, archive_dir=archive_dir, **load_options)
+
+
+def list_partitions(directory=DEFAULT_ARCHIVE_DIR):
+    """各 年份/周次 分区的记录数"""
+    _require_pyarrow()
+    if not os.path.isdir(directory) or not os.listdir(directory):
+        return pd.DataFrame(columns=[YEAR, WEEK, 'records'])
+    table = _dataset(directory).to_table(columns=[YEAR, WEEK]).to_pandas()
+    return table.groupby([YEAR, WEEK]).size().rename('records').reset_index()
+
+
+def add_reports(source=DEFAULT_INPUT, directory=DEFAULT_ARCHIVE_DIR, year=None, validate=False):
+    """导入周报CSV（文件、目录或通配符）并追加到归档；year 为空时按文件名推断年份"""
+    from ingest import load_weekly_reports
+
+    load_weekly_reports(source, validate=validate, archive_dir=directory, year=year)
+
+
+def main(command='list', source=DEFAULT_INPUT, directory=DEFAULT_ARCHIVE_DIR, year=None, validate=False):
+    if command == 'add':
+        add_reports(source, directory, year, validate)
+
+    partitions = list_partitions(directory)
+    print(f"\n🗄️  归档 {directory}: {len(partitions)} 个分区，共 {int(partitions['records'].sum())} 条记录")
+    for year_value, group in partitions.groupby(YEAR):
+        weeks = group[WEEK]
+        print(f"   {year_value}年: 第{weeks.min()}-{weeks.max()}周（{len(group)} 周），{int(group['records'].sum())} 条")
+    return partitions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按 年份/周次 分区的周报历史归档（Parquet，需安装pyarrow）")
+    parser.add_argument('command', nargs='?', choices=('add', 'list'), default='list',
+                        help="add: 导入周报并追加到归档；list: 查看各年份的分区（默认）")
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT, help="add 时导入的周报CSV文件、目录或通配符")
+    parser.add_argument('--dir', default=DEFAULT_ARCHIVE_DIR, help=f"归档目录（默认 {DEFAULT_ARCHIVE_DIR}）")
+    parser.add_argument('--year', type=int, help="导入数据所属年份（默认由文件名推断，如 2025年1-6.csv）")
+    parser.add_argument('--validate', action='store_true', help="导入时做数据质量校验，违规行隔离且不进入归档")
+    args = parser.parse_args()
+    main(args.command, args.input, args.dir, args.year, args.validate)
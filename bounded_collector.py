@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+有界收集器
+报表只展示前N条内容，收集时只保留N条样本并单独记录精确总数，
+数据量增长时内存占用保持不变
+"""
+
+import random
+
+
+class BoundedCollector:
+    """保留最多 limit 条样本的收集器，count 为实际加入的总条数
+
+    mode='first' 保留最先加入的 limit 条（确定性，与原先截取前N条的输出一致）；
+    mode='reservoir' 使用蓄水池抽样，从全部数据中等概率保留 limit 条。
+    """
+
+    def __init__(self, limit, mode='first', seed=0):
+        if mode not in ('first', 'reservoir'):
+            raise ValueError(f"不支持的收集模式: {mode}")
+        self.limit = limit
+        self.mode = mode
+        self.count = 0
+        self.items = []
+        self._rng = random.Random(seed) if mode == 'reservoir' else None
+
+    def add(self, item):
+        """加入一条数据"""
+        self.count += 1
+        if len(self.items) < self.limit:
+            self.items.append(item)
+        elif self.mode == 'reservoir':
+            slot = self._rng.randrange(self.count)
+            if slot < self.limit:
+                self.items[slot] = item
+
+    @property
+    def overflow(self):
+        """未保留的条数"""
+        return self.count - len(self.items)
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        return iter(self.items)
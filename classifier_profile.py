@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词分类规则的命中与耗时分析
+对 analyze_csv.analyze_work_content_semantic 调用的各个关键词判断函数（RULE_HELPERS）：
+  - 统计每条规则（函数中的一个关键词列表）和每个关键词被检查、命中的次数，
+    以及命中后实际决定了分类结果（工作类型、子类型或技术领域）的次数；
+  - 统计每个判断函数的调用次数、返回True的次数和耗时。
+关键词列表从判断函数的源码中提取，不需要修改 analyze_csv.py。
+计数和计时分两遍运行，计数时的额外开销不计入耗时
+"""
+
+import argparse
+import ast
+import inspect
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+
+# 被分析的判断函数名（按源码顺序），新增关键词判断函数时需加入此列表
+RULE_HELPERS = [
+    '_is_equipment_tuning',
+    '_get_tuning_subtype',
+    '_is_software_development',
+    '_analyze_development_details',
+    '_is_maintenance_work',
+    '_analyze_maintenance_details',
+    '_is_system_integration',
+    '_analyze_integration_details',
+    '_is_learning_research',
+    '_infer_technical_area',
+]
+
+# 控制台输出的排行条数
+TOP_N = 20
+
+# 当前正在计数的分析器（计数期间由 _TracedLower 回调）
+_active = None
+
+
+class _TracedText(str):
+    """传给判断函数的内容：lower() 得到会记录关键词检查的字符串"""
+
+    def lower(self):
+        return _TracedLower(str.lower(self))
+
+
+class _TracedLower(str):
+    """记录每次 `关键词 in content_lower` 的检查结果"""
+
+    def __contains__(self, keyword):
+        hit = str.__contains__(self, keyword)
+        if _active is not None:
+            _active.record(sys._getframe(1), keyword, hit)
+        return hit
+
+
+def _helper_names(module):
+    """按源码顺序列出模块中存在的判断函数"""
+    helpers = [
+        (func.__code__.co_firstlineno, name)
+        for name, func in ((name, getattr(module, name, None)) for name in RULE_HELPERS)
+        if inspect.isfunction(func) and func.__module__ == module.__name__
+    ]
+    return [name for _, name in sorted(helpers)]
+
+
+def _string_list(node):
+    """全部由字符串常量组成的列表字面量返回其内容，否则返回None"""
+    if isinstance(node, (ast.List, ast.Tuple)) and node.elts and all(
+            isinstance(elt, ast.Constant) and isinstance(elt.value, str) for elt in node.elts):
+        return [elt.value for elt in node.elts]
+    return None
+
+
+def _context_label(node):
+    """列表字面量所在的上下文：赋值目标名，或所在 if 分支返回的第一个字符串"""
+    child, parent = node, getattr(node, 'parent', None)
+    while parent is not None:
+        if isinstance(parent, ast.Assign) and isinstance(parent.targets[0], ast.Name):
+            return parent.targets[0].id
+        if isinstance(parent, ast.If) and child is parent.test:
+            for stmt in ast.walk(ast.Module(body=parent.body, type_ignores=[])):
+                if isinstance(stmt, ast.Return) and stmt.value is not None:
+                    value = stmt.value.elts[0] if isinstance(stmt.value, ast.Tuple) else stmt.value
+                    if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                        return value.value
+            break
+        child, parent = parent, getattr(parent, 'parent', None)
+    return f"第{node.lineno}行"
+
+
+def _is_negated(node, negated_names):
+    """列表命中是否使判断结果取反：数出到所在语句之间的 not，赋值目标之后又以 not 使用时再取反一次"""
+    negated = False
+    parent = node.parent
+    while not isinstance(parent, ast.stmt):
+        if isinstance(parent, ast.UnaryOp) and isinstance(parent.op, ast.Not):
+            negated = not negated
+        parent = parent.parent
+    if isinstance(parent, ast.Assign) and isinstance(parent.targets[0], ast.Name) \
+            and parent.targets[0].id in negated_names:
+        negated = not negated
+    return negated
+
+
+def collect_rules(module):
+    """从判断函数源码中提取规则，返回 ({(函数, 规则): [关键词]}, {检查所在行号: (函数, 规则)}, {否定规则})
+
+    规则是被 `for 关键词 in 列表` 遍历并与 content_lower 比较的关键词列表：
+    命名的列表以变量名为规则名，同一函数中再次遍历时附加所在的赋值目标；
+    写在 if 条件中的列表以该分支的返回值为规则名。
+    否定规则（如"不包含开发动作"）命中时反而使判断不成立，不计入决定次数
+    """
+    source_file = inspect.getsourcefile(module)
+    tree = ast.parse(open(source_file, encoding='utf-8').read())
+    helpers = set(_helper_names(module))
+
+    vocabulary = {}
+    line_rules = {}
+    negated_rules = set()
+    for func in tree.body:
+        if not isinstance(func, ast.FunctionDef) or func.name not in helpers:
+            continue
+        for node in ast.walk(func):
+            for child in ast.iter_child_nodes(node):
+                child.parent = node
+
+        negated_names = {
+            node.operand.id for node in ast.walk(func)
+            if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not) and isinstance(node.operand, ast.Name)
+        }
+        named_lists = {}
+        for node in ast.walk(func):
+            if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+                keywords = _string_list(node.value)
+                if keywords is not None:
+                    named_lists[node.targets[0].id] = keywords
+
+        seen_names = set()
+        loops = [node for node in ast.walk(func) if isinstance(node, (ast.comprehension, ast.For))]
+        for loop in sorted(loops, key=lambda node: (node.iter.lineno, node.iter.col_offset)):
+            if not isinstance(loop.target, ast.Name):
+                continue
+            if isinstance(loop.iter, ast.Name) and loop.iter.id in named_lists:
+                keywords = named_lists[loop.iter.id]
+                rule = loop.iter.id
+                if rule in seen_names:
+                    rule = f"{rule}（{_context_label(loop.iter)}）"
+                seen_names.add(loop.iter.id)
+            else:
+                keywords = _string_list(loop.iter)
+                if keywords is None:
+                    continue
+                rule = _context_label(loop.iter)
+
+            # 找到与循环变量做 in 比较的位置
+            scope = loop.parent if isinstance(loop, ast.comprehension) else loop
+            for node in ast.walk(scope):
+                if (isinstance(node, ast.Compare) and isinstance(node.ops[0], ast.In)
+                        and isinstance(node.left, ast.Name) and node.left.id == loop.target.id):
+                    line_rules[node.lineno] = (func.name, rule)
+            vocabulary[(func.name, rule)] = keywords
+            if isinstance(loop, ast.comprehension) and _is_negated(loop, negated_names):
+                negated_rules.add((func.name, rule))
+
+    return vocabulary, line_rules, negated_rules
+
+
+class RuleProfiler:
+    """在 analyze_csv 的判断函数外包一层，统计规则命中、决定次数和函数耗时"""
+
+    def __init__(self, module):
+        self.module = module
+        self.source_file = module.__file__
+        self.helpers = _helper_names(module)
+        self.vocabulary, self.line_rules, self.negated_rules = collect_rules(module)
+
+        self.checks = Counter()          # (函数, 规则, 关键词) -> 检查次数
+        self.hits = Counter()            # (函数, 规则, 关键词) -> 命中次数
+        self.keyword_decisions = Counter()
+        self.rule_decisions = Counter()  # (函数, 规则) -> 命中且决定结果的调用次数
+        self.calls = Counter()           # 函数 -> 调用次数
+        self.true_calls = Counter()      # 函数 -> 返回真值的次数
+        self.total_time = defaultdict(float)
+        self.self_time = defaultdict(float)
+        self.type_counts = Counter()
+        self.records = 0
+        self.analyze_seconds = 0.0
+        self._stack = []
+
+    def record(self, frame, keyword, hit):
+        """_TracedLower 的回调：把一次关键词检查记到当前判断函数的对应规则上"""
+        if not self._stack or frame.f_code.co_filename != self.source_file:
+            return
+        helper, hits = self._stack[-1]
+        rule = self.line_rules.get(frame.f_lineno, (helper, f"第{frame.f_lineno}行"))
+        key = rule + (keyword,)
+        self.checks[key] += 1
+        if hit:
+            self.hits[key] += 1
+            hits.append(key)
+
+    def _counting_wrapper(self, name, func):
+        def wrapper(content, *args, **kwargs):
+            self._stack.append((name, []))
+            try:
+                result = func(_TracedText(content), *args, **kwargs)
+            finally:
+                _, hits = self._stack.pop()
+            self.calls[name] += 1
+            if result:
+                self.true_calls[name] += 1
+            # _is_* 返回True时决定工作类型，其余函数的返回值就是子类型/技术领域
+            if result or not name.startswith('_is_'):
+                hits = [key for key in hits if key[:2] not in self.negated_rules]
+                for key in hits:
+                    self.keyword_decisions[key] += 1
+                for rule in dict.fromkeys(key[:2] for key in hits):
+                    self.rule_decisions[rule] += 1
+            return result
+        return wrapper
+
+    def _timing_wrapper(self, name, func):
+        def wrapper(*args, **kwargs):
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = self._stack.pop()
+                self.total_time[name] += elapsed
+                self.self_time[name] += elapsed - children
+                if self._stack:
+                    self._stack[-1] += elapsed
+        return wrapper
+
+    def _run(self, make_wrapper, rows):
+        """在判断函数被替换为 make_wrapper 包装的版本时分析全部记录，返回结果列表"""
+        originals = {name: getattr(self.module, name) for name in self.helpers}
+        try:
+            for name, func in originals.items():
+                setattr(self.module, name, make_wrapper(name, func))
+            analyze = self.module.analyze_work_content_semantic
+            return [analyze(*row) for row in rows]
+        finally:
+            for name, func in originals.items():
+                setattr(self.module, name, func)
+
+    def profile(self, rows):
+        """rows 为 (内容, 人员, 项目, 天数) 序列；先计时、再计数，两遍结果须一致"""
+        global _active
+
+        rows = list(rows)
+        self.records = len(rows)
+
+        start = time.perf_counter()
+        timed = self._run(self._timing_wrapper, rows)
+        self.analyze_seconds = time.perf_counter() - start
+
+        _active = self
+        try:
+            counted = self._run(self._counting_wrapper, rows)
+        finally:
+            _active = None
+
+        if counted != timed:
+            raise RuntimeError("计数运行与计时运行的分类结果不一致")
+        self.type_counts.update(result['type'] for result in timed)
+        return timed
+
+    def helper_table(self):
+        """判断函数统计，按自身耗时从高到低排序"""
+        rows = []
+        for name in self.helpers:
+            calls = self.calls[name]
+            rows.append({
+                'helper': name,
+                'calls': calls,
+                'true_calls': self.true_calls[name],
+                'total_ms': self.total_time[name] * 1000,
+                'self_ms': self.self_time[name] * 1000,
+                'avg_us': self.total_time[name] / calls * 1e6 if calls else 0.0,
+            })
+        return sorted(rows, key=lambda row: -row['self_ms'])
+
+    def rule_table(self):
+        """规则统计，按决定次数、命中次数排序"""
+        rows = []
+        for (helper, rule), keywords in self.vocabulary.items():
+            keys = [(helper, rule, keyword) for keyword in keywords]
+            rows.append({
+                'helper': helper,
+                'rule': rule,
+                'negated': (helper, rule) in self.negated_rules,
+                'keywords': len(keywords),
+                'checks': sum(self.checks[key] for key in keys),
+                'hits': sum(self.hits[key] for key in keys),
+                'decisions': self.rule_decisions[(helper, rule)],
+                'never_hit': [keyword for keyword in keywords if not self.hits[(helper, rule, keyword)]],
+                'never_decided': [keyword for keyword in keywords
+                                  if self.hits[(helper, rule, keyword)]
+                                  and not self.keyword_decisions[(helper, rule, keyword)]],
+            })
+        return sorted(rows, key=lambda row: (-row['decisions'], -row['hits'], row['helper'], row['rule']))
+
+    def keyword_table(self):
+        """关键词统计（只含命中过的关键词），按决定次数、命中次数排序"""
+        rows = []
+        for (helper, rule, keyword), hits in self.hits.items():
+            key = (helper, rule, keyword)
+            rows.append({'helper': helper, 'rule': rule, 'keyword': keyword, 'checks': self.checks[key],
+                         'hits': hits, 'decisions': self.keyword_decisions[key]})
+        return sorted(rows, key=lambda row: (-row['decisions'], -row['hits'], row['keyword']))
+
+    def to_dict(self):
+        return {
+            'records': self.records,
+            'analyze_seconds': self.analyze_seconds,
+            'type_counts': dict(self.type_counts),
+            'helpers': self.helper_table(),
+            'rules': self.rule_table(),
+            'keywords': self.keyword_table(),
+        }
+
+
+def print_profile(profiler, top=TOP_N):
+    """控制台输出排行报告"""
+    print(f"\n🔬 关键词分类规则分析: {profiler.records} 条记录，分类总耗时 {profiler.analyze_seconds * 1000:.1f} ms")
+    print("   工作类型: " + "，".join(f"{work_type} {count}" for work_type, count in profiler.type_counts.most_common()))
+
+    print(f"\n⏱️  判断函数耗时（按自身耗时排序）:")
+    print(f"   {'函数':<30} {'调用':>7} {'返回真':>7} {'累计ms':>9} {'自身ms':>9} {'平均µs':>8}")
+    for row in profiler.helper_table():
+        print(f"   {row['helper']:<30} {row['calls']:>7} {row['true_calls']:>7} "
+              f"{row['total_ms']:>9.2f} {row['self_ms']:>9.2f} {row['avg_us']:>8.1f}")
+
+    rules = profiler.rule_table()
+    print(f"\n📋 规则排行（按决定次数排序）:")
+    print(f"   {'函数.规则':<58} {'词数':>4} {'检查':>8} {'命中':>6} {'决定':>6}")
+    for row in rules:
+        name = f"{row['helper']}.{row['rule']}" + ('（否定）' if row['negated'] else '')
+        print(f"   {name:<58} {row['keywords']:>4} {row['checks']:>8} {row['hits']:>6} {row['decisions']:>6}")
+
+    keywords = profiler.keyword_table()
+    print(f"\n🔑 决定结果最多的关键词 TOP {top}:")
+    for row in keywords[:top]:
+        print(f"   {row['keyword']:<10} {row['decisions']:>6} 次决定 / {row['hits']:>6} 次命中  "
+              f"({row['helper']}.{row['rule']})")
+
+    dead = [(row, row['never_hit']) for row in rules if row['never_hit']]
+    if dead:
+        print(f"\n🪦 从未命中的关键词（共 {sum(len(words) for _, words in dead)} 个，可考虑删除；"
+              f"any 检查中总被同列表靠前的关键词抢先的也在此列）:")
+        for row, words in dead:
+            print(f"   {row['helper']}.{row['rule']}: {'、'.join(words)}")
+
+    idle = [(row, row['never_decided']) for row in rules if row['never_decided'] and not row['negated']]
+    if idle:
+        print(f"\n💤 命中过但从未决定结果的关键词:")
+        for row, words in idle:
+            print(f"   {row['helper']}.{row['rule']}: {'、'.join(words)}")
+
+
+def main(source=None, top=TOP_N, output=None):
+    import analyze_csv
+    from ingest import CONTENT_COLUMN, DAYS_COLUMN, DEFAULT_INPUT, load_weekly_reports
+
+    df = load_weekly_reports(source or DEFAULT_INPUT)
+    profiler = RuleProfiler(analyze_csv)
+    profiler.profile(zip(df[CONTENT_COLUMN], df['周报人'], df['订单项目.立项项目'], df[DAYS_COLUMN]))
+    print_profile(profiler, top)
+
+    if output:
+        from output_writer import submit_write, wait_for_writes
+
+        report = profiler.to_dict()
+        submit_write(output, lambda f: json.dump(report, f, ensure_ascii=False, indent=2))
+        wait_for_writes()
+        print(f"\n✅ 分析结果已保存到: {output}")
+    return profiler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="关键词分类规则的命中次数、决定次数和判断函数耗时分析")
+    parser.add_argument('input', nargs='?', help="周报CSV文件、目录或通配符（默认 2025年1-6.csv）")
+    parser.add_argument('--top', type=int, default=TOP_N, help=f"关键词排行条数（默认{TOP_N}）")
+    parser.add_argument('--output', help="把完整统计保存为JSON文件")
+    args = parser.parse_args()
+    main(args.input, args.top, args.output)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成离线HTML工时看板
+页面内嵌预先汇总的数据：记录先按 部门/项目/季度/人员/工作类型/技术领域 汇总为人天和记录数，
+各维度的取值只保存一次（字典编码），汇总行只保存整数编码，不嵌入原始记录。
+多年数据的看板大小取决于维度组合数而不是记录数，无需联网或服务器即可打开。
+页面提供工作类型和技术领域占比、部门→项目→季度逐级下钻以及项目人天TOP-N
+"""
+
+import argparse
+import html
+import json
+
+import pandas as pd
+
+from ingest import DAYS_COLUMN, DEFAULT_INPUT, PARSER_ENGINES, YEAR_COLUMN, load_weekly_reports
+
+DEFAULT_OUTPUT = '工时统计看板.html'
+
+# 汇总维度（payload 中的字段名 -> 说明）
+DIMENSIONS = {
+    'dept': '部门',
+    'project': '项目',
+    'quarter': '季度',
+    'person': '人员',
+    'type': '工作类型',
+    'area': '技术领域',
+}
+
+# 缺失值的显示名称
+MISSING_LABEL = '未知'
+
+# 默认TOP-N项目数
+TOP_N = 10
+
+
+def build_cube(df, analyses):
+    """把记录汇总为各维度组合的人天和记录数，analyses 为与 df 行对应的逐条分析结果"""
+    from analyze_csv import TECH_AREA_NAMES, TYPE_NAMES
+    from generate_final_optimized_report import get_quarter, merge_departments
+
+    departments = merge_departments(df[['订单项目.归属中心']])['订单项目.归属中心']
+    quarters = pd.to_numeric(df['周次'], errors='coerce').map(
+        lambda week: get_quarter(week) if week == week else None)
+    # 季度带上年份，多年数据的同一季度分开统计（没有年份列时只显示季度）
+    years = df[YEAR_COLUMN].to_numpy() if YEAR_COLUMN in df.columns else [None] * len(df)
+    quarter_labels = [MISSING_LABEL if q is None or q != q else
+                      f"第{int(q)}季度" if year is None else f"{int(year)}年第{int(q)}季度"
+                      for year, q in zip(years, quarters)]
+
+    frame = pd.DataFrame({
+        'dept': departments.astype(object).fillna(MISSING_LABEL).to_numpy(),
+        'project': df['订单项目.立项项目'].astype(object).fillna(MISSING_LABEL).to_numpy(),
+        'quarter': quarter_labels,
+        'person': df['周报人'].astype(object).fillna(MISSING_LABEL).to_numpy(),
+        'type': [TYPE_NAMES.get(a['analysis']['type'], a['analysis']['type']) for a in analyses],
+        'area': [TECH_AREA_NAMES.get(a['analysis']['technical_area'], a['analysis']['technical_area'])
+                 for a in analyses],
+        'days': pd.to_numeric(df[DAYS_COLUMN], errors='coerce').fillna(0.0).to_numpy(),
+    })
+    return frame.groupby(list(DIMENSIONS), sort=False).agg(
+        days=('days', 'sum'), records=('days', 'size')).reset_index()
+
+
+def encode_payload(cube, title):
+    """字典编码：每个维度保存排序后的取值表，汇总行保存各维度的整数编码（按列存放）"""
+    payload = {'title': title, 'labels': DIMENSIONS, 'dims': {}, 'rows': {}}
+    for dimension in DIMENSIONS:
+        codes, values = pd.factorize(cube[dimension], sort=True)
+        payload['dims'][dimension] = values.tolist()
+        payload['rows'][dimension] = codes.tolist()
+    payload['rows']['days'] = cube['days'].round(3).tolist()
+    payload['rows']['records'] = cube['records'].astype(int).tolist()
+    return payload
+
+
+def render_html(payload, top=TOP_N):
+    """把数据嵌入页面模板，返回完整的HTML文本"""
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return (HTML_TEMPLATE
+            .replace('__TITLE__', html.escape(payload['title']))
+            .replace('__TOP_N__', str(top))
+            .replace('__PAYLOAD__', data))
+
+
+def build_dashboard(df, analyses, output=DEFAULT_OUTPUT, title='周报工时统计看板', top=TOP_N):
+    """汇总并在后台写出看板，返回嵌入的数据"""
+    from output_writer import submit_write
+
+    cube = build_cube(df, analyses)
+    payload = encode_payload(cube, title)
+    page = render_html(payload, top)
+    submit_write(output, lambda f: f.write(page))
+    print(f"看板数据: {len(df)} 条记录汇总为 {len(cube)} 行，页面 {len(page.encode('utf-8')) / 1024:.1f} KB")
+    return payload
+
+
+def main(source=DEFAULT_INPUT, output=DEFAULT_OUTPUT, model_path=None, engine='c', top=TOP_N, title=None):
+    from analyze_csv import analyze_all_records
+    from output_writer import wait_for_writes
+
+    df = load_weekly_reports(source, engine=engine)
+    model = None
+    if model_path:
+        from work_type_model import load_model
+
+        model = load_model(model_path)
+    analyses, _ = analyze_all_records(df, model)
+
+    build_dashboard(df, analyses, output, title or '周报工时统计看板', top)
+    wait_for_writes()
+    print(f"✅ 看板已生成: {output}（离线打开即可）")
+
+
+HTML_TEMPLATE = r'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>__TITLE__</title>
+<style>
+  body { font-family: "Microsoft YaHei", "PingFang SC", sans-serif; margin: 0; background: #f4f6f9; color: #222; }
+  header { background: #366092; color: #fff; padding: 16px 24px; }
+  header h1 { margin: 0; font-size: 22px; }
+  main { padding: 16px 24px; }
+  .filters { display: flex; flex-wrap: wrap; gap: 12px; align-items: center; margin-bottom: 12px; }
+  .filters select, .filters input { padding: 4px 6px; font-size: 14px; max-width: 420px; }
+  .crumbs a { color: #366092; cursor: pointer; text-decoration: underline; }
+  .kpis { display: flex; flex-wrap: wrap; gap: 12px; margin-bottom: 16px; }
+  .kpi { background: #fff; border-radius: 6px; padding: 12px 20px; box-shadow: 0 1px 3px rgba(0,0,0,.1); min-width: 140px; }
+  .kpi .value { font-size: 26px; font-weight: bold; color: #366092; }
+  .kpi .name { font-size: 13px; color: #666; }
+  .grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(420px, 1fr)); gap: 16px; }
+  section { background: #fff; border-radius: 6px; padding: 12px 16px; box-shadow: 0 1px 3px rgba(0,0,0,.1); }
+  section h2 { font-size: 16px; margin: 4px 0 10px; }
+  table { width: 100%; border-collapse: collapse; font-size: 13px; }
+  th, td { padding: 4px 6px; border-bottom: 1px solid #eee; text-align: left; }
+  td.num, th.num { text-align: right; white-space: nowrap; }
+  tr.link { cursor: pointer; }
+  tr.link:hover { background: #eef3fa; }
+  .bar { background: #dde6f2; height: 12px; border-radius: 2px; min-width: 120px; }
+  .bar div { background: #366092; height: 12px; border-radius: 2px; }
+  .muted { color: #888; font-size: 12px; }
+</style>
+</head>
+<body>
+<header><h1>__TITLE__</h1></header>
+<main>
+  <div class="filters">
+    <label>部门 <select id="dept"></select></label>
+    <label>项目 <select id="project"></select></label>
+    <label>季度 <select id="quarter"></select></label>
+    <label>TOP <input id="top" type="number" min="1" value="__TOP_N__" style="width:60px"></label>
+    <span class="crumbs" id="crumbs"></span>
+  </div>
+  <div class="kpis" id="kpis"></div>
+  <div class="grid">
+    <section><h2>工作类型占比</h2><table id="types"></table></section>
+    <section><h2>技术领域占比</h2><table id="areas"></table></section>
+    <section><h2 id="drill-title">下钻</h2><table id="drill"></table><div class="muted">点击行进入下一级</div></section>
+    <section><h2 id="top-title">项目人天TOP</h2><table id="top-projects"></table></section>
+  </div>
+</main>
+<script type="application/json" id="payload">__PAYLOAD__</script>
+<script>
+(function () {
+  var data = JSON.parse(document.getElementById('payload').textContent);
+  var dims = data.dims, rows = data.rows, n = rows.days.length;
+  var state = {dept: -1, project: -1, quarter: -1};
+
+  function fmt(x) { return x.toFixed(1); }
+  function el(id) { return document.getElementById(id); }
+
+  // 当前筛选条件下的汇总行下标
+  function selected(except) {
+    var keep = [];
+    for (var i = 0; i < n; i++) {
+      var ok = true;
+      for (var key in state) {
+        if (key !== except && state[key] >= 0 && rows[key][i] !== state[key]) { ok = false; break; }
+      }
+      if (ok) keep.push(i);
+    }
+    return keep;
+  }
+
+  // 按维度分组汇总：返回 [{code, days, records, people}]，按人天降序
+  function groupBy(index, dim) {
+    var groups = {};
+    index.forEach(function (i) {
+      var code = rows[dim][i];
+      var g = groups[code] || (groups[code] = {code: code, days: 0, records: 0, people: {}});
+      g.days += rows.days[i];
+      g.records += rows.records[i];
+      g.people[rows.person[i]] = 1;
+    });
+    return Object.keys(groups).map(function (k) {
+      var g = groups[k];
+      g.people = Object.keys(g.people).length;
+      return g;
+    }).sort(function (a, b) { return b.days - a.days; });
+  }
+
+  function fillSelect(id, dim, index) {
+    var select = el(id), codes = {};
+    index.forEach(function (i) { codes[rows[dim][i]] = 1; });
+    var options = ['<option value="-1">全部</option>'];
+    Object.keys(codes).map(Number).sort(function (a, b) { return a - b; }).forEach(function (code) {
+      options.push('<option value="' + code + '"' + (code === state[dim] ? ' selected' : '') + '>' +
+                   escapeHtml(dims[dim][code]) + '</option>');
+    });
+    select.innerHTML = options.join('');
+  }
+
+  function escapeHtml(text) {
+    return String(text).replace(/[&<>"]/g, function (c) {
+      return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c];
+    });
+  }
+
+  function renderShare(id, groups, dim, total) {
+    var html = ['<tr><th>' + data.labels[dim] + '</th><th class="num">人天</th><th class="num">占比</th>' +
+                '<th class="num">记录</th><th></th></tr>'];
+    groups.forEach(function (g) {
+      var share = total ? g.days / total : 0;
+      html.push('<tr><td>' + escapeHtml(dims[dim][g.code]) + '</td><td class="num">' + fmt(g.days) +
+                '</td><td class="num">' + (share * 100).toFixed(1) + '%</td><td class="num">' + g.records +
+                '</td><td><div class="bar"><div style="width:' + (share * 100).toFixed(1) + '%"></div></div></td></tr>');
+    });
+    el(id).innerHTML = html.join('');
+  }
+
+  function renderTable(id, groups, dim, clickable) {
+    var max = groups.length ? groups[0].days : 0;
+    var html = ['<tr><th>' + data.labels[dim] + '</th><th class="num">人天</th><th class="num">人数</th>' +
+                '<th class="num">记录</th><th></th></tr>'];
+    groups.forEach(function (g) {
+      html.push('<tr' + (clickable ? ' class="link" data-code="' + g.code + '"' : '') + '><td>' +
+                escapeHtml(dims[dim][g.code]) + '</td><td class="num">' + fmt(g.days) + '</td><td class="num">' +
+                g.people + '</td><td class="num">' + g.records + '</td><td><div class="bar"><div style="width:' +
+                (max ? g.days / max * 100 : 0).toFixed(1) + '%"></div></div></td></tr>');
+    });
+    var table = el(id);
+    table.innerHTML = html.join('');
+    if (clickable) {
+      Array.prototype.forEach.call(table.querySelectorAll('tr.link'), function (tr) {
+        tr.onclick = function () { state[clickable] = Number(tr.getAttribute('data-code')); render(); };
+      });
+    }
+  }
+
+  function render() {
+    fillSelect('dept', 'dept', selected('dept'));
+    fillSelect('project', 'project', selected('project'));
+    fillSelect('quarter', 'quarter', selected('quarter'));
+
+    var index = selected(null);
+    var total = 0, records = 0, people = {}, projects = {};
+    index.forEach(function (i) {
+      total += rows.days[i];
+      records += rows.records[i];
+      people[rows.person[i]] = 1;
+      projects[rows.project[i]] = 1;
+    });
+    el('kpis').innerHTML = [['总人天', fmt(total)], ['记录数', records],
+                            ['人数', Object.keys(people).length], ['项目数', Object.keys(projects).length]]
+      .map(function (k) { return '<div class="kpi"><div class="value">' + k[1] + '</div><div class="name">' + k[0] + '</div></div>'; })
+      .join('');
+
+    renderShare('types', groupBy(index, 'type'), 'type', total);
+    renderShare('areas', groupBy(index, 'area'), 'area', total);
+
+    // 下钻层级：部门 → 项目 → 季度 → 人员
+    var level = state.dept < 0 ? 'dept' : state.project < 0 ? 'project' : state.quarter < 0 ? 'quarter' : 'person';
+    el('drill-title').textContent = '按' + data.labels[level] + '下钻';
+    renderTable('drill', groupBy(index, level), level, level === 'person' ? null : level);
+
+    var top = Math.max(1, Number(el('top').value) || __TOP_N__);
+    el('top-title').textContent = '项目人天TOP ' + top;
+    renderTable('top-projects', groupBy(selected('project'), 'project').slice(0, top), 'project', 'project');
+
+    var crumbs = ['<a data-level="all">全部</a>'];
+    ['dept', 'project', 'quarter'].forEach(function (dim) {
+      if (state[dim] >= 0) crumbs.push('<a data-level="' + dim + '">' + escapeHtml(dims[dim][state[dim]]) + '</a>');
+    });
+    el('crumbs').innerHTML = crumbs.join(' › ');
+    Array.prototype.forEach.call(el('crumbs').querySelectorAll('a'), function (a) {
+      a.onclick = function () {
+        var level = a.getAttribute('data-level'), clear = level === 'all';
+        ['dept', 'project', 'quarter'].forEach(function (dim) {
+          if (clear) state[dim] = -1;
+          if (dim === level) clear = true;
+        });
+        render();
+      };
+    });
+  }
+
+  ['dept', 'project', 'quarter'].forEach(function (dim) {
+    el(dim).onchange = function () {
+      state[dim] = Number(el(dim).value);
+      if (dim === 'dept') state.project = -1;
+      render();
+    };
+  });
+  el('top').onchange = render;
+  render();
+})();
+</script>
+</body>
+</html>
+'''
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成离线HTML工时看板（内嵌预汇总、字典编码的数据）")
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT,
+                        help="周报CSV文件、目录或通配符（多个文件按记录ID去重）")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"输出的HTML文件（默认 {DEFAULT_OUTPUT}）")
+    parser.add_argument('--model', help="使用统计分类器（work_type_model.py 训练得到的模型文件）代替关键词规则")
+    parser.add_argument('--engine', choices=PARSER_ENGINES, default='c',
+                        help="CSV解析引擎：c（默认）或 pyarrow（多线程，需安装pyarrow）")
+    parser.add_argument('--top', type=int, default=TOP_N, help=f"默认显示的TOP-N项目数（默认{TOP_N}）")
+    parser.add_argument('--title', help="看板标题")
+    args = parser.parse_args()
+    main(args.input, args.output, args.model, args.engine, args.top, args.title)
@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+参考实现与快速路径的差异对比
+以现有的逐行实现为参考，在真实周报和随机生成的合成数据上运行所有已登记的快速路径，
+逐字段比较输出，并检查各阶段的耗时和峰值内存预算。
+任何快速路径结果不一致、超出预算或明显慢于参考实现时返回非零退出码
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from ingest import CONTENT_COLUMN, DAYS_COLUMN, DEFAULT_INPUT, RECORD_ID_COLUMN, YEAR_COLUMN, infer_year, read_weekly_csv
+
+# 合成数据默认行数和随机种子
+SYNTHETIC_ROWS = 20000
+SYNTHETIC_SEED = 0
+
+# 计时取多次运行中的最小值
+TIMING_REPEAT = 3
+
+# 快速路径相对参考实现允许的耗时/峰值内存倍数（小于 MIN_* 的差异视为测量噪声）
+TIME_TOLERANCE = 1.5
+MEMORY_TOLERANCE = 1.5
+MIN_SECONDS = 0.2
+MIN_MEMORY_MB = 1.0
+
+# 数值比较的相对误差
+FLOAT_TOLERANCE = 1e-9
+
+# 每个阶段最多列出的差异条数
+MAX_DIFFS = 10
+
+# 检查点续跑：分析分成的块数，其中前一半的块在“中断”前完成
+CHECKPOINT_CHUNKS = 8
+
+# 统计分类器：训练样本行数和迭代次数（只需得到一个模型，对比整批与逐条预测）
+MODEL_TRAIN_ROWS = 2000
+MODEL_EPOCHS = 50
+
+# 排序规则：排序列、升降序和部门的固定顺序
+SORT_COLUMNS = ['订单项目.归属中心', '订单项目.立项项目', '周报人', '周次', DAYS_COLUMN]
+SORT_ASCENDING = [True, True, True, True, False]
+SORT_ORDERS = {'订单项目.归属中心': ['T4', 'T2']}
+
+# 增量导入：第二批对第一批中每隔N条记录做一次更正（记录ID不变，周次和人天改变）
+CORRECTION_STEP = 10
+
+# 各阶段的绝对预算：每万行输入允许的秒数和峰值内存（MB），参考实现和快速路径都须满足；
+# peak_mb_floor 为与行数无关的内存下限（如分批预测时一批的中间数组），低于它的峰值内存不视为问题
+STAGE_BUDGETS = {
+    'analyze_work_content_semantic': {'seconds_per_10k': 2.0, 'peak_mb_per_10k': 40.0},
+    'extract_work_items': {'seconds_per_10k': 0.5, 'peak_mb_per_10k': 20.0},
+    'process_raw_data_to_quarterly': {'seconds_per_10k': 1.0, 'peak_mb_per_10k': 40.0},
+    'generate_final_optimized_report': {'seconds_per_10k': 2.0, 'peak_mb_per_10k': 40.0},
+    'predict': {'seconds_per_10k': 4.0, 'peak_mb_per_10k': 60.0, 'peak_mb_floor': 40.0},
+    'sort_frame': {'seconds_per_10k': 0.5, 'peak_mb_per_10k': 20.0},
+    'update_state': {'seconds_per_10k': 0.5, 'peak_mb_per_10k': 20.0},
+    'update_burn': {'seconds_per_10k': 0.5, 'peak_mb_per_10k': 20.0},
+}
+
+
+def _reference_analyze(df):
+    from analyze_csv import analyze_work_content_semantic
+
+    return [
+        analyze_work_content_semantic(content, person, project, days)
+        for content, person, project, days in zip(
+            df[CONTENT_COLUMN], df['周报人'], df['订单项目.立项项目'], df[DAYS_COLUMN])
+    ]
+
+
+def _reference_extract(df):
+    from extract_requirements_bugs import extract_work_items
+
+    return [extract_work_items(content) for content in df[CONTENT_COLUMN]]
+
+
+def _reference_quarterly(df):
+    from generate_final_optimized_report import process_raw_data_to_quarterly
+
+    return process_raw_data_to_quarterly(df)
+
+
+def _reference_final_report(df):
+    from generate_final_optimized_report import generate_final_optimized_report, process_raw_data_to_quarterly
+
+    return generate_final_optimized_report(process_raw_data_to_quarterly(df))
+
+
+def _checkpoint_resume(df):
+    """分块分析并写检查点：前一半的块完成后中断，再从检查点续跑完剩余的块"""
+    from analysis_checkpoint import AnalysisCheckpoint, input_fingerprint
+    from analyze_csv import _analyze_rows, analyze_all_records
+
+    fingerprint = input_fingerprint(df)
+    chunk_rows = max(-(-len(df) // CHECKPOINT_CHUNKS), 1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = os.path.join(tmp_dir, 'checkpoint')
+        checkpoint = AnalysisCheckpoint.start(fingerprint, len(df), chunk_rows, directory)
+        chunks = checkpoint.chunk_ranges()
+        for start, stop in chunks[:len(chunks) // 2]:
+            checkpoint.save_chunk(start, _analyze_rows(df, None, start, stop))
+
+        checkpoint = AnalysisCheckpoint.start(fingerprint, len(df), chunk_rows, directory, resume=True)
+        analyses, _ = analyze_all_records(df, None, checkpoint)
+    return [analysis['analysis'] for analysis in analyses]
+
+
+# 最近一次训练的 (数据表, 模型)，同一输入的参考实现和快速路径共用一个模型
+_model_cache = {}
+
+
+def _work_type_model(df):
+    """在输入的前 MODEL_TRAIN_ROWS 条有内容的记录上训练统计分类器（规则分类结果为标签）"""
+    from work_type_model import build_training_labels, train_model
+
+    if _model_cache.get('frame') is not df:
+        sample = df[df[CONTENT_COLUMN].notna()].head(MODEL_TRAIN_ROWS)
+        model = train_model(sample[CONTENT_COLUMN].tolist(), build_training_labels(sample), epochs=MODEL_EPOCHS)
+        _model_cache.update(frame=df, model=model)
+    return _model_cache['model']
+
+
+def _describe_predictions(df, predictions):
+    """predictions(model, contents) 返回与 contents 对应的 (类别, 置信度)；内容为空的记录按规则分析"""
+    from analyze_csv import analyze_work_content_semantic, describe_predicted_type
+
+    columns = [df[CONTENT_COLUMN], df['周报人'], df['订单项目.立项项目'], df[DAYS_COLUMN]]
+    present = [not (pd.isna(content) or content == '') for content in df[CONTENT_COLUMN]]
+    predicted = iter(predictions(_work_type_model(df), df[CONTENT_COLUMN][present].tolist()))
+    return [
+        describe_predicted_type(content, *next(predicted)) if has_content
+        else analyze_work_content_semantic(content, person, project, days)
+        for has_content, (content, person, project, days) in zip(present, zip(*columns))
+    ]
+
+
+def _reference_predict(df):
+    """逐条预测"""
+    from work_type_model import predict
+
+    def one_by_one(model, contents):
+        for content in contents:
+            (work_type,), confidence = predict(model, [content])
+            yield work_type, confidence[0]
+
+    return _describe_predictions(df, one_by_one)
+
+
+def _batch_predict(df):
+    """analyze_csv --model 的做法：按 PREDICT_BATCH 分批预测"""
+    from work_type_model import predict
+
+    def batched(model, contents):
+        work_types, confidences = predict(model, contents)
+        return zip(work_types, confidences)
+
+    return _describe_predictions(df, batched)
+
+
+def _reference_sort(df):
+    """逐行计算排序键后用 sorted 稳定排序：文本列为 (固定顺序位置, 排序键)，缺失值排在最后"""
+    from collation import sort_key_function
+
+    key = sort_key_function()
+    columns = []
+    for column, ascending in zip(SORT_COLUMNS, SORT_ASCENDING):
+        values = df[column].tolist()
+        if pd.api.types.is_numeric_dtype(df[column]):
+            sign = 1 if ascending else -1
+            columns.append([(1, 0.0) if pd.isna(value) else (0, sign * value) for value in values])
+        else:
+            fixed = {value: position for position, value in enumerate(SORT_ORDERS.get(column, []))}
+            columns.append([(1,) if pd.isna(value) else (0, fixed.get(value, len(fixed)), key(str(value)))
+                            for value in values])
+    rows = sorted(range(len(df)), key=lambda row: [keys[row] for keys in columns])
+    return df.iloc[rows]
+
+
+def _collation_sort(df):
+    from collation import sort_frame
+
+    return sort_frame(df, SORT_COLUMNS, ascending=SORT_ASCENDING, orders=SORT_ORDERS)
+
+
+def _import_batches(df):
+    """把输入拆成两次导入：前一半周次为第一批，其余周次加上对第一批部分记录的更正为第二批"""
+    weeks = pd.to_numeric(df['周次'], errors='coerce')
+    first = df[weeks <= weeks.median()]
+    corrections = first.iloc[::CORRECTION_STEP].copy()
+    corrections['周次'] = pd.to_numeric(corrections['周次'], errors='coerce') + 1
+    corrections[DAYS_COLUMN] = pd.to_numeric(corrections[DAYS_COLUMN], errors='coerce') + 0.5
+    return [first, pd.concat([df[~(weeks <= weeks.median())], corrections])]
+
+
+def _utilization_output(state):
+    from utilization import check_utilization
+
+    output = {name: state[name].tolist() for name in ('persons', 'years', 'weeks')}
+    output.update({name: pd.DataFrame(state[name]) for name in ('days', 'counts')})
+    output.update({name: pd.DataFrame(mask) for name, mask in check_utilization(state).items()})
+    return output
+
+
+def _reference_utilization(df):
+    """全部周次一次导入后重建矩阵"""
+    from utilization import update_state
+
+    return _utilization_output(update_state(None, pd.concat(_import_batches(df))))
+
+
+def _incremental_utilization(df):
+    from utilization import update_state
+
+    state = None
+    for batch in _import_batches(df):
+        state = update_state(state, batch)
+    return _utilization_output(state)
+
+
+def _burn_output(state):
+    """按项目名排序后再比较：增量导入时新项目追加在项目轴末尾，记录全部更正到其他项目的项目保留为全零行（不导出）"""
+    invested = np.flatnonzero(np.abs(state['weekly']).max(axis=1, initial=0.0) > FLOAT_TOLERANCE)
+    order = invested[np.argsort(state['projects'][invested], kind='stable')]
+    output = {'projects': state['projects'][order].tolist(),
+              'years': state['years'].tolist(), 'weeks': state['weeks'].tolist()}
+    output.update({name: pd.DataFrame(state[name][order]) for name in ('weekly', 'cumulative')})
+    return output
+
+
+def _reference_burn(df):
+    """全部周次一次导入后重建趋势"""
+    from project_burn import update_burn
+
+    return _burn_output(update_burn(None, pd.concat(_import_batches(df))))
+
+
+def _incremental_burn(df):
+    from project_burn import update_burn
+
+    state = None
+    for batch in _import_batches(df):
+        state = update_burn(state, batch)
+    return _burn_output(state)
+
+
+# 阶段 -> 参考实现（输入为默认方式加载的周报数据表）
+REFERENCE_STAGES = {
+    'analyze_work_content_semantic': _reference_analyze,
+    'extract_work_items': _reference_extract,
+    'process_raw_data_to_quarterly': _reference_quarterly,
+    'generate_final_optimized_report': _reference_final_report,
+    'predict': _reference_predict,
+    'sort_frame': _reference_sort,
+    'update_state': _reference_utilization,
+    'update_burn': _reference_burn,
+}
+
+# 加载方式 -> 读取函数
+LOADERS = {
+    'default': read_weekly_csv,
+    'lean': lambda path: read_weekly_csv(path, lean=True),
+    'pyarrow': lambda path: read_weekly_csv(path, engine='pyarrow'),
+}
+
+# 阶段 -> {快速路径名: (加载方式, 实现, 是否与参考实现比较耗时和内存)}；新的快速路径通过 register_fast_path 登记
+FAST_PATHS = {
+    # 检查点续跑以额外的序列化开销换取可中断，只比较输出和绝对预算
+    'analyze_work_content_semantic': {'checkpoint': ('default', _checkpoint_resume, False)},
+    'extract_work_items': {},
+    'process_raw_data_to_quarterly': {'lean': ('lean', _reference_quarterly, True)},
+    'generate_final_optimized_report': {'lean': ('lean', _reference_final_report, True)},
+    'predict': {'batch': ('default', _batch_predict, True)},
+    'sort_frame': {'collation': ('default', _collation_sort, True)},
+    'update_state': {'incremental': ('default', _incremental_utilization, True)},
+    'update_burn': {'incremental': ('default', _incremental_burn, True)},
+}
+
+
+def register_fast_path(stage, name, func, loader='default', relative=True):
+    """登记一个快速路径：func 接收按 loader 方式加载的数据表，输出须与参考实现一致
+
+    relative=False 时不要求耗时和内存接近参考实现（如检查点等以开销换可靠性的路径），只检查绝对预算
+    """
+    if stage not in REFERENCE_STAGES:
+        raise KeyError(f"未知阶段: {stage}")
+    FAST_PATHS[stage][name] = (loader, func, relative)
+
+
+# 安装了pyarrow时，检查pyarrow解析引擎加载的数据在下游阶段上与默认引擎一致
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    pass
+else:
+    register_fast_path('process_raw_data_to_quarterly', 'pyarrow', _reference_quarterly, loader='pyarrow')
+    register_fast_path('generate_final_optimized_report', 'pyarrow', _reference_final_report, loader='pyarrow')
+
+
+# 合成数据的取值池
+_PERSONS = ['陈新升', '苏岚', '张超', '刘秀', '薛峰', '陆杰', '丁明明', '梁远超', '蒋佩霖', '王测试']
+_PROJECTS = [
+    '2023软件研发&2023RJ', 'AI视觉贴装系统-高精度贴环机&ZC-TH0201-01', '中瓷生瓷AOI检测项目&ZC01',
+    '25年T4图片智能分析平台&T4-PicAI-25', 'T4-华能集团西安热工院相关项目&T4-TPRI-25',
+    '麦捷LTCC检测&MJ-LT1602HS-01', '在线AI通孔检测系统&ZC03', '通富点胶-轩田&XT03',
+]
+_DEPARTMENTS = ['T1', 'T1电子元件', 'T2', 'T3新能源半导体', 'T4', '费用中心-软件']
+_FRAGMENTS = [
+    '开发2D视窗组件的功能', '修复登录页面的bug', '现场调试设备参数', '调机并更换相机镜头',
+    '优化检测算法的性能', '部署系统环境与数据库配置', '学习深度学习框架', '编写接口文档',
+    '新增报表导出模块', '解决PLC通讯异常问题', '完善MES系统对接流程', '参加项目评审会议',
+    '设计缺陷分类模型', '升级工控机软件版本', '处理客户反馈的误检问题', '整理测试数据',
+    'fix memory leak in capture thread', '搭建训练平台', '继续进行AOI设备联调', '请假',
+]
+_SEPARATORS = ['；', ';', '\n', '，', ' ']
+
+
+def synthetic_frame(n_rows=SYNTHETIC_ROWS, seed=SYNTHETIC_SEED):
+    """生成与导出周报同结构的随机数据，包含缺失值、非法周次、非半天工时等边界情况"""
+    rng = np.random.default_rng(seed)
+
+    def pick(pool, missing_rate=0.0):
+        values = np.asarray(pool, dtype=object)[rng.integers(0, len(pool), n_rows)]
+        values[rng.random(n_rows) < missing_rate] = np.nan
+        return values
+
+    fragment_counts = rng.integers(1, 5, n_rows)
+    contents = []
+    for count in fragment_counts:
+        fragments = [_FRAGMENTS[i] for i in rng.integers(0, len(_FRAGMENTS), count)]
+        style = rng.integers(0, 3)
+        if style == 0:
+            contents.append(''.join(f"{i + 1}、{fragment}" for i, fragment in enumerate(fragments)))
+        else:
+            contents.append(_SEPARATORS[rng.integers(0, len(_SEPARATORS))].join(fragments))
+    contents = np.asarray(contents, dtype=object)
+    contents[rng.random(n_rows) < 0.01] = np.nan
+
+    days = rng.integers(1, 11, n_rows) / 2.0
+    odd = rng.random(n_rows) < 0.02
+    days[odd] = np.round(rng.random(odd.sum()) * 5, 1)
+    days[rng.random(n_rows) < 0.005] = np.nan
+
+    weeks = rng.integers(1, 56, n_rows)
+
+    return pd.DataFrame({
+        '数据标题(不可修改)': [f"周报-{i}" for i in range(n_rows)],
+        '周报人': pick(_PERSONS, 0.002),
+        '周次': weeks,
+        RECORD_ID_COLUMN: [f"SYN{seed}-{i:07d}" for i in range(n_rows)],
+        '订单项目.立项项目': pick(_PROJECTS, 0.005),
+        '订单项目.归属中心': pick(_DEPARTMENTS, 0.005),
+        DAYS_COLUMN: days,
+        CONTENT_COLUMN: contents,
+    })
+
+
+def _normalize_frame(df):
+    """比较前统一数据表的列类型：分类列和各种字符串类型转为对象列，数值列转为float64"""
+    normalized = {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(series):
+            normalized[column] = series.astype(object).where(series.notna(), None).to_numpy()
+        else:
+            normalized[column] = series.to_numpy(dtype=np.float64)
+    return normalized
+
+
+def _values_equal(a, b):
+    if isinstance(a, (int, float, np.integer, np.floating)) and isinstance(b, (int, float, np.integer, np.floating)):
+        a, b = float(a), float(b)
+        if math.isnan(a) or math.isnan(b):
+            return math.isnan(a) and math.isnan(b)
+        return math.isclose(a, b, rel_tol=FLOAT_TOLERANCE, abs_tol=FLOAT_TOLERANCE)
+    a_missing = a is None or (isinstance(a, float) and math.isnan(a))
+    b_missing = b is None or (isinstance(b, float) and math.isnan(b))
+    if a_missing or b_missing:
+        return a_missing and b_missing
+    return a == b
+
+
+def diff_outputs(reference, candidate, path='', limit=MAX_DIFFS):
+    """逐字段比较两个输出，返回差异描述列表（最多 limit 条）"""
+    diffs = []
+
+    def add(message):
+        if len(diffs) < limit:
+            diffs.append(f"{path or '<root>'}: {message}")
+
+    if isinstance(reference, pd.DataFrame) and isinstance(candidate, pd.DataFrame):
+        if list(reference.columns) != list(candidate.columns):
+            add(f"列不同 {list(reference.columns)} != {list(candidate.columns)}")
+            return diffs
+        if len(reference) != len(candidate):
+            add(f"行数不同 {len(reference)} != {len(candidate)}")
+            return diffs
+        ref_columns, cand_columns = _normalize_frame(reference), _normalize_frame(candidate)
+        for column in reference.columns:
+            ref_values, cand_values = ref_columns[column], cand_columns[column]
+            if ref_values.dtype == np.float64 and cand_values.dtype == np.float64:
+                same = np.isclose(ref_values, cand_values, rtol=FLOAT_TOLERANCE, atol=FLOAT_TOLERANCE, equal_nan=True)
+            else:
+                same = np.fromiter((_values_equal(a, b) for a, b in zip(ref_values, cand_values)),
+                                   dtype=bool, count=len(ref_values))
+            for row in np.flatnonzero(~same)[:limit - len(diffs)]:
+                ref_value, cand_value = ref_values[row], cand_values[row]
+                if isinstance(ref_value, np.generic):
+                    ref_value, cand_value = ref_value.item(), cand_value.item()
+                diffs.append(f"{path}[{row}].{column}: {ref_value!r} != {cand_value!r}")
+        return diffs
+
+    if isinstance(reference, dict) and isinstance(candidate, dict):
+        if reference.keys() != candidate.keys():
+            add(f"字段不同 {sorted(map(str, reference))} != {sorted(map(str, candidate))}")
+            return diffs
+        for key in reference:
+            diffs.extend(diff_outputs(reference[key], candidate[key], f"{path}.{key}", limit - len(diffs)))
+            if len(diffs) >= limit:
+                break
+        return diffs
+
+    if isinstance(reference, (list, tuple)) and isinstance(candidate, (list, tuple)):
+        if len(reference) != len(candidate):
+            add(f"长度不同 {len(reference)} != {len(candidate)}")
+            return diffs
+        for idx, (a, b) in enumerate(zip(reference, candidate)):
+            diffs.extend(diff_outputs(a, b, f"{path}[{idx}]", limit - len(diffs)))
+            if len(diffs) >= limit:
+                break
+        return diffs
+
+    if not _values_equal(reference, candidate):
+        add(f"{reference!r} != {candidate!r}")
+    return diffs
+
+
+def measure(func, df, repeat=TIMING_REPEAT):
+    """运行 func(df)，返回 (输出, 最短耗时秒数, 峰值内存MB)；阶段中的控制台输出被屏蔽
+
+    首次运行只用于取得输出（同时完成模块导入等预热），不计入耗时
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        output = func(df)
+
+    timings = []
+    for _ in range(max(repeat, 1)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(df)
+            timings.append(time.perf_counter() - start)
+
+    # 峰值内存单独测一次，避免 tracemalloc 的开销计入耗时
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(df)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return output, min(timings), peak / 1024 / 1024
+
+
+def _budget_violations(stage, n_rows, seconds, peak_mb):
+    budget = STAGE_BUDGETS[stage]
+    scale = max(n_rows, 1) / 10000
+    problems = []
+    if seconds > max(budget['seconds_per_10k'] * scale, MIN_SECONDS):
+        problems.append(f"耗时 {seconds:.3f}s 超出预算 {budget['seconds_per_10k'] * scale:.3f}s")
+    peak_budget = max(budget['peak_mb_per_10k'] * scale, budget.get('peak_mb_floor', 0.0))
+    if peak_mb > max(peak_budget, MIN_MEMORY_MB):
+        problems.append(f"峰值内存 {peak_mb:.1f}MB 超出预算 {peak_budget:.1f}MB")
+    return problems
+
+
+def check_stage(stage, frames, n_rows, repeat=TIMING_REPEAT):
+    """对比一个阶段的参考实现与全部快速路径，返回 (是否通过, 结果行列表)"""
+    ok = True
+    lines = []
+
+    reference, ref_seconds, ref_peak = measure(REFERENCE_STAGES[stage], frames['default'], repeat)
+    problems = _budget_violations(stage, n_rows, ref_seconds, ref_peak)
+    ok &= not problems
+    lines.append(f"   {'参考实现':<16} {ref_seconds:>8.3f}s {ref_peak:>8.1f}MB  {'❌ ' + '；'.join(problems) if problems else '✅'}")
+
+    for name, (loader, func, relative) in FAST_PATHS[stage].items():
+        output, seconds, peak = measure(func, frames[loader], repeat)
+        problems = _budget_violations(stage, n_rows, seconds, peak)
+        if relative and seconds > max(ref_seconds * TIME_TOLERANCE, ref_seconds + MIN_SECONDS):
+            problems.append(f"比参考实现慢 {seconds / ref_seconds:.1f} 倍")
+        if relative and peak > max(ref_peak * MEMORY_TOLERANCE, ref_peak + MIN_MEMORY_MB,
+                                   STAGE_BUDGETS[stage].get('peak_mb_floor', 0.0)):
+            problems.append(f"峰值内存是参考实现的 {peak / ref_peak:.1f} 倍")
+        diffs = diff_outputs(reference, output)
+        if diffs:
+            problems.append(f"输出不一致（前{len(diffs)}处）")
+
+        ok &= not problems
+        status = '❌ ' + '；'.join(problems) if problems else '✅ 一致'
+        lines.append(f"   {name:<16} {seconds:>8.3f}s {peak:>8.1f}MB  {status}")
+        lines.extend(f"      - {diff}" for diff in diffs)
+
+    if not FAST_PATHS[stage]:
+        lines.append("   （暂无快速路径，仅检查参考实现预算）")
+    return ok, lines
+
+
+def load_frames(path, loaders):
+    """按所需的加载方式读取同一输入，与 load_weekly_reports 一样附加年份列"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = {loader: LOADERS[loader](path) for loader in loaders}
+    year = np.int16(infer_year(path))
+    for frame in frames.values():
+        frame[YEAR_COLUMN] = year
+    return frames
+
+
+def run_checks(inputs, stages=None, repeat=TIMING_REPEAT):
+    """在每个输入上检查各阶段，返回是否全部通过"""
+    stages = stages or list(REFERENCE_STAGES)
+    loaders = {'default'} | {loader for stage in stages for loader, *_ in FAST_PATHS[stage].values()}
+    all_ok = True
+
+    for label, path in inputs:
+        frames = load_frames(path, loaders)
+        n_rows = len(frames['default'])
+        print(f"\n📂 输入: {label}（{n_rows} 行）")
+        for stage in stages:
+            ok, lines = check_stage(stage, frames, n_rows, repeat)
+            all_ok &= ok
+            print(f"  {'✅' if ok else '❌'} {stage}")
+            for line in lines:
+                print(line)
+
+    return all_ok
+
+
+def main(source=DEFAULT_INPUT, synthetic_rows=SYNTHETIC_ROWS, seed=SYNTHETIC_SEED, stages=None, repeat=TIMING_REPEAT):
+    from ingest import resolve_input_files
+
+    inputs = [(path, path) for path in resolve_input_files(source)] if source else []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if synthetic_rows:
+            synthetic_path = os.path.join(tmp_dir, 'synthetic.csv')
+            synthetic_frame(synthetic_rows, seed).to_csv(synthetic_path, index=False, encoding='utf-8-sig')
+            inputs.append((f"合成数据 seed={seed}", synthetic_path))
+
+        all_ok = run_checks(inputs, stages, repeat)
+
+    print("\n" + "=" * 80)
+    print("✅ 所有快速路径与参考实现一致且满足预算" if all_ok else "❌ 存在不一致或超出预算的阶段")
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="参考实现与快速路径的差异对比及性能预算检查")
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT, help="真实周报CSV文件、目录或通配符；传空字符串则只用合成数据")
+    parser.add_argument('--synthetic-rows', type=int, default=SYNTHETIC_ROWS, help="合成数据行数，0表示不生成")
+    parser.add_argument('--seed', type=int, default=SYNTHETIC_SEED, help="合成数据随机种子")
+    parser.add_argument('--stage', action='append', choices=list(REFERENCE_STAGES), help="只检查指定阶段（可重复）")
+    parser.add_argument('--repeat', type=int, default=TIMING_REPEAT, help="计时重复次数")
+    args = parser.parse_args()
+    sys.exit(main(args.input, args.synthetic_rows, args.seed, args.stage, args.repeat))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+直接生成已合并单元格的季度工时统计Excel报告
+合并区域由排序后关键列的游程编码（向量化）一次性计算得到，
+使用openpyxl只写模式逐行流式写入，内存占用与行数无关
+"""
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+from output_writer import atomic_write
+
+# 报告列顺序
+REPORT_COLUMNS = ['订单项目.归属中心', '订单项目.立项项目', '项目总人天', '季度', '季度总人天', '人员', '人天']
+
+# 需要合并的列及其分组关键列（同一分组内的连续行合并）
+MERGE_KEYS = {
+    '订单项目.归属中心': ['订单项目.归属中心'],
+    '订单项目.立项项目': ['订单项目.归属中心', '订单项目.立项项目'],
+    '项目总人天': ['订单项目.归属中心', '订单项目.立项项目'],
+    '季度': ['订单项目.归属中心', '订单项目.立项项目', '季度'],
+    '季度总人天': ['订单项目.归属中心', '订单项目.立项项目', '季度'],
+}
+
+# 数值列及显示格式（保留1位小数）
+NUMBER_COLUMNS = ['项目总人天', '季度总人天', '人天']
+NUMBER_FORMAT = '0.0'
+
+# 列宽上限（字符数）
+MAX_COLUMN_WIDTH = 60
+
+
+def compute_merge_runs(df, key_columns):
+    """对已排序的关键列做游程编码，返回每段的起止行号（从0开始，含结束行）"""
+    if len(df) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    keys = df[key_columns]
+    # 任一关键列与上一行不同即开始新的一段
+    changed = (keys != keys.shift()).any(axis=1).to_numpy(copy=True)
+    changed[0] = True
+
+    starts = np.flatnonzero(changed)
+    ends = np.append(starts[1:], len(df)) - 1
+    return starts, ends
+
+
+def _display_width(series):
+    """估算列显示宽度：中文字符按2个字符宽度计算"""
+    text = series.astype(str)
+    wide = text.str.count(r'[^\x00-\xff]')
+    return int((text.str.len() + wide).max())
+
+
+def _column_widths(df):
+    """根据表头和内容计算各列宽度"""
+    widths = []
+    for col in REPORT_COLUMNS:
+        header_width = _display_width(pd.Series([col]))
+        content_width = _display_width(df[col]) if len(df) else 0
+        widths.append(min(max(header_width, content_width) + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def save_final_report_xlsx(df, output_file):
+    """将最终优化格式报告保存为已合并单元格的Excel文件"""
+    report = df[REPORT_COLUMNS].copy()
+    for col in NUMBER_COLUMNS:
+        report[col] = pd.to_numeric(report[col])
+
+    # 每列标记哪些行是合并段的首行，非首行写入空单元格
+    run_start = {}
+    merged_ranges = []
+    for col, keys in MERGE_KEYS.items():
+        starts, ends = compute_merge_runs(report, keys)
+        is_start = np.zeros(len(report), dtype=bool)
+        is_start[starts] = True
+        run_start[col] = is_start
+
+        col_idx = REPORT_COLUMNS.index(col) + 1
+        multi = ends > starts
+        # Excel行号：表头占第1行，数据从第2行开始
+        for start, end in zip(starts[multi] + 2, ends[multi] + 2):
+            merged_ranges.append(CellRange(min_col=col_idx, min_row=int(start),
+                                           max_col=col_idx, max_row=int(end)))
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('季度工时统计')
+
+    # 列宽、冻结表头须在写入行之前设置
+    for idx, width in enumerate(_column_widths(report), 1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.freeze_panes = 'A2'
+
+    thin = Side(style='thin', color='999999')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header_font = Font(bold=True)
+    header_fill = PatternFill('solid', fgColor='DDEBF7')
+    center = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    left = Alignment(horizontal='left', vertical='center', wrap_text=True)
+
+    header = []
+    for col in REPORT_COLUMNS:
+        cell = WriteOnlyCell(ws, value=col)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = center
+        cell.border = border
+        header.append(cell)
+    ws.append(header)
+
+    start_flags = [run_start.get(col) for col in REPORT_COLUMNS]
+    for row_idx, values in enumerate(report.itertuples(index=False, name=None)):
+        row = []
+        for col, value, is_start in zip(REPORT_COLUMNS, values, start_flags):
+            if is_start is not None and not is_start[row_idx]:
+                value = None
+            cell = WriteOnlyCell(ws, value=value)
+            cell.border = border
+            if col in NUMBER_COLUMNS:
+                cell.number_format = NUMBER_FORMAT
+                cell.alignment = center
+            elif col == '订单项目.立项项目':
+                cell.alignment = left
+            else:
+                cell.alignment = center
+            row.append(cell)
+        ws.append(row)
+
+    # 合并区域在工作表数据之后写出，只需保存区域坐标
+    for cell_range in merged_ranges:
+        ws.merged_cells.add(cell_range)
+
+    # 先写入同目录临时文件再替换，中断时不会留下截断的xlsx
+    atomic_write(output_file, wb.save, mode='wb')
+    print(f"✅ 已合并单元格的Excel报告已保存到: {output_file}")
+    print(f"   合并区域: {len(merged_ranges)} 个")
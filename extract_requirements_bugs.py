@@ -1,47 +1,47 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
-import pandas as pd
 from collections import defaultdict
 import re
+import argparse
 
-def extract_detailed_requirements_bugs():
-    """提取详细的需求和Bug修复内容"""
+from bounded_collector import BoundedCollector
+from generate_full_table import load_record_analysis
+
+# 列表输出最多显示的条数（表格格式显示其中前 TABLE_LIMIT 条）
+LIST_LIMIT = 20
+TABLE_LIMIT = 10
+
+def _new_department_bucket(limit=LIST_LIMIT):
+    """创建部门收集桶：需求和Bug各保留前 limit 条，数量精确统计"""
+    return {'requirement': BoundedCollector(limit), 'bug': BoundedCollector(limit)}
+
+def extract_detailed_requirements_bugs(limit=LIST_LIMIT, cluster=False):
+    """提取详细的需求和Bug修复内容（每个部门每类只保留前 limit 条）
+
+    cluster=True 时先将近似重复的工作项聚类，每类只输出一行，
+    并附带出现次数、总人天（记录人天在其工作项间平均分摊）和周次跨度
+    """
     
-    # 读取分析结果
-    with open('detailed_record_analysis.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # 读取分析结果（每条记录带有归属中心）
+    data = load_record_analysis()
     
     # 按部门分组
     departments = {
-        'T1': [],
-        'T1电子元件': [],
-        'T2': [],
-        'T3': [],
-        'T4': [],
-        '费用中心-软件': []
+        dept: _new_department_bucket(limit)
+        for dept in ['T1', 'T1电子元件', 'T2', 'T3', 'T4', '费用中心-软件']
     }
     
-    # 读取原始CSV获取部门信息
-    df = pd.read_csv("2025年1-6.csv", encoding='gbk')
-    
-    # 创建索引到部门的映射
-    index_to_dept = {}
-    for idx, row in df.iterrows():
-        dept = row['订单项目.归属中心']
-        index_to_dept[idx + 1] = dept  # 索引从1开始
+    # 聚类模式下需要先收集全部工作项
+    pending = defaultdict(list)
     
     # 分类收集需求和Bug
     for record in data:
-        index = record['index']
-        dept = index_to_dept.get(index, '未知部门')
+        dept = record['department']
 
-        # 处理NaN值
-        if pd.isna(dept):
+        # 处理空值
+        if not isinstance(dept, str) or not dept:
             dept = '未知部门'
-        else:
-            dept = str(dept)
 
         # 映射部门名称
         if 'T1' in dept and '电子元件' in dept:
@@ -60,7 +60,7 @@ def extract_detailed_requirements_bugs():
             dept_key = '其他'
         
         if dept_key not in departments:
-            departments[dept_key] = []
+            departments[dept_key] = _new_department_bucket(limit)
         
         # 分析工作内容
         content = record['content']
@@ -71,27 +71,45 @@ def extract_detailed_requirements_bugs():
         
         for item in items:
             if is_requirement(item):
-                departments[dept_key].append({
-                    'type': 'requirement',
-                    'content': item,
-                    'person': record['person'],
-                    'days': record['days'],
-                    'work_type': work_type
-                })
+                item_type = 'requirement'
             elif is_bug_fix(item):
-                departments[dept_key].append({
-                    'type': 'bug',
-                    'content': item,
-                    'person': record['person'],
-                    'days': record['days'],
-                    'work_type': work_type
-                })
+                item_type = 'bug'
+            else:
+                continue
+            
+            work_item = {
+                'type': item_type,
+                'content': item,
+                'person': record['person'],
+                'days': record['days'],
+                'work_type': work_type
+            }
+            
+            if cluster:
+                work_item['week'] = record['week']
+                work_item['days'] = record['days'] / len(items)
+                pending[(dept_key, item_type)].append(work_item)
+            else:
+                departments[dept_key][item_type].add(work_item)
+    
+    # 每个类别输出一行（聚类依赖NumPy，仅在聚类模式下加载）
+    if pending:
+        from work_item_clustering import cluster_work_items, format_cluster_line
+    for (dept_key, item_type), work_items in pending.items():
+        for group in cluster_work_items(work_items):
+            departments[dept_key][item_type].add({
+                'type': item_type,
+                'content': format_cluster_line(group),
+                'days': group['total_days'],
+                'people': group['people']
+            })
     
     return departments
 
 def extract_work_items(content):
     """从工作内容中提取具体的工作项"""
-    if not content or pd.isna(content):
+    # 内容为空或为NaN（JSON中的缺失值）
+    if not content or content != content:
         return []
     
     content = str(content)
@@ -135,55 +153,59 @@ def format_output(departments):
     print("按部门分类的需求和Bug修复工作详细列表")
     print("=" * 100)
     
-    for dept, items in departments.items():
-        if not items:
-            continue
-            
-        requirements = [item for item in items if item['type'] == 'requirement']
-        bugs = [item for item in items if item['type'] == 'bug']
+    for dept, buckets in departments.items():
+        requirements = buckets['requirement']
+        bugs = buckets['bug']
         
         if not requirements and not bugs:
             continue
         
         print(f"\n【{dept}】")
-        print(f"需求数量: {len(requirements)} 项")
-        print(f"Bug修复数量: {len(bugs)} 项")
+        print(f"需求数量: {requirements.count} 项")
+        print(f"Bug修复数量: {bugs.count} 项")
         print("-" * 80)
         
         # 输出需求
         if requirements:
             print("需求列表:")
-            for i, req in enumerate(requirements[:20], 1):  # 限制显示数量
+            for i, req in enumerate(requirements, 1):
                 print(f"{i:2d}. {req['content']}")
-            if len(requirements) > 20:
-                print(f"    ... 还有{len(requirements)-20}项需求")
+            if requirements.overflow:
+                print(f"    ... 还有{requirements.overflow}项需求")
         
         print()
         
         # 输出Bug修复
         if bugs:
             print("Bug修复列表:")
-            for i, bug in enumerate(bugs[:20], 1):  # 限制显示数量
+            for i, bug in enumerate(bugs, 1):
                 print(f"{i:2d}. {bug['content']}")
-            if len(bugs) > 20:
-                print(f"    ... 还有{len(bugs)-20}项Bug修复")
+            if bugs.overflow:
+                print(f"    ... 还有{bugs.overflow}项Bug修复")
         
         print("\n" + "=" * 100)
 
-def generate_table_format(departments):
+def _short_cell(items, row_idx):
+    """取出表格单元格内容并截断过长内容"""
+    if row_idx >= len(items):
+        return ""
+    content = items[row_idx]['content']
+    if len(content) > 50:
+        content = content[:47] + "..."
+    return content
+
+def generate_table_format(departments, limit=TABLE_LIMIT):
     """生成表格格式输出"""
     
     print("\n\n表格格式输出（按您要求的格式）:")
     print("=" * 120)
     
     # 找出有数据的部门
-    active_depts = []
-    for dept, items in departments.items():
-        if items:
-            requirements = [item for item in items if item['type'] == 'requirement']
-            bugs = [item for item in items if item['type'] == 'bug']
-            if requirements or bugs:
-                active_depts.append((dept, requirements, bugs))
+    active_depts = [
+        (dept, buckets['requirement'], buckets['bug'])
+        for dept, buckets in departments.items()
+        if buckets['requirement'] or buckets['bug']
+    ]
     
     if not active_depts:
         print("没有找到有效的需求和Bug数据")
@@ -191,48 +213,31 @@ def generate_table_format(departments):
     
     # 生成表头
     header_parts = []
+    columns = []
     for dept, reqs, bugs in active_depts:
         dept_short = dept.replace('费用中心-', '').replace('电子元件', '元件')
         header_parts.append(f"{dept_short}需求")
         header_parts.append(f"{dept_short}bug")
+        columns.append(reqs.items)
+        columns.append(bugs.items)
     
     print("\t".join(header_parts))
     
     # 找出最大行数
-    max_rows = 0
-    for dept, reqs, bugs in active_depts:
-        max_rows = max(max_rows, len(reqs), len(bugs))
-    
-    # 生成数据行
-    for row_idx in range(min(max_rows, 10)):  # 限制最多10行
-        row_data = []
-        for dept, reqs, bugs in active_depts:
-            # 需求列
-            if row_idx < len(reqs):
-                req_content = reqs[row_idx]['content']
-                # 截断过长的内容
-                if len(req_content) > 50:
-                    req_content = req_content[:47] + "..."
-                row_data.append(req_content)
-            else:
-                row_data.append("")
-            
-            # Bug列
-            if row_idx < len(bugs):
-                bug_content = bugs[row_idx]['content']
-                # 截断过长的内容
-                if len(bug_content) > 50:
-                    bug_content = bug_content[:47] + "..."
-                row_data.append(bug_content)
-            else:
-                row_data.append("")
-        
-        print("\t".join(row_data))
+    max_rows = max(max(reqs.count, bugs.count) for dept, reqs, bugs in active_depts)
+    
+    # 逐行输出数据（限制最多 limit 行）
+    for row_idx in range(min(max_rows, limit)):
+        print("\t".join(_short_cell(items, row_idx) for items in columns))
 
-def main():
-    departments = extract_detailed_requirements_bugs()
+def main(cluster=False):
+    departments = extract_detailed_requirements_bugs(cluster=cluster)
     format_output(departments)
     generate_table_format(departments)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="按部门提取需求和Bug修复工作")
+    parser.add_argument('--cluster', action='store_true',
+                        help="将近似重复的工作项聚类，每类只显示一行")
+    args = parser.parse_args()
+    main(cluster=args.cluster)
@@ -6,34 +6,21 @@
 包含项目总人天列，所有单元格填入具体数值，便于Excel手动合并
 """
 
+import argparse
+
+import numpy as np
 import pandas as pd
-import chardet
 
-def load_raw_data(file_path):
-    """加载原始周报CSV数据"""
-    try:
-        # 尝试不同编码读取
-        for encoding in ['utf-8-sig', 'utf-8', 'gbk', 'gb2312']:
-            try:
-                df = pd.read_csv(file_path, encoding=encoding)
-                print(f"成功使用 {encoding} 编码读取文件")
-                return df
-            except:
-                continue
-
-        # 如果都失败，使用chardet检测
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-            result = chardet.detect(raw_data)
-            encoding = result['encoding']
-
-        df = pd.read_csv(file_path, encoding=encoding)
-        print(f"使用检测到的编码 {encoding} 读取文件")
-        return df
+from excel_report import save_final_report_xlsx
+from archive import DEFAULT_ARCHIVE_DIR, load_reports
+from collation import COLLATIONS, DEFAULT_COLLATION, DEPARTMENT_ORDER, sort_frame
+from ingest import DEFAULT_INPUT, DEPARTMENT_MERGES, PARSER_ENGINES, YEAR_COLUMN
+from output_writer import submit_write, wait_for_writes
+from period_compare import DEFAULT_AGGREGATE_DIR, aggregate_label, save_aggregates
+from preview import PREVIEW_ROWS, format_estimate, load_preview, print_estimates, print_preview_header
 
-    except Exception as e:
-        print(f"读取文件失败: {e}")
-        return None
+# 从周报归档读取时只需要的列
+REPORT_COLUMNS = ['订单项目.归属中心', '订单项目.立项项目', '订单项目.本周投入天数（最低半天）', '周报人', '周次']
 
 def get_quarter(week):
     """根据周次获取季度"""
@@ -49,13 +36,23 @@ def get_quarter(week):
         return None
 
 def merge_departments(df):
-    """合并T1和T1电子元件部门"""
+    """合并T1和T1电子元件部门（见 DEPARTMENT_MERGES）
+
+    精简模式的分类列先转为对象列再替换（rename_categories 不能把两个类别合并为一个），替换后转回分类列
+    """
     df_copy = df.copy()
-    df_copy['订单项目.归属中心'] = df_copy['订单项目.归属中心'].replace('T1电子元件', 'T1')
+    departments = df_copy['订单项目.归属中心']
+    if isinstance(departments.dtype, pd.CategoricalDtype):
+        df_copy['订单项目.归属中心'] = departments.astype(object).replace(DEPARTMENT_MERGES).astype('category')
+    else:
+        df_copy['订单项目.归属中心'] = departments.replace(DEPARTMENT_MERGES)
     return df_copy
 
-def process_raw_data_to_quarterly(df):
-    """将原始数据处理为季度格式"""
+def process_raw_data_to_quarterly(df, collation=DEFAULT_COLLATION, dept_order=None):
+    """将原始数据处理为季度格式
+
+    部门、项目按 collation 排序规则（见 collation.py）排序，dept_order 为部门的固定顺序（默认 DEPARTMENT_ORDER）
+    """
     print("正在处理原始数据...")
 
     # 合并部门
@@ -71,19 +68,25 @@ def process_raw_data_to_quarterly(df):
     # 过滤掉无效季度
     df_clean = df_clean[df_clean['季度'].notna()]
 
+    # 跨年数据的季度按 年份+季度 区分（预览抽样等没有年份列的数据只按季度）
+    period_keys = ([YEAR_COLUMN] if YEAR_COLUMN in df_clean.columns else []) + ['季度']
+    project_keys = ['订单项目.归属中心', '订单项目.立项项目'] + period_keys
+
     # 按部门、项目、季度、人员分组统计
-    quarterly_stats = df_clean.groupby(['订单项目.归属中心', '订单项目.立项项目', '季度', '周报人'])['订单项目.本周投入天数（最低半天）'].sum().reset_index()
-    quarterly_stats.columns = ['订单项目.归属中心', '订单项目.立项项目', '季度', '人员', '人天']
+    quarterly_stats = df_clean.groupby(project_keys + ['周报人'], observed=True)['订单项目.本周投入天数（最低半天）'].sum().reset_index()
+    quarterly_stats.columns = project_keys + ['人员', '人天']
 
     # 计算每个项目每个季度的总人天
-    project_quarter_total = df_clean.groupby(['订单项目.归属中心', '订单项目.立项项目', '季度'])['订单项目.本周投入天数（最低半天）'].sum().reset_index()
-    project_quarter_total.columns = ['订单项目.归属中心', '订单项目.立项项目', '季度', '季度总人天']
+    project_quarter_total = df_clean.groupby(project_keys, observed=True)['订单项目.本周投入天数（最低半天）'].sum().reset_index()
+    project_quarter_total.columns = project_keys + ['季度总人天']
 
     # 合并数据
-    result = quarterly_stats.merge(project_quarter_total, on=['订单项目.归属中心', '订单项目.立项项目', '季度'])
+    result = quarterly_stats.merge(project_quarter_total, on=project_keys)
 
-    # 排序
-    result = result.sort_values(['订单项目.归属中心', '订单项目.立项项目', '季度', '人天'], ascending=[True, True, True, False])
+    # 排序：部门、项目按排序规则的整数名次，年份、季度升序，人天降序
+    result = sort_frame(result, project_keys + ['人天'],
+                        ascending=[True] * len(project_keys) + [False], collation=collation,
+                        orders={'订单项目.归属中心': DEPARTMENT_ORDER if dept_order is None else dept_order})
 
     return result
 
@@ -94,8 +97,11 @@ def generate_final_optimized_report(quarterly_df):
     print("正在生成最终优化格式的季度工时统计报告...")
 
     # 计算每个项目的总人天（跨所有季度）- 需要去重相同的季度总人天
-    project_quarter_unique = quarterly_df[['订单项目.归属中心', '订单项目.立项项目', '季度', '季度总人天']].drop_duplicates()
-    project_totals = project_quarter_unique.groupby(['订单项目.归属中心', '订单项目.立项项目'])['季度总人天'].sum().reset_index()
+    period_keys = [YEAR_COLUMN, '季度'] if YEAR_COLUMN in quarterly_df.columns else ['季度']
+    project_quarter_unique = quarterly_df[['订单项目.归属中心', '订单项目.立项项目'] + period_keys + ['季度总人天']].drop_duplicates()
+    # 数据跨多个年份时季度标注年份
+    multi_year = YEAR_COLUMN in quarterly_df.columns and quarterly_df[YEAR_COLUMN].nunique() > 1
+    project_totals = project_quarter_unique.groupby(['订单项目.归属中心', '订单项目.立项项目'], observed=True)['季度总人天'].sum().reset_index()
     project_totals_dict = {}
     for _, row in project_totals.iterrows():
         key = (row['订单项目.归属中心'], row['订单项目.立项项目'])
@@ -118,7 +124,7 @@ def generate_final_optimized_report(quarterly_df):
         project_total = project_totals_dict.get(project_key, 0)
 
         # 格式化数据
-        quarter_display = f"第{quarter}季度"
+        quarter_display = f"{int(row[YEAR_COLUMN])}年第{quarter}季度" if multi_year else f"第{quarter}季度"
         project_total_str = f"{project_total:.1f}"
         quarter_total_str = f"{quarter_total:.1f}"
         person_days_str = f"{person_days:.1f}"
@@ -139,12 +145,16 @@ def generate_final_optimized_report(quarterly_df):
     return result_df
 
 def save_final_report(df, output_file):
-    """保存最终优化格式的报告"""
+    """保存最终优化格式的报告（CSV在后台线程中写出，与预览输出并行）"""
     # 保存为CSV文件，使用UTF-8-BOM编码
-    df.to_csv(output_file, index=False, encoding='utf-8-sig')
-    print(f"✅ 最终优化格式报告已保存到: {output_file}")
-    
+    submit_write(output_file, lambda f: df.to_csv(f, index=False), encoding='utf-8-sig', newline='')
+    print(f"✅ 最终优化格式报告正在写出: {output_file}")
+
     # 打印预览
+    print_report_preview(df)
+
+def print_report_preview(df):
+    """打印报告前30行预览"""
     print("\n" + "=" * 140)
     print("📊 最终优化格式季度工时统计报告预览")
     print("=" * 140)
@@ -239,15 +249,68 @@ def validate_data(df):
     print(f"   季度总人天格式: {'✅ 正确' if all('.' in str(x) for x in df['季度总人天'] if x != '') else '❌ 错误'}")
     print(f"   人天格式: {'✅ 正确' if all('.' in str(x) for x in df['人天'] if x != '') else '❌ 错误'}")
 
-def main():
-    """主函数"""
-    input_file = '2025年1-6.csv'  # 原始周报CSV文件
+def preview_main(input_file=DEFAULT_INPUT, rows=PREVIEW_ROWS, sample=False):
+    """快速预览：只读取前 rows 行或分块抽样，在样本上运行同样的流程，不写出任何文件"""
+    preview = load_preview(input_file, rows, sample)
+    raw_df = preview.frame
+    print_preview_header(preview)
+    print(f"列名: {list(raw_df.columns)}")
+
+    quarterly_df = process_raw_data_to_quarterly(raw_df)
+    final_df = generate_final_optimized_report(quarterly_df)
+    print_report_preview(final_df)
+
+    # 按合并后的部门估计全量人天
+    days = pd.to_numeric(raw_df['订单项目.本周投入天数（最低半天）'], errors='coerce')
+    departments = merge_departments(raw_df)['订单项目.归属中心']
+    print(f"\n📐 全量估计: 记录 {format_estimate(preview.estimate(np.ones(len(raw_df))), ' 条')}，"
+          f"人天 {format_estimate(preview.estimate(days), ' 天')}")
+    print_estimates("各部门人天", preview.estimate_by(days, departments), ' 天')
+
+def build_reports(raw_df, period_label, output_file='最终优化格式季度工时统计报告.csv',
+                  xlsx_file='最终优化格式季度工时统计报告.xlsx', collation=DEFAULT_COLLATION, dept_order=None):
+    """由已加载的原始数据生成季度报告CSV、Excel和名为 period_label 的汇总快照，返回最终报告数据表"""
+    # 处理为季度格式
+    quarterly_df = process_raw_data_to_quarterly(raw_df, collation, dept_order)
+    print(f"处理后得到 {len(quarterly_df)} 行季度数据")
+
+    # 保存 中心/项目/季度/人员 汇总快照，周期对比只读取快照
+    snapshot = save_aggregates(quarterly_df, period_label)
+    print(f"汇总快照已保存到: {snapshot}")
+
+    # 生成最终优化报告
+    final_df = generate_final_optimized_report(quarterly_df)
+
+    # 保存报告
+    save_final_report(final_df, output_file)
+
+    # 保存已合并单元格的Excel报告
+    save_final_report_xlsx(final_df, xlsx_file)
+
+    # 验证数据
+    validate_data(final_df)
+
+    # 生成统计信息
+    generate_statistics(final_df)
+
+    # 等待后台写出完成
+    wait_for_writes()
+    return final_df
+
+def main(input_file=DEFAULT_INPUT, validate=False, lean=False, period_label=None, engine='c',
+         period=None, departments=None, archive_dir=None, collation=DEFAULT_COLLATION, dept_order=None):
+    """主函数，input_file 可以是原始周报CSV文件、目录或通配符；validate=True 时导入时做数据质量校验，
+    lean=True 时以精简模式加载，engine 为CSV解析引擎，collation/dept_order 为报告的排序规则和部门固定顺序。
+    指定 period 或 departments 时改为从周报归档读取匹配的分区和 REPORT_COLUMNS 列。
+    季度汇总另存为名为 period_label（默认由输入文件名或归档读取范围生成）的快照，供周期对比使用"""
     output_file = '最终优化格式季度工时统计报告.csv'
+    xlsx_file = '最终优化格式季度工时统计报告.xlsx'
 
     try:
         # 加载原始数据
         print("正在加载原始周报数据...")
-        raw_df = load_raw_data(input_file)
+        raw_df = load_reports(input_file, period, departments, archive_dir, REPORT_COLUMNS,
+                              lean=lean, validate=validate, engine=engine)
 
         if raw_df is None:
             print("❌ 无法加载数据文件")
@@ -256,27 +319,17 @@ def main():
         print(f"成功加载 {len(raw_df)} 行原始数据")
         print(f"原始列名: {list(raw_df.columns)}")
 
-        # 处理为季度格式
-        quarterly_df = process_raw_data_to_quarterly(raw_df)
-        print(f"处理后得到 {len(quarterly_df)} 行季度数据")
-
-        # 生成最终优化报告
-        final_df = generate_final_optimized_report(quarterly_df)
-
-        # 保存报告
-        save_final_report(final_df, output_file)
-
-        # 验证数据
-        validate_data(final_df)
-
-        # 生成统计信息
-        generate_statistics(final_df)
+        if not period_label:
+            scope = '_'.join(filter(None, [period] + list(departments or [])))
+            period_label = aggregate_label(scope or input_file)
+        build_reports(raw_df, period_label, output_file, xlsx_file, collation, dept_order)
 
         print("\n" + "=" * 80)
         print("✅ 最终优化格式季度报告生成完成！")
         print("=" * 80)
         print(f"📁 输出文件: {output_file}")
-        print("💡 提示: 所有单元格都已填入具体数值，便于Excel手动合并")
+        print(f"📁 Excel文件: {xlsx_file}")
+        print("💡 提示: CSV中所有单元格都已填入具体数值；Excel文件已自动合并单元格")
 
     except Exception as e:
         print(f"❌ 生成报告过程中出现错误: {e}")
@@ -284,4 +337,29 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="生成最终优化格式的季度工时统计报告")
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT,
+                        help="周报CSV文件、目录或通配符（多个文件按记录ID去重）")
+    parser.add_argument('--validate', action='store_true', help="导入时做数据质量校验，违规行隔离到 quarantine_rows.csv")
+    parser.add_argument('--lean', action='store_true', help="精简模式加载：只读取用到的列，分类列和紧凑数值类型，降低内存占用")
+    parser.add_argument('--period-label', help=f"汇总快照名（保存在 {DEFAULT_AGGREGATE_DIR}/ 下），默认取输入文件名")
+    parser.add_argument('--engine', choices=PARSER_ENGINES, default='c',
+                        help="CSV解析引擎：c（默认）或 pyarrow（多线程，需安装pyarrow）")
+    parser.add_argument('--period', help="从周报归档读取指定周期，如 2025Q3、2025、2025:27-39（逗号分隔多个）")
+    parser.add_argument('--dept', nargs='+', help="从周报归档读取指定部门（订单项目.归属中心，T1 包含并入的 T1电子元件）")
+    parser.add_argument('--archive', help=f"周报归档目录：与 --period/--dept 一起使用时从中读取（默认 {DEFAULT_ARCHIVE_DIR}），"
+                                          f"否则把读入的CSV追加到归档")
+    parser.add_argument('--collation', choices=COLLATIONS, default=DEFAULT_COLLATION,
+                        help="部门和项目的排序规则：pinyin 拼音（默认，未安装pypinyin时按GB18030编码近似）、"
+                             "gbk 编码顺序、codepoint Unicode码位")
+    parser.add_argument('--dept-order', type=lambda value: [d.strip() for d in value.split(',') if d.strip()],
+                        help="部门的固定顺序，逗号分隔，如 T1,T2,T3新能源半导体,T4（未列出的部门排在后面）")
+    parser.add_argument('--preview', type=int, nargs='?', const=PREVIEW_ROWS, metavar='N',
+                        help=f"快速预览：只处理前N行（默认{PREVIEW_ROWS}），不写出文件")
+    parser.add_argument('--sample', action='store_true', help="与 --preview 一起使用：改为按文件位置分块随机抽样，给出置信区间")
+    args = parser.parse_args()
+    if args.preview:
+        preview_main(args.input, args.preview, args.sample)
+    else:
+        main(args.input, args.validate, args.lean, args.period_label, args.engine, args.period, args.dept, args.archive,
+             args.collation, args.dept_order)
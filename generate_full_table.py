@@ -1,44 +1,45 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import json
-import pandas as pd
-from collections import defaultdict
 
-def generate_full_table():
-    """生成完整的详细工作内容对照表"""
-    
-    # 读取分析结果
-    with open('detailed_record_analysis.json', 'r', encoding='utf-8') as f:
+from bounded_collector import BoundedCollector
+from output_writer import submit_write, wait_for_writes
+
+# 对照表最多显示的行数
+TABLE_ROW_LIMIT = 50
+
+def load_record_analysis(path='detailed_record_analysis.json'):
+    """读取逐条分析结果；旧版结果没有随记录保存归属中心，需要重新生成"""
+    with open(path, 'r', encoding='utf-8') as f:
         data = json.load(f)
+    if data and 'department' not in data[0]:
+        raise ValueError(f"{path} 中的记录缺少归属中心，请重新运行 analyze_csv.py 生成")
+    return data
+
+def generate_full_table(row_limit=TABLE_ROW_LIMIT, data=None):
+    """生成完整的详细工作内容对照表（每列只保留前 row_limit 条，数量精确统计）
+
+    data 为逐条分析结果，不传入时从 detailed_record_analysis.json 读取；
+    部门取每条记录中保存的归属中心
+    """
     
-    # 读取原始CSV获取部门信息
-    df = pd.read_csv("2025年1-6.csv", encoding='gbk')
-    
-    # 创建索引到部门的映射
-    index_to_dept = {}
-    for idx, row in df.iterrows():
-        dept = row['订单项目.归属中心']
-        index_to_dept[idx + 1] = dept
+    # 读取分析结果
+    if data is None:
+        data = load_record_analysis()
     
     # 按部门分组收集数据
     departments = {
-        'T1': {'requirements': [], 'bugs': []},
-        'T1电子元件': {'requirements': [], 'bugs': []},
-        'T2': {'requirements': [], 'bugs': []},
-        'T3': {'requirements': [], 'bugs': []},
-        'T4': {'requirements': [], 'bugs': []},
-        '软件': {'requirements': [], 'bugs': []}
+        dept: {'requirements': BoundedCollector(row_limit), 'bugs': BoundedCollector(row_limit)}
+        for dept in ['T1', 'T1电子元件', 'T2', 'T3', 'T4', '软件']
     }
     
     for record in data:
-        index = record['index']
-        dept = index_to_dept.get(index, '未知部门')
+        dept = record['department']
         
-        if pd.isna(dept):
+        if not isinstance(dept, str) or not dept:
             dept = '未知部门'
-        else:
-            dept = str(dept)
         
         # 映射部门名称
         if 'T1' in dept and '电子元件' in dept:
@@ -61,34 +62,43 @@ def generate_full_table():
         
         # 根据分析结果分类
         if work_type in ['software_development', 'system_integration']:
-            departments[dept_key]['requirements'].append(content)
+            departments[dept_key]['requirements'].add(content)
         elif work_type in ['software_maintenance']:
-            departments[dept_key]['bugs'].append(content)
+            departments[dept_key]['bugs'].add(content)
         else:
             # 对于其他类型，根据内容判断
             if any(keyword in content.lower() for keyword in ['开发', '实现', '创建', '新增', '添加', '功能', '设计']):
-                departments[dept_key]['requirements'].append(content)
+                departments[dept_key]['requirements'].add(content)
             elif any(keyword in content.lower() for keyword in ['修复', '解决', '问题', 'bug', '错误', '优化']):
-                departments[dept_key]['bugs'].append(content)
+                departments[dept_key]['bugs'].add(content)
             else:
-                departments[dept_key]['requirements'].append(content)
+                departments[dept_key]['requirements'].add(content)
     
     return departments
 
-def write_full_table_to_file(departments):
-    """将完整表格写入文件"""
+def _table_cell(items, row_idx):
+    """取出表格单元格内容：去除换行并截断过长内容"""
+    if row_idx >= len(items):
+        return ""
+    content = items[row_idx].replace('\n', ' ').replace('\r', ' ').strip()
+    if len(content) > 80:
+        content = content[:77] + "..."
+    return content
+
+def write_full_table_to_file(departments, row_limit=TABLE_ROW_LIMIT):
+    """将完整表格在后台线程中写入文件，逐行写出，不构建完整的表格矩阵"""
     
-    # 找出最大行数
+    # 找出最大行数（按精确数量计算）
     max_rows = 0
     active_depts = []
     
     for dept, data in departments.items():
         if data['requirements'] or data['bugs']:
             active_depts.append(dept)
-            max_rows = max(max_rows, len(data['requirements']), len(data['bugs']))
+            max_rows = max(max_rows, data['requirements'].count, data['bugs'].count)
     
     # 生成表格内容
-    with open('完整工作内容对照表.md', 'w', encoding='utf-8') as f:
+    def write_table(f):
         f.write("# 完整工作内容对照表\n\n")
         
         # 写入统计信息
@@ -100,8 +110,8 @@ def write_full_table_to_file(departments):
         total_bugs = 0
         
         for dept in active_depts:
-            req_count = len(departments[dept]['requirements'])
-            bug_count = len(departments[dept]['bugs'])
+            req_count = departments[dept]['requirements'].count
+            bug_count = departments[dept]['bugs'].count
             total_count = req_count + bug_count
             total_reqs += req_count
             total_bugs += bug_count
@@ -119,51 +129,55 @@ def write_full_table_to_file(departments):
         f.write("| " + " | ".join(header_parts) + " |\n")
         f.write("|" + "|".join(["--------"] * len(header_parts)) + "|\n")
         
-        # 写入数据行
-        for row_idx in range(min(max_rows, 50)):  # 限制最多50行
-            row_data = []
-            for dept in active_depts:
-                # 需求列
-                if row_idx < len(departments[dept]['requirements']):
-                    req_content = departments[dept]['requirements'][row_idx]
-                    # 清理内容，去除换行符和多余空格
-                    req_content = req_content.replace('\n', ' ').replace('\r', ' ').strip()
-                    # 截断过长的内容
-                    if len(req_content) > 80:
-                        req_content = req_content[:77] + "..."
-                    row_data.append(req_content)
-                else:
-                    row_data.append("")
-                
-                # Bug列
-                if row_idx < len(departments[dept]['bugs']):
-                    bug_content = departments[dept]['bugs'][row_idx]
-                    # 清理内容
-                    bug_content = bug_content.replace('\n', ' ').replace('\r', ' ').strip()
-                    # 截断过长的内容
-                    if len(bug_content) > 80:
-                        bug_content = bug_content[:77] + "..."
-                    row_data.append(bug_content)
-                else:
-                    row_data.append("")
-            
-            f.write("| " + " | ".join(row_data) + " |\n")
+        # 逐行写入数据（限制最多 row_limit 行）
+        columns = []
+        for dept in active_depts:
+            columns.append(departments[dept]['requirements'].items)
+            columns.append(departments[dept]['bugs'].items)
+        
+        for row_idx in range(min(max_rows, row_limit)):
+            f.write("| " + " | ".join(_table_cell(items, row_idx) for items in columns) + " |\n")
         
         # 如果还有更多数据，添加说明
-        if max_rows > 50:
-            f.write(f"\n*注：表格仅显示前50行数据，完整数据共{max_rows}行*\n")
+        if max_rows > row_limit:
+            f.write(f"\n*注：表格仅显示前{row_limit}行数据，完整数据共{max_rows}行*\n")
+
+    submit_write('完整工作内容对照表.md', write_table)
+
+def select_archived_records(data, period=None, departments=None, archive_dir=None):
+    """按记录ID与周报归档中指定周期/部门的记录关联，只保留匹配的分析记录，归属中心以归档为准"""
+    from archive import DEFAULT_ARCHIVE_DIR, load_archive
+    from ingest import DEPT_COLUMN, RECORD_ID_COLUMN
 
-def main():
+    archived = load_archive(period, departments, [RECORD_ID_COLUMN, DEPT_COLUMN], archive_dir or DEFAULT_ARCHIVE_DIR)
+    archived = archived.dropna(subset=[RECORD_ID_COLUMN]).drop_duplicates(RECORD_ID_COLUMN, keep='last')
+    id_to_dept = dict(zip(archived[RECORD_ID_COLUMN], archived[DEPT_COLUMN]))
+    return [{**record, 'department': id_to_dept[record['record_id']]}
+            for record in data if record['record_id'] in id_to_dept]
+
+def main(period=None, departments=None, archive_dir=None):
+    """指定 period 或 departments 时只统计归档中该范围内的记录（按记录ID关联）"""
     print("正在生成完整的工作内容对照表...")
-    departments = generate_full_table()
+    data = load_record_analysis()
+    if period or departments:
+        data = select_archived_records(data, period, departments, archive_dir)
+        print(f"归档范围内的分析记录: {len(data)} 条")
+    departments = generate_full_table(data=data)
     write_full_table_to_file(departments)
-    print("完整表格已生成到文件：完整工作内容对照表.md")
     
-    # 显示统计信息
+    # 显示统计信息（表格在后台写出）
     print("\n统计信息:")
     for dept, data in departments.items():
         if data['requirements'] or data['bugs']:
-            print(f"{dept}: 需求{len(data['requirements'])}项, Bug修复{len(data['bugs'])}项")
+            print(f"{dept}: 需求{data['requirements'].count}项, Bug修复{data['bugs'].count}项")
+
+    wait_for_writes()
+    print("完整表格已生成到文件：完整工作内容对照表.md")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="生成完整工作内容对照表")
+    parser.add_argument('--period', help="只统计周报归档中指定周期的记录，如 2025Q3（按记录ID关联）")
+    parser.add_argument('--dept', nargs='+', help="只统计周报归档中指定部门的记录（按记录ID关联）")
+    parser.add_argument('--archive', help="周报归档目录（默认 archive）")
+    args = parser.parse_args()
+    main(args.period, args.dept, args.archive)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成项目分析结果 project_analysis_result.json
+由逐条分析结果（detailed_record_analysis.json）一次遍历得到每个项目的总人天、排除设备调机后的人天、
+调机人天、人数、开发/维护/调机记录数，以及去重后的需求和Bug工作项列表。
+人天和记录数按项目分组向量化汇总；工作项逐条提取后用集合去重，保留首次出现的顺序；
+结果逐个项目流式写出，与一次性 json.dump(indent=2) 的格式相同
+"""
+
+import argparse
+import json
+
+import pandas as pd
+
+from extract_requirements_bugs import extract_work_items, is_bug_fix, is_requirement
+from output_writer import submit_write, wait_for_writes
+
+RECORD_FILE = 'detailed_record_analysis.json'
+DEFAULT_OUTPUT = 'project_analysis_result.json'
+
+# 工作项同时像需求和Bug、或都不像时，按所在记录的工作类型归类；调机记录的工作项不计入
+REQUIREMENT_TYPES = ('software_development', 'system_integration')
+BUG_TYPES = ('software_maintenance',)
+TUNING_TYPE = 'equipment_tuning'
+
+# 各记录数字段对应的工作类型
+COUNT_FIELDS = {
+    'development_work_count': 'software_development',
+    'maintenance_work_count': 'software_maintenance',
+    'tuning_work_count': TUNING_TYPE,
+}
+
+
+def classify_item(item, work_type):
+    """工作项归类为 'requirements'、'bugs' 或 None（不计入）"""
+    requirement, bug = is_requirement(item), is_bug_fix(item)
+    if requirement and bug or not (requirement or bug):
+        if work_type in REQUIREMENT_TYPES:
+            return 'requirements'
+        if work_type in BUG_TYPES:
+            return 'bugs'
+        return 'requirements' if requirement else None
+    return 'requirements' if requirement else 'bugs'
+
+
+def parse_weeks(spec):
+    """解析周次范围，如 '1-13' 或 '20'，返回 (起始周, 结束周)"""
+    start, _, end = spec.partition('-')
+    return int(start), int(end or start)
+
+
+def summarize_projects(records, weeks=None):
+    """一次遍历逐条分析结果，返回 (按项目汇总的数据表, {项目: {'requirements': [...], 'bugs': [...]}})
+
+    weeks 为 (起始周, 结束周) 时只统计该范围内的记录
+    """
+    columns = {'project': [], 'person': [], 'days': [], 'type': []}
+    items = {}
+    seen = {}
+
+    for record in records:
+        project = record['project']
+        if weeks is not None and not weeks[0] <= record['week'] <= weeks[1]:
+            continue
+        work_type = record['analysis']['type']
+        columns['project'].append(project)
+        columns['person'].append(record['person'])
+        columns['days'].append(record['days'])
+        columns['type'].append(work_type)
+
+        if project != project or work_type == TUNING_TYPE:
+            continue
+        lists = items.setdefault(project, {'requirements': [], 'bugs': []})
+        project_seen = seen.setdefault(project, set())
+        for item in extract_work_items(record['content']):
+            kind = classify_item(item, work_type)
+            if kind is not None and (kind, item) not in project_seen:
+                project_seen.add((kind, item))
+                lists[kind].append(item)
+
+    frame = pd.DataFrame(columns)
+    days = pd.to_numeric(frame['days'], errors='coerce')
+    tuning = frame['type'] == TUNING_TYPE
+    frame['filtered_days'] = days.where(~tuning, 0.0)
+    frame['tuning_days'] = days.where(tuning, 0.0)
+    for field, work_type in COUNT_FIELDS.items():
+        frame[field] = frame['type'] == work_type
+
+    # 项目按首次出现的顺序排列，缺失的项目名不参与分组
+    summary = frame.assign(days=days).groupby('project', sort=False).agg(
+        total_days=('days', 'sum'),
+        filtered_days=('filtered_days', 'sum'),
+        tuning_days=('tuning_days', 'sum'),
+        people_count=('person', 'nunique'),
+        **{field: (field, 'sum') for field in COUNT_FIELDS},
+    )
+    return summary, items
+
+
+def iter_project_entries(summary, items):
+    """逐个项目生成 (项目, 结果字典)，字段顺序与 project_analysis_result.json 一致"""
+    for row in summary.itertuples():
+        lists = items.get(row.Index, {'requirements': [], 'bugs': []})
+        yield row.Index, {
+            'total_days': float(row.total_days),
+            'filtered_days': float(row.filtered_days),
+            'tuning_days': float(row.tuning_days),
+            'people_count': int(row.people_count),
+            'requirements': lists['requirements'],
+            'bugs': lists['bugs'],
+            **{field: int(getattr(row, field)) for field in COUNT_FIELDS},
+        }
+
+
+def write_project_entries(f, entries):
+    """逐个项目写出JSON对象，不在内存中构建完整的结果字典"""
+    f.write('{')
+    first = True
+    for project, entry in entries:
+        body = json.dumps(entry, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        f.write(f"{'' if first else ','}\n  {json.dumps(project, ensure_ascii=False)}: {body}")
+        first = False
+    f.write('}' if first else '\n}')
+
+
+def main(records_file=RECORD_FILE, output=DEFAULT_OUTPUT, weeks=None, records=None):
+    """records 为已在内存中的逐条分析结果时不再读取 records_file"""
+    if records is None:
+        print(f"读取逐条分析结果: {records_file}")
+        with open(records_file, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+
+    summary, items = summarize_projects(records, weeks)
+    submit_write(output, lambda f: write_project_entries(f, iter_project_entries(summary, items)))
+
+    period = f"第{weeks[0]}-{weeks[1]}周" if weeks else "全部周次"
+    print(f"\n📁 项目分析（{period}）: {len(summary)} 个项目，共 {summary['total_days'].sum():.1f} 人天，"
+          f"其中调机 {summary['tuning_days'].sum():.1f} 人天")
+    print(f"   需求 {sum(len(lists['requirements']) for lists in items.values())} 项，"
+          f"Bug修复 {sum(len(lists['bugs']) for lists in items.values())} 项（各项目内去重）")
+
+    wait_for_writes()
+    print(f"✅ 项目分析结果已保存到: {output}")
+    return summary, items
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="由逐条分析结果生成项目分析结果 project_analysis_result.json")
+    parser.add_argument('--records', default=RECORD_FILE, help=f"逐条分析结果文件（默认 {RECORD_FILE}，由 analyze_csv.py 生成）")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"输出文件（默认 {DEFAULT_OUTPUT}）")
+    parser.add_argument('--weeks', type=parse_weeks, help="只统计指定周次范围，如 1-13")
+    args = parser.parse_args()
+    main(args.records, args.output, args.weeks)
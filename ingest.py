@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+周报数据导入
+支持单个CSV文件、目录或通配符，多个文件在线程池（或进程池）中并行解析，
+按 订单项目.记录ID(不可修改) 去重，同一记录以最新导出的文件为准。
+精简模式只读取用到的列，重复度高的文本列读为分类类型，数值列使用紧凑类型。
+可选的 pyarrow 解析引擎在内存映射的UTF-8文件上多线程解析，GBK文件先流式转码
+"""
+
+import csv
+import glob
+import os
+import re
+import time
+from functools import partial
+
+# 记录唯一标识列
+RECORD_ID_COLUMN = '订单项目.记录ID(不可修改)'
+
+# 依次尝试的文件编码
+ENCODINGS = ['utf-8-sig', 'utf-8', 'gbk', 'gb2312', 'gb18030']
+
+# chardet 检测编码时读取的文件开头字节数
+DETECT_BYTES = 1 << 20
+
+# 默认输入文件
+DEFAULT_INPUT = '2025年1-6.csv'
+
+# 精简模式保留的列（数据标题(不可修改) 等冗余列不读取）及其类型
+LEAN_COLUMNS = [
+    '周报人',
+    '周次',
+    RECORD_ID_COLUMN,
+    '订单项目.立项项目',
+    '订单项目.归属中心',
+    '订单项目.本周投入天数（最低半天）',
+    '订单项目.本周进度及问题反馈',
+]
+CATEGORY_COLUMNS = ['周报人', '订单项目.立项项目', '订单项目.归属中心']
+CONTENT_COLUMN = '订单项目.本周进度及问题反馈'
+DEPT_COLUMN = '订单项目.归属中心'
+# 导入时附加的年份列（周次只在一年内有效，跨年数据按 年份+周次 区分）
+YEAR_COLUMN = '年份'
+DAYS_COLUMN = '订单项目.本周投入天数（最低半天）'
+
+# 报告中合并统计的部门：原部门 -> 合并后的部门
+DEPARTMENT_MERGES = {'T1电子元件': 'T1'}
+
+# CSV解析引擎：'c' 为pandas默认的单线程解析器，'pyarrow' 为pyarrow多线程解析器（需安装pyarrow）
+PARSER_ENGINES = ('c', 'pyarrow')
+
+# 转码时每次读取的字符数
+TRANSCODE_CHUNK = 4 * 1024 * 1024
+
+
+def resolve_input_files(source):
+    """将文件、目录或通配符解析为CSV文件列表，按导出时间从旧到新排序"""
+    if os.path.isdir(source):
+        files = glob.glob(os.path.join(source, '*.csv'))
+    elif os.path.isfile(source):
+        files = [source]
+    else:
+        files = [f for f in glob.glob(source) if os.path.isfile(f)]
+
+    if not files:
+        raise FileNotFoundError(f"未找到输入文件: {source}")
+
+    # 修改时间相同时按文件名排序，保证结果可复现
+    return sorted(files, key=lambda f: (os.path.getmtime(f), f))
+
+
+def _lean_read_options():
+    """精简模式的 read_csv 参数：解析时就跳过无用列并直接构建分类列"""
+    import numpy as np
+    import pandas as pd
+
+    dtype = {column: 'category' for column in CATEGORY_COLUMNS}
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        # 内容列使用Arrow存储的字符串，缺失值仍为NaN，与下游 pd.isna 判断保持一致
+        dtype[CONTENT_COLUMN] = pd.StringDtype('pyarrow', na_value=np.nan)
+    return {'usecols': lambda column: column in LEAN_COLUMNS, 'dtype': dtype}
+
+
+def _compact_numeric_columns(df):
+    """周次无缺失时转为最小的整数类型；投入天数能无损表示时转为float32
+
+    半天的整数倍在float32中可精确表示；出现 0.3 之类的值时保留float64，避免汇总结果出现舍入误差
+    """
+    import numpy as np
+    import pandas as pd
+
+    if '周次' in df.columns and df['周次'].notna().all():
+        df['周次'] = pd.to_numeric(df['周次'], downcast='integer')
+
+    if DAYS_COLUMN in df.columns and df[DAYS_COLUMN].dtype == np.float64:
+        days = df[DAYS_COLUMN].to_numpy()
+        compact = days.astype(np.float32)
+        if np.array_equal(compact.astype(np.float64), days, equal_nan=True):
+            df[DAYS_COLUMN] = compact
+
+
+def _transcode_to_utf8(file_path, encoding, target_path):
+    """按块流式地将文件从 encoding 转码为UTF-8，内存占用与文件大小无关"""
+    with open(file_path, 'r', encoding=encoding, newline='') as src, \
+            open(target_path, 'w', encoding='utf-8', newline='') as dst:
+        while True:
+            chunk = src.read(TRANSCODE_CHUNK)
+            if not chunk:
+                break
+            dst.write(chunk)
+
+
+def _read_arrow_table(utf8_path, lean):
+    """用pyarrow在内存映射的UTF-8文件上多线程解析CSV，转换为与 pd.read_csv 相同结构的数据表"""
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    with open(utf8_path, 'r', encoding='utf-8-sig', newline='') as f:
+        columns = next(csv.reader(f), [])
+
+    convert_options = pa_csv.ConvertOptions(strings_can_be_null=True)
+    if lean:
+        convert_options.include_columns = [column for column in columns if column in LEAN_COLUMNS]
+        convert_options.column_types = {
+            column: pa.dictionary(pa.int32(), pa.string()) for column in CATEGORY_COLUMNS if column in columns
+        }
+
+    with pa.memory_map(utf8_path, 'r') as source:
+        # 工作内容常含引号内的换行
+        table = pa_csv.read_csv(source, read_options=pa_csv.ReadOptions(use_threads=True),
+                                parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                                convert_options=convert_options)
+    df = table.to_pandas()
+
+    if lean:
+        # 字典编码的类别按出现顺序排列，统一为与 read_csv 相同的排序后类别
+        for column in CATEGORY_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].cat.set_categories(sorted(df[column].cat.categories))
+        _compact_numeric_columns(df)
+    return df
+
+
+def _read_weekly_csv_pyarrow(file_path, lean=False):
+    """pyarrow引擎：UTF-8文件直接内存映射解析，其他编码先流式转码到临时文件"""
+    import tempfile
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("engine='pyarrow' 需要安装 pyarrow（pipenv install pyarrow）") from None
+
+    for encoding in _candidate_encodings(file_path):
+        try:
+            if encoding in ('utf-8-sig', 'utf-8'):
+                # pyarrow解析时会校验UTF-8，非UTF-8文件在这里失败后改用其他编码
+                return _read_arrow_table(file_path, lean)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                utf8_path = os.path.join(tmp_dir, 'utf8.csv')
+                _transcode_to_utf8(file_path, encoding, utf8_path)
+                return _read_arrow_table(utf8_path, lean)
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+        except pa.ArrowInvalid as e:
+            # 只有UTF-8校验失败才尝试下一种编码，其他解析错误直接抛出
+            if 'utf8' not in str(e).lower().replace('-', ''):
+                raise
+            continue
+
+    raise ValueError(f"无法使用任何编码读取文件: {file_path}")
+
+
+def _candidate_encodings(file_path):
+    """依次尝试的编码：ENCODINGS 都失败后，安装了 chardet 时再用它按文件开头检测的编码"""
+    yield from ENCODINGS
+    try:
+        import chardet
+    except ImportError:
+        return
+    with open(file_path, 'rb') as f:
+        detected = chardet.detect(f.read(DETECT_BYTES))['encoding']
+    if detected and detected.lower() not in ENCODINGS:
+        yield detected
+
+
+def read_weekly_csv(file_path, lean=False, engine='c'):
+    """尝试不同编码读取单个周报CSV文件，lean=True 时使用精简模式，engine 见 PARSER_ENGINES"""
+    import pandas as pd
+
+    if engine == 'pyarrow':
+        return _read_weekly_csv_pyarrow(file_path, lean)
+    if engine != 'c':
+        raise ValueError(f"未知的解析引擎: {engine}（可选: {', '.join(PARSER_ENGINES)}）")
+
+    options = _lean_read_options() if lean else {}
+    for encoding in _candidate_encodings(file_path):
+        try:
+            df = pd.read_csv(file_path, encoding=encoding, **options)
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+
+        if lean:
+            _compact_numeric_columns(df)
+        return df
+
+    raise ValueError(f"无法使用任何编码读取文件: {file_path}")
+
+
+def expand_departments(departments):
+    """按 DEPARTMENT_MERGES 展开部门列表：指定合并后的部门时一并包含并入它的原部门"""
+    expanded = list(departments)
+    for source, target in DEPARTMENT_MERGES.items():
+        if target in expanded and source not in expanded:
+            expanded.append(source)
+    return expanded
+
+
+def unify_categories(frames):
+    """统一各文件分类列的类别集合，使合并后仍保持分类类型"""
+    import pandas as pd
+
+    for column in CATEGORY_COLUMNS:
+        values = [frame[column] for frame in frames if column in frame.columns]
+        if len(values) < 2:
+            continue
+        categories = pd.Index(sorted(set().union(*(v.cat.categories for v in values))))
+        for frame in frames:
+            if column in frame.columns:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return frames
+
+
+def plain_memory_estimate(df):
+    """估算同样的数据按普通对象列存储时占用的内存（字节）"""
+    import sys
+
+    import pandas as pd
+
+    total = df.index.memory_usage()
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # 普通对象列中每个值各占一个字符串对象和一个8字节指针
+            sizes = [sys.getsizeof(str(value)) for value in series.cat.categories]
+            counts = series.value_counts(sort=False).reindex(series.cat.categories).to_numpy()
+            total += int((counts * sizes).sum()) + 8 * len(series)
+        elif series.dtype.kind in 'fiu':
+            total += 8 * len(series)
+        else:
+            total += int(series.astype(object).memory_usage(index=False, deep=True))
+    return total
+
+
+def print_memory_report(df):
+    """输出精简模式的内存占用及相对普通对象列节省的比例（未读取的列不计入）"""
+    lean_bytes = int(df.memory_usage(deep=True).sum())
+    plain_bytes = plain_memory_estimate(df)
+    saved = 1 - lean_bytes / plain_bytes if plain_bytes else 0.0
+    print(f"精简模式内存: {lean_bytes / 1024 / 1024:.2f} MB（普通对象列约 {plain_bytes / 1024 / 1024:.2f} MB，"
+          f"节省 {saved:.0%}）")
+
+
+def infer_year(file_path):
+    """由导出文件名推断年份，如 '2025年1-6.csv' -> 2025；文件名中没有年份时取文件修改时间的年份"""
+    match = re.search(r'(?<!\d)(20\d{2})(?!\d)', os.path.basename(file_path))
+    if match:
+        return int(match.group(1))
+    return time.localtime(os.path.getmtime(file_path)).tm_year
+
+
+def week_ordinals(years, weeks):
+    """(年份, 周次) 转换为连续的周序号，上一年最后一周与下一年第1周相邻（按ISO周历）"""
+    import datetime
+
+    import numpy as np
+
+    years = np.asarray(years, dtype=np.int64)
+    weeks = np.asarray(weeks, dtype=np.int64)
+    unique_years, inverse = np.unique(years, return_inverse=True)
+    # 各年第1周周一的序号（公元1年1月1日为周一）
+    starts = np.array([(datetime.date.fromisocalendar(int(year), 1, 1).toordinal() - 1) // 7
+                       for year in unique_years], dtype=np.int64)
+    return starts[inverse].reshape(years.shape) + weeks - 1
+
+
+def ordinal_weeks(ordinals):
+    """week_ordinals 的逆变换，返回 (年份数组, 周次数组)"""
+    import datetime
+
+    import numpy as np
+
+    pairs = [datetime.date.fromordinal(int(ordinal) * 7 + 1).isocalendar()[:2] for ordinal in ordinals]
+    pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def deduplicate_records(df):
+    """按记录ID去重，保留最后出现（最新导出）的记录；无记录ID的行全部保留"""
+    if RECORD_ID_COLUMN not in df.columns:
+        return df.reset_index(drop=True)
+
+    record_ids = df[RECORD_ID_COLUMN]
+    keep = record_ids.isna() | ~record_ids.duplicated(keep='last')
+    return df[keep].reset_index(drop=True)
+
+
+def load_weekly_reports(source=DEFAULT_INPUT, max_workers=None, use_processes=False,
+                        validate=False, quarantine_file=None, lean=False, engine='c',
+                        archive_dir=None, year=None):
+    """加载一个或多个周报CSV文件，合并并去重为统一的数据表
+
+    每行附加所属年份 YEAR_COLUMN，年份为 year，未指定时由各文件名推断（见 infer_year）。
+    validate=True 时在去重前做数据质量校验（见 validation.py），
+    违规行隔离到 quarantine_file 并不再参与后续处理。
+    lean=True 时只保留 LEAN_COLUMNS，人员/项目/中心为分类列，周次和投入天数使用紧凑数值类型。
+    engine='pyarrow' 时使用pyarrow多线程解析器，得到的数据表结构与默认引擎一致。
+    archive_dir 不为空时把（校验后的）记录追加到该周报归档（见 archive.py）
+    """
+    import numpy as np
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    files = resolve_input_files(source)
+
+    reader = partial(read_weekly_csv, lean=lean, engine=engine)
+
+    if len(files) == 1:
+        frames = [reader(files[0])]
+    else:
+        workers = max_workers or min(len(files), os.cpu_count() or 1)
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_cls(max_workers=workers) as executor:
+            # map 保持输入顺序，后面的文件覆盖前面的同ID记录
+            frames = list(executor.map(reader, files))
+
+    for file_path, frame in zip(files, frames):
+        print(f"读取 {file_path}: {len(frame)} 行")
+
+    if lean and len(frames) > 1:
+        frames = unify_categories(frames)
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    years = [year or infer_year(file_path) for file_path in files]
+    df[YEAR_COLUMN] = np.repeat(years, [len(frame) for frame in frames]).astype(np.int16)
+
+    if validate:
+        from validation import (DEFAULT_QUARANTINE, print_validation_summary,
+                                validate_frame, write_quarantine)
+
+        quarantine_file = quarantine_file or DEFAULT_QUARANTINE
+        sources = [file_path for file_path, frame in zip(files, frames) for _ in range(len(frame))]
+        total = len(df)
+        df, quarantine, summary = validate_frame(df, sources)
+        write_quarantine(quarantine, quarantine_file)
+        print_validation_summary(summary, total, len(quarantine), quarantine_file)
+
+    if archive_dir:
+        from archive import append_to_archive
+
+        count = append_to_archive(df, archive_dir)
+        print(f"已追加到归档 {archive_dir}: {len(df)} 行，{count} 个分区")
+
+    total = len(df)
+    df = deduplicate_records(df)
+
+    if total != len(df):
+        print(f"按记录ID去重: {total} 行 -> {len(df)} 行")
+
+    if lean:
+        print_memory_report(df)
+
+    return df
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报告文件的后台写出
+计算完成的结果交给后台线程池序列化并写盘，主线程继续下一阶段的计算和控制台输出。
+每个文件先写入同目录下的临时文件再重命名，中途失败不会留下写了一半的文件；
+脚本结束前调用 wait_for_writes() 等待全部写出完成，写出时的异常在此处抛出
+"""
+
+import atexit
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 后台写出线程数
+WRITER_THREADS = 4
+
+_executor = None
+_pending = []
+_lock = threading.Lock()
+
+# 导入时读取一次umask（os.umask 只能以设置的方式读取，不宜在写出线程中调用）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write(path, write, mode='w', encoding='utf-8', newline=None, fsync=False):
+    """调用 write(f) 写入临时文件，完成后原子地替换目标文件
+
+    fsync=True 时替换前把临时文件刷到磁盘，断电或崩溃后目标文件要么是旧内容、要么是完整的新内容
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        if 'b' in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding=encoding, newline=newline)
+        with f:
+            write(f)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        # mkstemp 创建的文件权限为0600，改为与普通新建文件一致
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def submit_write(path, write, mode='w', encoding='utf-8', newline=None):
+    """在后台线程中执行 atomic_write，返回 Future
+
+    提交后调用方不应再修改 write 所引用的数据
+    """
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WRITER_THREADS, thread_name_prefix='writer')
+            atexit.register(wait_for_writes)
+        future = _executor.submit(atomic_write, path, write, mode, encoding, newline)
+        _pending.append((path, future))
+    return future
+
+
+def wait_for_writes():
+    """等待所有已提交的写出完成，返回写出的文件列表；任一文件写出失败时抛出该异常"""
+    with _lock:
+        pending = list(_pending)
+        _pending.clear()
+
+    errors = []
+    for path, future in pending:
+        error = future.exception()
+        if error is not None:
+            errors.append((path, error))
+
+    if errors:
+        path, error = errors[0]
+        raise RuntimeError(f"写出文件失败: {path}（共 {len(errors)} 个文件失败）") from error
+    return [path for path, _ in pending]
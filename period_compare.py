@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+周期对比报告
+generate_final_optimized_report.py 每次运行都把 中心/项目/季度/人员 的人天汇总保存为一份快照，
+对比只读取这些快照，不再重新解析原始周报CSV。
+周期可以是整份快照，也可以是快照中的若干季度；项目增减、新增/结束项目和人员流动
+都由两期汇总表的外连接一次算出
+"""
+
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# 快照保存目录
+DEFAULT_AGGREGATE_DIR = 'aggregates'
+
+# 对比结果导出文件
+PROJECT_OUTPUT = '周期对比_项目.csv'
+PERSON_OUTPUT = '周期对比_人员.csv'
+
+# 快照中的列（与 process_raw_data_to_quarterly 的输出一致）
+AGGREGATE_COLUMNS = ['订单项目.归属中心', '订单项目.立项项目', '年份', '季度', '人员', '人天']
+PROJECT_KEYS = ['订单项目.归属中心', '订单项目.立项项目']
+
+
+def aggregate_label(source):
+    """由输入文件、目录或通配符生成快照名，如 '2025年1-6.csv' -> '2025年1-6'"""
+    name = os.path.basename(os.path.normpath(source))
+    name = os.path.splitext(name)[0] if os.path.isfile(source) else name
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', name).strip('_') or 'aggregate'
+
+
+def _snapshot_path(label, directory=DEFAULT_AGGREGATE_DIR):
+    return os.path.join(directory, f"{label}.npz")
+
+
+def save_aggregates(quarterly_df, label, directory=DEFAULT_AGGREGATE_DIR):
+    """保存一次运行的 中心/项目/季度/人员 人天汇总，同名快照被覆盖"""
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path(label, directory)
+    np.savez_compressed(
+        path,
+        departments=quarterly_df['订单项目.归属中心'].to_numpy(dtype=str),
+        projects=quarterly_df['订单项目.立项项目'].to_numpy(dtype=str),
+        # 没有年份列的数据（如预览抽样）年份记为0
+        years=quarterly_df['年份'].to_numpy(dtype=np.int64) if '年份' in quarterly_df else np.zeros(len(quarterly_df), dtype=np.int64),
+        quarters=quarterly_df['季度'].to_numpy(dtype=np.int64),
+        persons=quarterly_df['人员'].to_numpy(dtype=str),
+        days=quarterly_df['人天'].to_numpy(dtype=np.float64),
+    )
+    return path
+
+
+def load_aggregates(label, directory=DEFAULT_AGGREGATE_DIR):
+    """读取快照为 AGGREGATE_COLUMNS 格式的数据表"""
+    path = _snapshot_path(label, directory)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"未找到汇总快照: {path}（请先对该数据运行 generate_final_optimized_report.py）")
+    with np.load(path) as data:
+        quarters = data['quarters']
+        return pd.DataFrame({
+            '订单项目.归属中心': data['departments'],
+            '订单项目.立项项目': data['projects'],
+            # 旧版快照没有保存年份
+            '年份': data['years'] if 'years' in data.files else np.zeros(len(quarters), dtype=np.int64),
+            '季度': quarters,
+            '人员': data['persons'],
+            '人天': data['days'],
+        })
+
+
+def list_snapshots(directory=DEFAULT_AGGREGATE_DIR):
+    """列出已保存的快照名，按保存时间从旧到新排序"""
+    if not os.path.isdir(directory):
+        return []
+    files = [f for f in os.listdir(directory) if f.endswith('.npz')]
+    files.sort(key=lambda f: (os.path.getmtime(os.path.join(directory, f)), f))
+    return [os.path.splitext(f)[0] for f in files]
+
+
+def parse_period(spec, directory=DEFAULT_AGGREGATE_DIR):
+    """解析周期说明，返回 (快照名, [(年份或None, 季度), ...] 或None)
+
+    支持 '2025年1-6'（整份快照）、'2025年1-6:Q1,Q2'（快照中的部分季度）
+    以及 'Q2'（最近保存的快照中的季度）；跨年快照中的季度可写成 '2025Q1' 只取该年
+    """
+    label, _, quarters = spec.rpartition(':') if ':' in spec else (spec, '', '')
+    if not quarters and re.fullmatch(r'(?i)(\d{4}Q|Q)?\d(,(\d{4}Q|Q)?\d)*', label):
+        label, quarters = '', label
+
+    if not label:
+        snapshots = list_snapshots(directory)
+        if not snapshots:
+            raise FileNotFoundError(f"{directory} 中没有汇总快照")
+        label = snapshots[-1]
+
+    if not quarters:
+        return label, None
+    selected = []
+    for quarter in quarters.split(','):
+        year, _, quarter = quarter.strip().upper().rpartition('Q')
+        selected.append((int(year) if year else None, int(quarter)))
+    return label, selected
+
+
+def period_frame(spec, directory=DEFAULT_AGGREGATE_DIR):
+    """取出一个周期的 中心/项目/人员 人天汇总"""
+    label, quarters = parse_period(spec, directory)
+    df = load_aggregates(label, directory)
+    if quarters is not None:
+        keep = np.zeros(len(df), dtype=bool)
+        for year, quarter in quarters:
+            keep |= (df['季度'] == quarter).to_numpy() & ((df['年份'] == year).to_numpy() if year else True)
+        df = df[keep]
+    return df.groupby(PROJECT_KEYS + ['人员'], as_index=False)['人天'].sum()
+
+
+def _outer_compare(base, current, keys):
+    """按 keys 外连接两期人天，返回带 上期/本期/变化 列和连接来源指示的数据表"""
+    merged = base.groupby(keys, as_index=False)['人天'].sum().merge(
+        current.groupby(keys, as_index=False)['人天'].sum(),
+        on=keys, how='outer', suffixes=('_上期', '_本期'), indicator=True)
+    merged['上期人天'] = merged.pop('人天_上期').fillna(0.0)
+    merged['本期人天'] = merged.pop('人天_本期').fillna(0.0)
+    merged['变化人天'] = merged['本期人天'] - merged['上期人天']
+    return merged
+
+
+def compare_projects(base, current):
+    """项目级对比：人天变化、变化率，以及新增/结束/持续状态"""
+    merged = _outer_compare(base, current, PROJECT_KEYS)
+    merged['状态'] = merged.pop('_merge').map({'left_only': '结束', 'right_only': '新增', 'both': '持续'}).astype(str)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = merged['变化人天'] / merged['上期人天']
+    merged['变化率'] = rate.where(merged['上期人天'] > 0).round(3)
+
+    # 两期人员数
+    people = _outer_compare(base, current, PROJECT_KEYS + ['人员'])
+    people_counts = people.assign(
+        上期人数=people['_merge'] != 'right_only',
+        本期人数=people['_merge'] != 'left_only',
+    ).groupby(PROJECT_KEYS, as_index=False)[['上期人数', '本期人数']].sum()
+    merged = merged.merge(people_counts, on=PROJECT_KEYS, how='left')
+
+    return merged.sort_values(['订单项目.归属中心', '变化人天'], ascending=[True, False]).reset_index(drop=True)
+
+
+def compare_people(base, current):
+    """人员流动：每人加入/退出的项目、人天变化，以及新出现/不再出现的人员"""
+    links = _outer_compare(base, current, PROJECT_KEYS + ['人员'])
+    links['项目名'] = links['订单项目.立项项目']
+    side = links.pop('_merge')
+
+    joined = links[side == 'right_only'].groupby('人员')['项目名'].agg('、'.join)
+    left = links[side == 'left_only'].groupby('人员')['项目名'].agg('、'.join)
+
+    links['上期项目数'] = side != 'right_only'
+    links['本期项目数'] = side != 'left_only'
+    persons = links.groupby('人员')[['上期人天', '本期人天', '上期项目数', '本期项目数']].sum()
+    persons['变化人天'] = persons['本期人天'] - persons['上期人天']
+    persons['加入项目'] = joined.reindex(persons.index).fillna('')
+    persons['退出项目'] = left.reindex(persons.index).fillna('')
+    persons['状态'] = np.select(
+        [persons['上期项目数'] == 0, persons['本期项目数'] == 0,
+         (persons['加入项目'] != '') | (persons['退出项目'] != '')],
+        ['新出现', '不再出现', '项目调整'], default='不变')
+
+    return persons.reset_index().sort_values('变化人天', ascending=False).reset_index(drop=True)
+
+
+def compare_departments(project_table):
+    """部门级汇总，由项目级对比结果直接聚合"""
+    status = pd.crosstab(project_table['订单项目.归属中心'], project_table['状态'])
+    departments = project_table.groupby('订单项目.归属中心')[['上期人天', '本期人天', '变化人天']].sum()
+    for column in ('新增', '结束'):
+        departments[f'{column}项目'] = status[column] if column in status else 0
+    return departments.reset_index()
+
+
+def print_comparison(base_spec, current_spec, departments, projects, people, top=10):
+    """控制台输出对比摘要"""
+    print(f"\n📊 周期对比: {base_spec}  →  {current_spec}")
+    print("=" * 100)
+    print(f"{'部门':<20} {'上期人天':>10} {'本期人天':>10} {'变化':>10} {'新增项目':>8} {'结束项目':>8}")
+    print("-" * 100)
+    for row in departments.itertuples(index=False):
+        print(f"{row[0]:<20} {row.上期人天:>10.1f} {row.本期人天:>10.1f} {row.变化人天:>+10.1f} "
+              f"{row.新增项目:>8} {row.结束项目:>8}")
+    print("-" * 100)
+    print(f"{'合计':<20} {departments['上期人天'].sum():>10.1f} {departments['本期人天'].sum():>10.1f} "
+          f"{departments['变化人天'].sum():>+10.1f}")
+
+    for status, title in (('新增', '🆕 新增项目'), ('结束', '🏁 结束项目')):
+        subset = projects[projects['状态'] == status]
+        subset = subset.reindex(subset['变化人天'].abs().sort_values(ascending=False).index)
+        if len(subset):
+            print(f"\n{title}（{len(subset)} 个）:")
+            for row in subset.head(top).itertuples(index=False):
+                print(f"   [{row[0]}] {row[1]}: {row.上期人天:.1f} → {row.本期人天:.1f} 天")
+
+    changed = projects[(projects['状态'] == '持续') & (projects['变化人天'] != 0)]
+    changed = changed.reindex(changed['变化人天'].abs().sort_values(ascending=False).index).head(top)
+    if len(changed):
+        print(f"\n📈 投入变化最大的持续项目:")
+        for row in changed.itertuples(index=False):
+            print(f"   [{row[0]}] {row[1]}: {row.上期人天:.1f} → {row.本期人天:.1f} 天（{row.变化人天:+.1f}）")
+
+    moved = people[people['状态'] != '不变']
+    if len(moved):
+        print(f"\n👥 人员流动（{len(moved)} 人）:")
+        for row in moved.itertuples(index=False):
+            detail = []
+            if row.加入项目:
+                detail.append(f"加入 {row.加入项目}")
+            if row.退出项目:
+                detail.append(f"退出 {row.退出项目}")
+            print(f"   {row.人员}（{row.状态}，{row.变化人天:+.1f}天）: {'；'.join(detail)}")
+
+
+def main(base_spec, current_spec, directory=DEFAULT_AGGREGATE_DIR,
+         project_output=PROJECT_OUTPUT, person_output=PERSON_OUTPUT):
+    from output_writer import submit_write, wait_for_writes
+
+    base = period_frame(base_spec, directory)
+    current = period_frame(current_spec, directory)
+
+    projects = compare_projects(base, current)
+    people = compare_people(base, current)
+    departments = compare_departments(projects)
+
+    submit_write(project_output, lambda f: projects.to_csv(f, index=False), encoding='utf-8-sig', newline='')
+    submit_write(person_output, lambda f: people.to_csv(f, index=False), encoding='utf-8-sig', newline='')
+
+    print_comparison(base_spec, current_spec, departments, projects, people)
+
+    wait_for_writes()
+    print(f"\n✅ 项目对比已保存到: {project_output}")
+    print(f"✅ 人员对比已保存到: {person_output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="基于汇总快照的周期对比（不重新读取原始周报）")
+    parser.add_argument('base', nargs='?', default='Q1',
+                        help="上期：快照名、'快照名:Q1,Q2' 或 'Q1'（最近的快照），跨年快照可写 2025Q1")
+    parser.add_argument('current', nargs='?', default='Q2', help="本期，格式同上期")
+    parser.add_argument('--dir', default=DEFAULT_AGGREGATE_DIR, help="汇总快照目录")
+    parser.add_argument('--list', action='store_true', help="列出已保存的快照")
+    args = parser.parse_args()
+
+    if args.list:
+        for label in list_snapshots(args.dir):
+            print(label)
+    else:
+        main(args.base, args.current, args.dir)
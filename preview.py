@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+快速预览：只读取周报文件的一小部分
+两种取样方式：
+  - 前N行：只读取文件开头，估算值按文件大小等比放大，不是随机样本，不给出误差范围；
+  - 分块抽样：把文件按字节位置等分为若干段，每段随机定位到一条记录的开头后连续读取几行。
+    导出文件按周次排列，按位置分段即近似按周次分层。总量用 字节数 为辅助变量的比率估计放大，
+    以分块为单位估计方差，给出95%置信区间。
+读取量只与预览行数有关，与文件大小无关
+"""
+
+import csv
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from ingest import DAYS_COLUMN, ENCODINGS, resolve_input_files
+
+# 默认预览行数和抽样分块数
+PREVIEW_ROWS = 200
+SAMPLE_BLOCKS = 40
+
+# 用于识别编码和估算平均行长的文件头部字节数
+PROBE_BYTES = 64 * 1024
+
+# 95%置信区间对应的正态分位数（分块较少时换算为t分布分位数）
+Z_95 = 1.96
+
+# 定位记录开头时，每个分块最多尝试的行数
+MAX_RESYNC_LINES = 200
+
+
+def _detect_encoding(path):
+    """用文件头部识别编码，返回 (编码, 表头列名, 表头字节数)"""
+    with open(path, 'rb') as f:
+        probe = f.read(PROBE_BYTES)
+    # 截到最后一个完整行，避免多字节字符被截断
+    if len(probe) == PROBE_BYTES and b'\n' in probe:
+        probe = probe[:probe.rindex(b'\n') + 1]
+
+    for encoding in ENCODINGS:
+        try:
+            text = probe.decode(encoding)
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+        header_line = probe.split(b'\n', 1)[0]
+        columns = next(csv.reader([text.split('\n', 1)[0].rstrip('\r')]))
+        return encoding, columns, len(header_line) + 1
+
+    raise ValueError(f"无法使用任何编码读取文件: {path}")
+
+
+def _parse_records(raw, encoding, n_columns, week_index, limit, resync):
+    """从一段字节中解析至多 limit 条完整记录，返回 [(起始偏移, 字节数, 字段列表)]
+
+    resync=True 时先跳过开头不完整的行，再逐行尝试，直到找到列数正确且周次为数字的记录开头。
+    分段末尾被截断的记录丢弃。
+    """
+    lines = raw.split(b'\n')
+    lines.pop()  # 最后一段没有换行符，可能不完整
+    offsets = np.concatenate([[0], np.cumsum([len(line) + 1 for line in lines])])
+
+    def decode(line):
+        # 行首已对齐到换行符之后，编码中的多字节字符不会被截断
+        return line.decode(encoding, errors='replace').rstrip('\r') + '\n'
+
+    def parse_from(start):
+        reader = csv.reader((decode(line) for line in lines[start:]), strict=True)
+        records = []
+        previous = 0
+        try:
+            for fields in reader:
+                if len(fields) != n_columns:
+                    break
+                record_start = offsets[start + previous]
+                record_end = offsets[start + reader.line_num]
+                records.append((int(record_start), int(record_end - record_start), fields))
+                previous = reader.line_num
+                if len(records) >= limit:
+                    break
+        except csv.Error:
+            pass  # 引号内的内容跨过了分段末尾
+        return records
+
+    candidates = range(1, min(len(lines), 1 + MAX_RESYNC_LINES)) if resync else [0]
+    for first in candidates:
+        records = parse_from(first)
+        if records and (not resync or _is_number(records[0][2][week_index])):
+            return records
+    return []
+
+
+def _t_quantile(dof, z=Z_95):
+    """t分布分位数的Cornish-Fisher近似，避免依赖scipy"""
+    return z + (z ** 3 + z) / (4 * dof) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+class PreviewSample:
+    """预览样本：数据表以及每行所在的文件、分块和字节数，用于放大估计总量"""
+
+    def __init__(self, frame, files, blocks, row_bytes, data_bytes, sampled):
+        self.frame = frame
+        self.files = files            # 每行所在文件的序号
+        self.blocks = blocks          # 每行所在分块的序号（文件内编号）
+        self.row_bytes = row_bytes    # 每行记录占用的字节数
+        self.data_bytes = data_bytes  # 各文件去掉表头后的字节数
+        self.sampled = sampled        # 是否为分块随机抽样
+
+    def estimate(self, values):
+        """估计全量数据上 values 的总和，返回 (估计值, 95%置信区间半宽或None)"""
+        values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+        total = 0.0
+        variance = 0.0
+        min_blocks = None
+        for file_idx, data_bytes in enumerate(self.data_bytes):
+            in_file = self.files == file_idx
+            block_ids = self.blocks[in_file]
+            y = np.bincount(block_ids, weights=values[in_file])
+            m = np.bincount(block_ids, weights=self.row_bytes[in_file])
+            keep = m > 0
+            y, m = y[keep], m[keep]
+            if not m.sum():
+                continue
+            ratio = y.sum() / m.sum()
+            total += data_bytes * ratio
+
+            n_blocks = len(m)
+            min_blocks = n_blocks if min_blocks is None else min(min_blocks, n_blocks)
+            if self.sampled and n_blocks > 1:
+                residual = y - ratio * m
+                variance += data_bytes ** 2 * (residual ** 2).sum() / (n_blocks * (n_blocks - 1) * m.mean() ** 2)
+
+        if not self.sampled or not min_blocks or min_blocks < 2:
+            return total, None
+        return total, _t_quantile(min_blocks - 1) * math.sqrt(variance)
+
+    def estimate_by(self, values, groups):
+        """按分组分别估计总和，返回 {分组: (估计值, 置信区间半宽或None)}"""
+        values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+        groups = pd.Series(groups).fillna('未知').astype(str).to_numpy()
+        return {
+            group: self.estimate(np.where(groups == group, values, 0.0))
+            for group in sorted(set(groups))
+        }
+
+
+def load_preview(source, rows=PREVIEW_ROWS, sample=False, blocks=SAMPLE_BLOCKS, seed=0):
+    """读取预览样本：每个文件取前 rows 行，或分 blocks 块随机抽取约 rows 行"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    files, block_ids, row_bytes, data_bytes = [], [], [], []
+
+    for file_idx, path in enumerate(resolve_input_files(source)):
+        encoding, columns, header_bytes = _detect_encoding(path)
+        week_index = columns.index('周次') if '周次' in columns else 0
+        size = os.path.getsize(path)
+        data_bytes.append(size - header_bytes)
+
+        with open(path, 'rb') as f:
+            if not sample:
+                # 逐步扩大读取量，直到取满 rows 行或读到文件末尾
+                length = PROBE_BYTES
+                while True:
+                    f.seek(header_bytes)
+                    raw = f.read(length)
+                    at_end = header_bytes + len(raw) >= size
+                    if at_end and not raw.endswith(b'\n'):
+                        raw += b'\n'
+                    records = _parse_records(raw, encoding, len(columns), week_index, rows, resync=False)
+                    if len(records) >= rows or at_end:
+                        break
+                    length *= 4
+                segments = [records]
+            else:
+                per_block = max(1, math.ceil(rows / blocks))
+                # 按表头之后的前若干行估算平均行长，决定每块读取的字节数
+                f.seek(header_bytes)
+                probe = _parse_records(f.read(PROBE_BYTES), encoding, len(columns), week_index, 50, resync=False)
+                avg_bytes = np.mean([length for _, length, _ in probe]) if probe else 1024
+                window = int(avg_bytes * (per_block + 2) * 4) + 4096
+
+                edges = np.linspace(header_bytes, size, blocks + 1)
+                segments = []
+                seen = set()
+                for low, high in zip(edges[:-1], edges[1:]):
+                    offset = int(rng.integers(int(low), max(int(high), int(low) + 1)))
+                    # 从偏移前一个字节开始读，偏移恰好位于行首时也能识别
+                    start = max(header_bytes - 1, offset - 1)
+                    f.seek(start)
+                    raw = f.read(window)
+                    if start + len(raw) >= size and not raw.endswith(b'\n'):
+                        raw += b'\n'
+                    records = _parse_records(raw, encoding, len(columns), week_index, per_block, resync=True)
+                    # 相邻分块读到同一条记录时只保留一次
+                    records = [(start + pos, length, fields) for pos, length, fields in records
+                               if start + pos not in seen]
+                    seen.update(pos for pos, _, _ in records)
+                    segments.append(records)
+
+        for block_idx, records in enumerate(segments):
+            for _, length, fields in records:
+                files.append(file_idx)
+                block_ids.append(block_idx)
+                row_bytes.append(length)
+            frames.append(pd.DataFrame([fields for _, _, fields in records], columns=columns, dtype=object))
+
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    # 与 read_csv 一致：空字符串为缺失值，数值列转为数字
+    frame = frame.replace('', np.nan)
+    for column in ('周次', DAYS_COLUMN):
+        if column in frame.columns:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    frame = frame.infer_objects()
+
+    return PreviewSample(frame, np.asarray(files, dtype=np.int64), np.asarray(block_ids, dtype=np.int64),
+                         np.asarray(row_bytes, dtype=np.float64), data_bytes, sample)
+
+
+def format_estimate(estimate, unit=''):
+    """格式化估计值，如 '≈ 1234.5 ± 56.7 人天'"""
+    total, half_width = estimate
+    if half_width is None:
+        return f"≈ {total:.1f}{unit}"
+    return f"≈ {total:.1f} ± {half_width:.1f}{unit}"
+
+
+def print_preview_header(sample):
+    """输出预览样本的说明"""
+    mode = f"分块随机抽样（{SAMPLE_BLOCKS} 块）" if sample.sampled else "前N行"
+    print(f"⚡ 预览模式: {mode}，读取 {len(sample.frame)} 行，"
+          f"文件数据共 {sum(sample.data_bytes) / 1024 / 1024:.1f} MB")
+    if not sample.sampled:
+        print("   ⚠️  前N行不是随机样本，以下估计值仅按文件大小等比放大，不提供误差范围；使用 --sample 获得置信区间")
+
+
+def print_estimates(title, estimates, unit=''):
+    """输出分组估计值"""
+    print(f"\n📐 {title}（全量估计{'，95%置信区间' if any(hw is not None for _, hw in estimates.values()) else ''}）:")
+    for group, estimate in sorted(estimates.items(), key=lambda item: -item[1][0]):
+        print(f"   {group:<24} {format_estimate(estimate, unit)}")
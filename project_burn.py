@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+项目周度投入趋势
+在 项目×周次 数组上一次性计算所有项目的周投入人天、累计人天以及近4周、近13周滚动均值，
+滚动均值由累计和相减得到，不按项目逐个分组循环。
+周次轴按 年份+周次 连续排列，跨年数据前后相接。
+状态按记录ID持久化，新周次导入时只累加变化部分并从最早变化的周次起重算累计值
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from ingest import DAYS_COLUMN, RECORD_ID_COLUMN, YEAR_COLUMN, load_weekly_reports, ordinal_weeks, week_ordinals
+
+# 默认持久化文件和导出文件
+DEFAULT_STATE = 'project_burn.npz'
+DEFAULT_OUTPUT = '项目周度投入趋势.csv'
+
+# 滚动均值窗口（周）
+ROLLING_WINDOWS = (4, 13)
+
+
+def _burn_records(df):
+    """取出计算趋势所需的记录级字段，周次转换为连续的周序号
+
+    同一记录ID保留最后一条；缺失的记录ID为空字符串，这些记录全部保留（与 ingest.deduplicate_records 一致）
+    """
+    record_ids = df[RECORD_ID_COLUMN].astype(object)
+    records = pd.DataFrame({
+        'record_id': record_ids.where(record_ids.notna(), '').astype(str),
+        'project': df['订单项目.立项项目'].fillna('未知项目'),
+        'year': df[YEAR_COLUMN],
+        'week': pd.to_numeric(df['周次'], errors='coerce'),
+        'days': pd.to_numeric(df[DAYS_COLUMN], errors='coerce').fillna(0.0),
+    }).dropna(subset=['week'])
+    records['week'] = week_ordinals(records['year'], records['week'])
+    record_ids = records['record_id']
+    return records[(record_ids == '') | ~record_ids.duplicated(keep='last')]
+
+
+def _empty_state():
+    return {
+        'projects': np.empty(0, dtype=str),
+        'years': np.empty(0, dtype=np.int64),
+        'weeks': np.empty(0, dtype=np.int64),
+        'weekly': np.zeros((0, 0)),
+        'cumulative': np.zeros((0, 0)),
+        'record_ids': np.empty(0, dtype=str),
+        'record_project': np.empty(0, dtype=np.int32),
+        'record_week': np.empty(0, dtype=np.int64),
+        'record_days': np.empty(0),
+    }
+
+
+def update_burn(state, df):
+    """将新导入的周报合并进趋势状态
+
+    已存在的记录ID视为更正：先减去旧的投入再加上新的投入。
+    累计值只从最早发生变化的周次开始重算。
+    """
+    if state is None:
+        state = _empty_state()
+    if 'years' not in state:
+        raise ValueError("趋势状态为旧版格式（周次没有年份），请删除状态文件后重新导入周报")
+    records = _burn_records(df)
+    if records.empty:
+        return state
+
+    # 扩展项目轴：已有项目顺序不变，新项目追加在后
+    old_projects = pd.Index(state['projects'])
+    new_projects = pd.Index(records['project'].unique()).difference(old_projects).sort_values()
+    projects = old_projects.append(new_projects)
+
+    # 扩展周次轴：保持连续（周序号，记录级周次也保存为周序号）
+    new_weeks = records['week'].to_numpy(dtype=np.int64)
+    old_weeks = week_ordinals(state['years'], state['weeks'])
+    first_week = int(min(new_weeks.min(), old_weeks[0])) if len(old_weeks) else int(new_weeks.min())
+    last_week = int(max(new_weeks.max(), old_weeks[-1])) if len(old_weeks) else int(new_weeks.max())
+    years, weeks = ordinal_weeks(np.arange(first_week, last_week + 1))
+    offset = int(old_weeks[0]) - first_week if len(old_weeks) else 0
+
+    weekly = np.zeros((len(projects), len(weeks)))
+    weekly[:len(old_projects), offset:offset + len(old_weeks)] = state['weekly']
+
+    # 被更正的记录先减去旧值（没有记录ID的记录总是视为新记录）
+    known = np.flatnonzero(state['record_ids'] != '')
+    positions = pd.Index(state['record_ids'][known]).get_indexer(records['record_id'])
+    positions = np.append(known, -1)[positions]
+    replaced = positions[positions >= 0]
+    old_week_codes = state['record_week'][replaced] - first_week
+    np.subtract.at(weekly, (state['record_project'][replaced], old_week_codes), state['record_days'][replaced])
+
+    project_codes = projects.get_indexer(records['project']).astype(np.int32)
+    week_codes = new_weeks - first_week
+    days = records['days'].to_numpy(dtype=np.float64)
+    np.add.at(weekly, (project_codes, week_codes), days)
+
+    # 更新记录级数据
+    record_project = state['record_project'].copy()
+    record_week = state['record_week'].copy()
+    record_days = state['record_days'].copy()
+    is_new = positions < 0
+    record_project[replaced] = project_codes[~is_new]
+    record_week[replaced] = new_weeks[~is_new]
+    record_days[replaced] = days[~is_new]
+
+    # 从最早变化的周次开始重算累计值，旧周次之后新增的列也一并计算
+    tail = offset + len(old_weeks)
+    touched = min(int(week_codes.min()), tail)
+    if len(replaced):
+        touched = min(touched, int(old_week_codes.min()))
+    if offset:
+        touched = 0
+    cumulative = np.zeros_like(weekly)
+    cumulative[:len(old_projects), offset:tail] = state['cumulative']
+    cumulative[:, touched:] = np.cumsum(weekly[:, touched:], axis=1)
+    if touched > 0:
+        cumulative[:, touched:] += cumulative[:, touched - 1:touched]
+
+    return {
+        'projects': np.asarray(projects, dtype=str),
+        'years': years,
+        'weeks': weeks,
+        'weekly': weekly,
+        'cumulative': cumulative,
+        'record_ids': np.concatenate([state['record_ids'], records['record_id'].to_numpy(dtype=str)[is_new]]),
+        'record_project': np.concatenate([record_project, project_codes[is_new]]),
+        'record_week': np.concatenate([record_week, new_weeks[is_new]]),
+        'record_days': np.concatenate([record_days, days[is_new]]),
+    }
+
+
+def rolling_mean(cumulative, window):
+    """由累计值计算滚动均值，起始不足窗口长度的周次按已有周数平均"""
+    shifted = np.zeros_like(cumulative)
+    shifted[:, window:] = cumulative[:, :-window]
+    periods = np.minimum(np.arange(1, cumulative.shape[1] + 1), window)
+    return (cumulative - shifted) / periods
+
+
+def burn_table(state, windows=ROLLING_WINDOWS):
+    """导出紧凑的长表：只保留项目开始投入之后的周次"""
+    cumulative = state['cumulative']
+    project_idx, week_idx = np.nonzero(cumulative > 0)
+
+    table = pd.DataFrame({
+        '项目': state['projects'][project_idx],
+        '年份': state['years'][week_idx],
+        '周次': state['weeks'][week_idx],
+        '周投入人天': state['weekly'][project_idx, week_idx],
+        '累计人天': cumulative[project_idx, week_idx],
+    })
+    for window in windows:
+        table[f'近{window}周均值'] = rolling_mean(cumulative, window)[project_idx, week_idx]
+    return table.round(2)
+
+
+def save_state(state, state_path=DEFAULT_STATE):
+    """保存趋势状态"""
+    np.savez_compressed(state_path, **state)
+
+
+def load_state(state_path=DEFAULT_STATE):
+    """加载趋势状态，文件不存在时返回 None"""
+    if not os.path.exists(state_path):
+        return None
+    with np.load(state_path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def main(source=None, state_path=DEFAULT_STATE, output_file=DEFAULT_OUTPUT):
+    state = load_state(state_path)
+
+    if source:
+        state = update_burn(state, load_weekly_reports(source))
+        save_state(state, state_path)
+    elif state is None:
+        print(f"❌ 未找到 {state_path}，请先指定周报输入文件")
+        return
+
+    table = burn_table(state)
+    table.to_csv(output_file, index=False, encoding='utf-8-sig')
+    print(f"✅ 项目周度投入趋势已保存到: {output_file}（{len(table)} 行）")
+
+    # 最近一周滚动投入最高的项目
+    latest = f"{state['years'][-1]}年第{state['weeks'][-1]}周"
+    recent = rolling_mean(state['cumulative'], ROLLING_WINDOWS[0])[:, -1]
+    order = np.argsort(-recent)[:10]
+    print(f"\n📈 截至{latest}，近{ROLLING_WINDOWS[0]}周均值TOP10项目:")
+    for idx in order:
+        if recent[idx] <= 0:
+            break
+        print(f"   {state['projects'][idx]:<40} {recent[idx]:.2f}天/周  累计 {state['cumulative'][idx, -1]:.1f}天")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="项目周度投入趋势（累计与滚动均值）")
+    parser.add_argument('input', nargs='?', help="周报CSV文件、目录或通配符；省略时直接使用已保存的状态")
+    parser.add_argument('--state', default=DEFAULT_STATE, help="状态持久化文件路径")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="导出CSV文件路径")
+    args = parser.parse_args()
+    main(args.input, args.state, args.output)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+周报处理统一命令行入口
+用法: python report.py <子命令> [参数...]
+
+子命令对应的脚本只在执行时才导入，pandas等重量级依赖按需加载，
+只读取已有分析结果的子命令（如 tuning）可在几十毫秒内启动
+"""
+
+import runpy
+import sys
+
+# 子命令 -> (脚本模块, 说明)
+COMMANDS = {
+    'analyze': ('analyze_csv', '工作内容语义分析，生成逐条分析结果'),
+    'quarterly': ('generate_final_optimized_report', '生成最终优化格式的季度工时统计报告（CSV + Excel）'),
+    'table': ('generate_full_table', '生成完整工作内容对照表'),
+    'projects': ('generate_project_analysis', '生成项目分析结果 project_analysis_result.json'),
+    'dashboard': ('dashboard', '生成离线HTML工时看板'),
+    'tuning': ('check_tuning_records', '查看设备调机记录'),
+    'bugs': ('extract_requirements_bugs', '按部门提取需求和Bug修复工作'),
+    'cluster': ('work_item_clustering', '近似重复工作项聚类'),
+    'search': ('search_index', '周报内容全文检索'),
+    'utilization': ('utilization', '人员×周次工时饱和度检查'),
+    'burn': ('project_burn', '项目周度投入趋势'),
+    'anomaly': ('anomaly_detection', '周报投入异常检测（突增、新项目突击、复制粘贴）'),
+    'train': ('work_type_model', '训练工作类型统计分类器'),
+    'validate': ('validation', '周报数据质量校验'),
+    'archive': ('archive', '按年份/周次分区的周报历史归档'),
+    'compare': ('period_compare', '基于汇总快照的周期对比'),
+    'check': ('equivalence_check', '参考实现与快速路径的差异对比及性能预算检查'),
+    'profile': ('classifier_profile', '关键词分类规则的命中、决定次数和耗时分析'),
+    'vocab': ('vocabulary_mining', '从未分类记录中挖掘关键词词表候选'),
+    'watch': ('watch_reports', '监视导出目录，新周报落地后自动重建报告'),
+}
+
+
+def print_usage():
+    print("用法: python report.py <子命令> [参数...]")
+    print("      python report.py <子命令> -h   查看子命令参数\n")
+    print("子命令:")
+    for name, (module, description) in COMMANDS.items():
+        print(f"  {name:<12} {description}（{module}.py）")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    if not argv or argv[0] in ('-h', '--help'):
+        print_usage()
+        return 0
+
+    command = argv[0]
+    if command not in COMMANDS:
+        print(f"未知子命令: {command}\n")
+        print_usage()
+        return 2
+
+    # 以脚本方式运行对应模块，参数原样转交给其命令行解析
+    module, _ = COMMANDS[command]
+    sys.argv = [f"report.py {command}"] + argv[1:]
+    runpy.run_module(module, run_name='__main__')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
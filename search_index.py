@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+周报内容全文检索索引
+基于SQLite FTS5，中文按字符二元组（bigram）切分、英文数字按单词切分后写入索引，
+单个汉字的检索词直接在记录内容中查找（出现在片段末尾的字没有以它开头的二元组）；
+支持按人员、项目、周期（年份+周次，与归档的周期写法相同）和工作类型过滤；按记录ID增量更新，新周次导入时无需重建
+"""
+
+import argparse
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+from archive import parse_period
+from ingest import DEFAULT_INPUT, RECORD_ID_COLUMN, YEAR_COLUMN
+
+# 默认索引文件
+DEFAULT_INDEX = 'report_index.sqlite'
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[\u3400-\u9fff]+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    record_id TEXT UNIQUE NOT NULL,
+    person TEXT,
+    project TEXT,
+    department TEXT,
+    year INTEGER,
+    week INTEGER,
+    days REAL,
+    work_type TEXT,
+    content TEXT,
+    tokens TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_records_person ON records(person);
+CREATE INDEX IF NOT EXISTS idx_records_week ON records(year, week);
+CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+    tokens, content='records', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS records_ai AFTER INSERT ON records BEGIN
+    INSERT INTO records_fts(rowid, tokens) VALUES (new.id, new.tokens);
+END;
+CREATE TRIGGER IF NOT EXISTS records_ad AFTER DELETE ON records BEGIN
+    INSERT INTO records_fts(records_fts, rowid, tokens) VALUES ('delete', old.id, old.tokens);
+END;
+CREATE TRIGGER IF NOT EXISTS records_au AFTER UPDATE ON records BEGIN
+    INSERT INTO records_fts(records_fts, rowid, tokens) VALUES ('delete', old.id, old.tokens);
+    INSERT INTO records_fts(rowid, tokens) VALUES (new.id, new.tokens);
+END;
+"""
+
+# 只有内容或属性发生变化时才更新，未变化的记录不触发索引重写
+_UPSERT = """
+INSERT INTO records (record_id, person, project, department, year, week, days, work_type, content, tokens)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(record_id) DO UPDATE SET
+    person = excluded.person,
+    project = excluded.project,
+    department = excluded.department,
+    year = excluded.year,
+    week = excluded.week,
+    days = excluded.days,
+    work_type = excluded.work_type,
+    content = excluded.content,
+    tokens = excluded.tokens
+WHERE records.content IS NOT excluded.content
+   OR records.days IS NOT excluded.days
+   OR records.year IS NOT excluded.year
+   OR records.week IS NOT excluded.week
+   OR records.work_type IS NOT excluded.work_type
+   OR records.project IS NOT excluded.project
+   OR records.department IS NOT excluded.department
+   OR records.person IS NOT excluded.person
+"""
+
+
+def bigram_tokens(text):
+    """将文本切分为索引词：中文连续片段切为重叠的二元组，英文数字保留整词"""
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(str(text).lower()):
+        if run.isascii() or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return ' '.join(tokens)
+
+
+def build_match_query(query):
+    """将检索词转换为FTS5查询和单字列表：多个检索词之间为“与”关系
+
+    单个汉字不能用二元组前缀匹配（位于中文片段末尾时没有以它开头的二元组），
+    单独返回，由 search 在记录内容中查找
+    """
+    clauses = []
+    chars = []
+    for run in _TOKEN_PATTERN.findall(str(query).lower()):
+        if run.isascii():
+            clauses.append(f'"{run}"*')
+        elif len(run) == 1:
+            chars.append(run)
+        else:
+            clauses.append('"' + ' '.join(run[i:i + 2] for i in range(len(run) - 1)) + '"')
+    return ' AND '.join(clauses), chars
+
+
+def open_index(index_path=DEFAULT_INDEX):
+    """打开（必要时创建）索引数据库
+
+    旧版索引没有年份列，清空后按新结构重建（索引可由周报重新导入）
+    """
+    conn = sqlite3.connect(index_path)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(records)")]
+    if columns and 'year' not in columns:
+        print(f"检索索引 {index_path} 为旧版格式（周次没有年份），已清空，请重新导入周报")
+        conn.executescript("DROP TABLE IF EXISTS records_fts; DROP TABLE records;")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _none_if_na(value):
+    return None if pd.isna(value) else value
+
+
+def update_index(conn, df, work_types=None):
+    """将周报数据增量写入索引，work_types 为与 df 行对应的工作类型列表"""
+    if work_types is None:
+        work_types = [None] * len(df)
+
+    # 没有年份列的数据（如预览抽样）年份为空，按周期过滤时不会命中
+    years = df[YEAR_COLUMN] if YEAR_COLUMN in df.columns else [None] * len(df)
+
+    rows = []
+    for values, year, work_type in zip(df[[RECORD_ID_COLUMN, '周报人', '订单项目.立项项目', '订单项目.归属中心',
+                                           '周次', '订单项目.本周投入天数（最低半天）',
+                                           '订单项目.本周进度及问题反馈']].itertuples(index=False, name=None),
+                                       years, work_types):
+        record_id, person, project, dept, week, days, content = map(_none_if_na, values)
+        if record_id is None:
+            continue
+        year = _none_if_na(year)
+        rows.append((record_id, person, project, dept,
+                     None if year is None else int(year),
+                     None if week is None else int(week),
+                     None if days is None else float(days),
+                     work_type, content, bigram_tokens(content) if content else ''))
+
+    with conn:
+        changed = conn.executemany(_UPSERT, rows).rowcount
+    print(f"检索索引已更新: {len(rows)} 条记录，其中新增或变更 {changed} 条")
+    return changed
+
+
+def search(conn, query, person=None, project=None, period=None, week_range=None, work_type=None, limit=50):
+    """全文检索，可按人员、项目（包含匹配）、周期、周次范围和工作类型过滤
+
+    period 为 archive.parse_period 的周期说明（如 '2025Q3'、'2025:27-39'）或 [(年份, 起始周, 结束周), ...]；
+    week_range 为 (起始周, 结束周)，只在索引中最近的年份内过滤
+    """
+    sql = ["SELECT r.record_id, r.person, r.project, r.department, r.year, r.week, r.days, r.work_type, r.content",
+           "FROM records_fts JOIN records r ON r.id = records_fts.rowid"]
+    conditions = []
+    params = []
+
+    match, chars = build_match_query(query) if query else ('', [])
+    if match:
+        conditions.append("records_fts MATCH ?")
+        params.append(match)
+    for char in chars:
+        conditions.append("instr(r.content, ?) > 0")
+        params.append(char)
+    if person:
+        conditions.append("r.person = ?")
+        params.append(person)
+    if project:
+        conditions.append("r.project LIKE ?")
+        params.append(f"%{project}%")
+    if period:
+        ranges = parse_period(period) if isinstance(period, str) else period
+        conditions.append("(" + " OR ".join(["(r.year = ? AND r.week BETWEEN ? AND ?)"] * len(ranges)) + ")")
+        params.extend(value for year_range in ranges for value in year_range)
+    if week_range:
+        conditions.append("r.year = (SELECT MAX(year) FROM records) AND r.week BETWEEN ? AND ?")
+        params.extend(week_range)
+    if work_type:
+        conditions.append("r.work_type = ?")
+        params.append(work_type)
+
+    if not match:
+        # 没有检索词时直接查询记录表
+        sql[1] = "FROM records r"
+    if conditions:
+        sql.append("WHERE " + " AND ".join(conditions))
+    sql.append("ORDER BY r.year, r.week, r.id LIMIT ?")
+    params.append(limit)
+
+    columns = ['record_id', 'person', 'project', 'department', 'year', 'week', 'days', 'work_type', 'content']
+    return [dict(zip(columns, row)) for row in conn.execute("\n".join(sql), params)]
+
+
+def parse_week_range(text):
+    """解析周次范围，如 '14-26' 或 '20'"""
+    if not text:
+        return None
+    start, _, end = text.partition('-')
+    return int(start), int(end or start)
+
+
+def build_index(source=DEFAULT_INPUT, index_path=DEFAULT_INDEX):
+    """导入周报数据、进行工作类型分析并增量更新索引"""
+    from analyze_csv import analyze_work_content_semantic
+    from ingest import load_weekly_reports
+
+    df = load_weekly_reports(source)
+    work_types = [
+        analyze_work_content_semantic(content, person, project, days)['type']
+        for content, person, project, days in df[['订单项目.本周进度及问题反馈', '周报人', '订单项目.立项项目',
+                                                  '订单项目.本周投入天数（最低半天）']].itertuples(index=False, name=None)
+    ]
+    conn = open_index(index_path)
+    try:
+        update_index(conn, df, work_types)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="周报内容全文检索")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="导入周报并增量更新索引")
+    build_parser.add_argument('input', nargs='?', default=DEFAULT_INPUT, help="周报CSV文件、目录或通配符")
+    build_parser.add_argument('--index', default=DEFAULT_INDEX, help="索引文件路径")
+
+    query_parser = subparsers.add_parser('query', help="检索周报内容")
+    query_parser.add_argument('text', nargs='?', default='', help="检索词，多个词以空格分隔")
+    query_parser.add_argument('--person', help="周报人")
+    query_parser.add_argument('--project', help="项目名称（包含匹配）")
+    query_parser.add_argument('--period', help="周期：2025、2025Q3、2025:27-39，多个用逗号分隔")
+    query_parser.add_argument('--weeks', help="索引中最近年份的周次范围，如 14-26")
+    query_parser.add_argument('--type', dest='work_type', help="工作类型，如 equipment_tuning")
+    query_parser.add_argument('--limit', type=int, default=50, help="最多返回条数")
+    query_parser.add_argument('--index', default=DEFAULT_INDEX, help="索引文件路径")
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_index(args.input, args.index)
+        return
+
+    conn = open_index(args.index)
+    try:
+        start = time.perf_counter()
+        hits = search(conn, args.text, person=args.person, project=args.project,
+                      period=args.period, week_range=parse_week_range(args.weeks), work_type=args.work_type,
+                      limit=args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        conn.close()
+
+    print(f"找到 {len(hits)} 条记录（{elapsed:.1f} ms）")
+    for hit in hits:
+        content = str(hit['content'] or '').replace('\n', ' ')
+        if len(content) > 80:
+            content = content[:77] + "..."
+        week = f"第{hit['week']}周" if hit['year'] is None else f"{hit['year']}年第{hit['week']}周"
+        print(f"[{week}] {hit['person']} | {hit['project']} | {hit['days']}人天 | {hit['work_type']}")
+        print(f"    {content}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""测试公共设置：脚本均为仓库根目录下的模块，测试数据为与导出周报同结构的小数据表"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import CONTENT_COLUMN, DAYS_COLUMN, DEPT_COLUMN, RECORD_ID_COLUMN, YEAR_COLUMN  # noqa: E402
+
+# 未指定的字段取默认值
+_DEFAULTS = {
+    'person': '张超',
+    'week': 1,
+    'project': '项目A',
+    'dept': 'T1',
+    'days': 1.0,
+    'content': '开发接口',
+    'year': 2025,
+}
+
+
+def _weekly_reports(records):
+    """由字段字典列表生成周报数据表；record_id 未指定时按行号生成，显式传 None 表示缺失"""
+    rows = []
+    for i, record in enumerate(records):
+        values = {**_DEFAULTS, **record}
+        rows.append({
+            '数据标题(不可修改)': f"周报-{i}",
+            '周报人': values['person'],
+            '周次': values['week'],
+            RECORD_ID_COLUMN: values.get('record_id', f"R{i}"),
+            '订单项目.立项项目': values['project'],
+            DEPT_COLUMN: values['dept'],
+            DAYS_COLUMN: values['days'],
+            CONTENT_COLUMN: values['content'],
+            YEAR_COLUMN: values['year'],
+        })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def weekly_reports():
+    return _weekly_reports
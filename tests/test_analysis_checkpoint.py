@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+import analysis_checkpoint
+import analyze_csv
+from analysis_checkpoint import MANIFEST, AnalysisCheckpoint, input_fingerprint
+from analyze_csv import analyze_all_records
+
+_CONTENTS = ['开发报表导出功能', '修复登录页面的bug', '现场调试设备参数', '学习深度学习框架', '部署数据库环境']
+
+
+@pytest.fixture
+def reports(weekly_reports):
+    return weekly_reports([{'week': i % 5 + 1, 'content': _CONTENTS[i % len(_CONTENTS)]} for i in range(25)])
+
+
+def _types(analyses):
+    return [(analysis['record_id'], analysis['analysis']['type']) for analysis in analyses]
+
+
+def test_resume_after_interrupt_matches_full_run(tmp_path, monkeypatch, reports):
+    directory = str(tmp_path / 'checkpoint')
+    fingerprint = input_fingerprint(reports)
+    expected, _ = analyze_all_records(reports)
+
+    # 第2块写入前中断
+    save_chunk = AnalysisCheckpoint.save_chunk
+    saved = []
+
+    def interrupting_save(self, start, analyses):
+        if saved:
+            raise KeyboardInterrupt
+        saved.append(start)
+        save_chunk(self, start, analyses)
+
+    monkeypatch.setattr(AnalysisCheckpoint, 'save_chunk', interrupting_save)
+    checkpoint = AnalysisCheckpoint.start(fingerprint, len(reports), 10, directory)
+    with pytest.raises(KeyboardInterrupt):
+        analyze_all_records(reports, checkpoint=checkpoint)
+    monkeypatch.setattr(AnalysisCheckpoint, 'save_chunk', save_chunk)
+    assert checkpoint.completed_chunks() == [0]
+
+    # 续跑只重新分析未完成的块
+    analyzed = []
+    analyze_rows = analyze_csv._analyze_rows
+
+    def counting_analyze(df, model, start, stop):
+        analyzed.append(start)
+        return analyze_rows(df, model, start, stop)
+
+    monkeypatch.setattr(analyze_csv, '_analyze_rows', counting_analyze)
+    checkpoint = AnalysisCheckpoint.start(fingerprint, len(reports), 10, directory, resume=True)
+    resumed, _ = analyze_all_records(reports, checkpoint=checkpoint)
+
+    assert analyzed == [10, 20]
+    assert _types(resumed) == _types(expected)
+    assert checkpoint.completed_chunks() == [0, 10, 20]
+
+
+def test_resume_refuses_changed_input(tmp_path, reports):
+    directory = str(tmp_path / 'checkpoint')
+    AnalysisCheckpoint.start(input_fingerprint(reports), len(reports), 10, directory)
+
+    changed = reports.copy()
+    changed.loc[3, '订单项目.本周进度及问题反馈'] = '完全不同的内容'
+    with pytest.raises(ValueError):
+        AnalysisCheckpoint.start(input_fingerprint(changed), len(changed), 10, directory, resume=True)
+
+
+def test_start_without_resume_discards_old_chunks(tmp_path, reports):
+    directory = str(tmp_path / 'checkpoint')
+    checkpoint = AnalysisCheckpoint.start('old', len(reports), 10, directory)
+    checkpoint.save_chunk(0, [])
+
+    checkpoint = AnalysisCheckpoint.start('new', len(reports), 10, directory)
+    assert checkpoint.completed_chunks() == []
+    assert sorted(os.listdir(directory)) == [MANIFEST]
+
+
+@pytest.mark.parametrize('column, value', [
+    ('订单项目.本周进度及问题反馈', '完全不同的内容'),
+    ('订单项目.记录ID(不可修改)', 'R-更正'),
+    ('订单项目.归属中心', 'T2'),
+])
+def test_fingerprint_covers_analyzed_and_stored_columns(reports, column, value):
+    changed = reports.copy()
+    changed.loc[3, column] = value
+    assert input_fingerprint(changed) != input_fingerprint(reports)
+
+
+def test_fingerprint_covers_rules_source(tmp_path, monkeypatch, reports):
+    rules = tmp_path / 'analyze_csv.py'
+    rules.write_text('# 规则 v1\n', encoding='utf-8')
+    monkeypatch.setattr(analysis_checkpoint, 'CLASSIFIER_SOURCE', str(rules))
+    before = input_fingerprint(reports)
+
+    rules.write_text('# 规则 v2\n', encoding='utf-8')
+    assert input_fingerprint(reports) != before
+
+
+def test_fingerprint_ignores_unused_columns(reports):
+    changed = reports.copy()
+    changed['数据标题(不可修改)'] = '其他标题'
+    assert input_fingerprint(changed) == input_fingerprint(reports)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from archive import append_to_archive, list_partitions, load_archive, parse_period  # noqa: E402
+from ingest import DAYS_COLUMN, RECORD_ID_COLUMN, YEAR_COLUMN  # noqa: E402
+
+
+def _records(directory, **filters):
+    df = load_archive(directory=str(directory), **filters)
+    return df.set_index(RECORD_ID_COLUMN)
+
+
+def test_reimport_with_changed_week_moves_record(tmp_path, weekly_reports):
+    archive_dir = tmp_path / 'archive'
+    append_to_archive(weekly_reports([
+        {'record_id': 'A', 'week': 1},
+        {'record_id': 'B', 'week': 1},
+        {'record_id': 'C', 'week': 2},
+    ]), str(archive_dir))
+
+    # 记录A改到第3周并修改了人天，重新导入
+    append_to_archive(weekly_reports([{'record_id': 'A', 'week': 3, 'days': 2.0}]), str(archive_dir))
+
+    records = _records(archive_dir)
+    assert sorted(records.index) == ['A', 'B', 'C']
+    assert records.loc['A', '周次'] == 3
+    assert records.loc['A', DAYS_COLUMN] == 2.0
+    partitions = list_partitions(str(archive_dir))
+    assert partitions[['week', 'records']].values.tolist() == [[1, 1], [2, 1], [3, 1]]
+
+
+def test_partition_emptied_by_move_is_removed(tmp_path, weekly_reports):
+    archive_dir = tmp_path / 'archive'
+    append_to_archive(weekly_reports([{'record_id': 'A', 'week': 1}]), str(archive_dir))
+    append_to_archive(weekly_reports([{'record_id': 'A', 'week': 2}]), str(archive_dir))
+
+    assert not os.path.exists(archive_dir / 'year=2025' / 'week=1')
+    assert list_partitions(str(archive_dir))['week'].tolist() == [2]
+
+
+def test_reimport_same_week_keeps_latest(tmp_path, weekly_reports):
+    archive_dir = tmp_path / 'archive'
+    append_to_archive(weekly_reports([{'record_id': 'A', 'content': '旧内容'}]), str(archive_dir))
+    append_to_archive(weekly_reports([{'record_id': 'A', 'content': '新内容'}]), str(archive_dir))
+
+    records = _records(archive_dir)
+    assert len(records) == 1
+    assert records.loc['A', '订单项目.本周进度及问题反馈'] == '新内容'
+
+
+def test_department_filter_includes_merged_departments(tmp_path, weekly_reports):
+    archive_dir = tmp_path / 'archive'
+    append_to_archive(weekly_reports([
+        {'record_id': 'A', 'dept': 'T1'},
+        {'record_id': 'B', 'dept': 'T1电子元件'},
+        {'record_id': 'C', 'dept': 'T2'},
+    ]), str(archive_dir))
+
+    assert sorted(_records(archive_dir, departments=['T1']).index) == ['A', 'B']
+
+
+def test_years_are_kept_apart(tmp_path, weekly_reports):
+    archive_dir = tmp_path / 'archive'
+    append_to_archive(weekly_reports([
+        {'record_id': 'A', 'year': 2024, 'week': 30},
+        {'record_id': 'B', 'year': 2025, 'week': 30},
+    ]), str(archive_dir))
+
+    records = _records(archive_dir)
+    assert records[YEAR_COLUMN].to_dict() == {'A': 2024, 'B': 2025}
+    assert _records(archive_dir, period='2024Q3').index.tolist() == ['A']
+    assert _records(archive_dir, period='2025:30').index.tolist() == ['B']
+
+
+def test_parse_period():
+    assert parse_period('2025') == [(2025, 1, 53)]
+    assert parse_period('2025Q3, 2024:27-30') == [(2025, 27, 39), (2024, 27, 30)]
+    with pytest.raises(ValueError):
+        parse_period('Q3')
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from equivalence_check import diff_outputs, load_frames
+from generate_final_optimized_report import generate_final_optimized_report, process_raw_data_to_quarterly
+from ingest import YEAR_COLUMN
+
+
+@pytest.fixture
+def frames(tmp_path, weekly_reports):
+    # 人员、项目、部门交叉分布：分类列分组若不限于出现过的组合，会多出大量零人天的行
+    records = [
+        {'person': person, 'project': project, 'dept': dept, 'week': week, 'days': days}
+        for person, project, dept, week, days in [
+            ('张超', 'P1', 'T1', 1, 1.0),
+            ('张超', 'P1', 'T1电子元件', 2, 0.5),
+            ('苏岚', 'P2', 'T2', 14, 2.0),
+            ('苏岚', 'P1', 'T1', 15, 1.5),
+            ('刘秀', 'P3', 'T4', 30, 3.0),
+            ('刘秀', 'P2', 'T2', 40, 1.0),
+        ]
+    ]
+    path = tmp_path / '2025年1-6.csv'
+    weekly_reports(records).drop(columns=[YEAR_COLUMN]).to_csv(path, index=False, encoding='utf-8-sig')
+    return load_frames(str(path), ['default', 'lean'])
+
+
+def test_lean_quarterly_rows_match_default(frames):
+    reference = process_raw_data_to_quarterly(frames['default'])
+    lean = process_raw_data_to_quarterly(frames['lean'])
+
+    assert len(reference) == 5
+    assert diff_outputs(reference, lean) == []
+    # T1电子元件 合并到 T1
+    assert sorted(set(lean['订单项目.归属中心'].astype(str))) == ['T1', 'T2', 'T4']
+
+
+def test_lean_final_report_matches_default(frames):
+    reference = generate_final_optimized_report(process_raw_data_to_quarterly(frames['default']))
+    lean = generate_final_optimized_report(process_raw_data_to_quarterly(frames['lean']))
+    assert diff_outputs(reference, lean) == []
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from project_burn import burn_table, load_state, rolling_mean, save_state, update_burn
+
+
+def _by_project(state):
+    """按项目名排列后再比较：增量导入时新项目追加在项目轴末尾，记录全部更正到其他项目的项目保留为全零行"""
+    invested = np.flatnonzero(np.abs(state['weekly']).max(axis=1, initial=0.0) > 1e-9)
+    order = invested[np.argsort(state['projects'][invested], kind='stable')]
+    return {
+        'projects': state['projects'][order].tolist(),
+        'weeks': list(zip(state['years'].tolist(), state['weeks'].tolist())),
+        'weekly': state['weekly'][order],
+        'cumulative': state['cumulative'][order],
+    }
+
+
+def test_weekly_and_cumulative_days(weekly_reports):
+    state = update_burn(None, weekly_reports([
+        {'project': 'P1', 'week': 1, 'days': 1.0},
+        {'project': 'P1', 'week': 1, 'days': 2.0},
+        {'project': 'P1', 'week': 3, 'days': 1.0},
+        {'project': 'P2', 'week': 2, 'days': 4.0},
+    ]))
+    assert state['projects'].tolist() == ['P1', 'P2']
+    assert state['weeks'].tolist() == [1, 2, 3]
+    assert state['weekly'].tolist() == [[3.0, 0.0, 1.0], [0.0, 4.0, 0.0]]
+    assert state['cumulative'].tolist() == [[3.0, 3.0, 4.0], [0.0, 4.0, 4.0]]
+
+
+def test_rolling_mean_uses_available_weeks_at_start():
+    cumulative = np.array([[2.0, 6.0, 6.0, 10.0]])
+    assert rolling_mean(cumulative, 2).tolist() == [[2.0, 3.0, 2.0, 2.0]]
+
+
+@pytest.mark.parametrize('batches', [
+    # 更正记录A的人天，第二批新增项目P2
+    [[('A', 'P1', 1, 1.0), ('B', 'P1', 2, 2.0)],
+     [('A', 'P1', 1, 3.0), ('C', 'P2', 3, 1.0)]],
+    # 更正记录把周次移到已有周次轴之前，且改变了项目
+    [[('A', 'P1', 5, 1.0), ('B', 'P2', 6, 2.0)],
+     [('B', 'P1', 2, 2.5)],
+     [('D', 'P3', 8, 1.0), ('A', 'P1', 7, 0.5)]],
+])
+def test_incremental_update_matches_full_rebuild(weekly_reports, batches):
+    frames = [weekly_reports([{'record_id': record_id, 'project': project, 'week': week, 'days': days}
+                              for record_id, project, week, days in batch]) for batch in batches]
+
+    state = None
+    for frame in frames:
+        state = update_burn(state, frame)
+    full = update_burn(None, pd.concat(frames, ignore_index=True))
+
+    incremental, expected = _by_project(state), _by_project(full)
+    assert incremental['projects'] == expected['projects']
+    assert incremental['weeks'] == expected['weeks']
+    np.testing.assert_allclose(incremental['weekly'], expected['weekly'])
+    np.testing.assert_allclose(incremental['cumulative'], expected['cumulative'])
+
+
+def test_rows_without_record_id_are_always_added(weekly_reports):
+    state = update_burn(None, weekly_reports([{'record_id': None, 'days': 1.0}, {'record_id': None, 'days': 2.0}]))
+    state = update_burn(state, weekly_reports([{'record_id': None, 'days': 0.5}]))
+    assert state['weekly'].tolist() == [[3.5]]
+
+
+def test_week_axis_continues_across_years(weekly_reports):
+    state = update_burn(None, weekly_reports([{'record_id': 'A', 'year': 2024, 'week': 52, 'days': 1.0}]))
+    state = update_burn(state, weekly_reports([{'record_id': 'B', 'year': 2025, 'week': 2, 'days': 1.0}]))
+    assert list(zip(state['years'].tolist(), state['weeks'].tolist())) == [(2024, 52), (2025, 1), (2025, 2)]
+    assert state['cumulative'].tolist() == [[1.0, 1.0, 2.0]]
+
+
+def test_burn_table_starts_at_first_investment(weekly_reports):
+    state = update_burn(None, weekly_reports([
+        {'project': 'P1', 'week': 1, 'days': 2.0},
+        {'project': 'P2', 'week': 3, 'days': 1.0},
+    ]))
+    table = burn_table(state)
+    assert table[['项目', '周次', '累计人天']].values.tolist() == [
+        ['P1', 1, 2.0], ['P1', 2, 2.0], ['P1', 3, 2.0], ['P2', 3, 1.0]]
+    assert table['近4周均值'].tolist() == [2.0, 1.0, 0.67, 0.33]
+
+
+def test_state_round_trip_and_old_format(tmp_path, weekly_reports):
+    path = str(tmp_path / 'burn.npz')
+    assert load_state(path) is None
+
+    state = update_burn(None, weekly_reports([{'week': 2}, {'week': 4, 'project': 'P2'}]))
+    save_state(state, path)
+    loaded = load_state(path)
+    assert all(np.array_equal(loaded[key], state[key]) for key in state)
+
+    del loaded['years']
+    with pytest.raises(ValueError):
+        update_burn(loaded, weekly_reports([{}]))
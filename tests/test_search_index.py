@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from search_index import bigram_tokens, build_match_query, open_index, search, update_index
+
+
+@pytest.fixture
+def conn():
+    conn = open_index(':memory:')
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def reports(weekly_reports):
+    return weekly_reports([
+        {'record_id': 'A', 'person': '张超', 'week': 1, 'content': '现场调试贴片机'},
+        {'record_id': 'B', 'person': '苏岚', 'week': 2, 'content': '机器人通讯调试'},
+        {'record_id': 'C', 'person': '张超', 'week': 3, 'content': '修复登录页面的bug'},
+        {'record_id': 'D', 'person': '苏岚', 'week': 4, 'content': '登录的页面样式调整'},
+        {'record_id': 'E', 'person': '刘秀', 'week': 5, 'content': '编写接口文档'},
+    ])
+
+
+def _ids(hits):
+    return [hit['record_id'] for hit in hits]
+
+
+def test_bigram_tokens():
+    assert bigram_tokens('修复登录Bug 2次') == '修复 复登 登录 bug 2 次'
+
+
+def test_build_match_query_separates_single_characters():
+    assert build_match_query('登录页面 bug 机') == ('"登录 录页 页面" AND "bug"*', ['机'])
+
+
+def test_single_character_matches_anywhere_in_run(conn, reports):
+    update_index(conn, reports)
+    # “机”在A中位于中文片段末尾，没有以它开头的二元组
+    assert _ids(search(conn, '机')) == ['A', 'B']
+
+
+def test_phrase_requires_adjacent_characters(conn, reports):
+    update_index(conn, reports)
+    assert _ids(search(conn, '登录页面')) == ['C']
+    assert _ids(search(conn, '登录 页面')) == ['C', 'D']
+
+
+def test_ascii_prefix_and_filters(conn, reports):
+    update_index(conn, reports)
+    assert _ids(search(conn, 'bu')) == ['C']
+    assert _ids(search(conn, '调试', person='苏岚')) == ['B']
+    assert _ids(search(conn, '调试', week_range=(1, 1))) == ['A']
+    assert _ids(search(conn, '', person='张超')) == ['A', 'C']
+
+
+def test_incremental_update_rewrites_only_changed_records(conn, reports):
+    assert update_index(conn, reports) == len(reports)
+    assert update_index(conn, reports) == 0
+
+    changed = reports.copy()
+    changed.loc[changed['订单项目.记录ID(不可修改)'] == 'E', '订单项目.本周进度及问题反馈'] = '优化检测算法'
+    assert update_index(conn, changed) == 1
+    assert _ids(search(conn, '检测算法')) == ['E']
+    assert search(conn, '接口文档') == []
+
+
+def test_records_without_id_are_skipped(conn, weekly_reports):
+    update_index(conn, weekly_reports([{'record_id': None, 'content': '现场调试'}, {'content': '现场调试'}]))
+    assert len(search(conn, '调试')) == 1
+
+
+def test_period_filter_separates_years(conn, weekly_reports):
+    update_index(conn, weekly_reports([
+        {'record_id': 'A', 'year': 2024, 'week': 30, 'content': '现场调试'},
+        {'record_id': 'B', 'year': 2025, 'week': 30, 'content': '现场调试'},
+        {'record_id': 'C', 'year': 2025, 'week': 10, 'content': '现场调试'},
+    ]))
+    assert _ids(search(conn, '调试', period='2024Q3')) == ['A']
+    assert _ids(search(conn, '调试', period=[(2025, 27, 39), (2024, 1, 13)])) == ['B']
+    assert _ids(search(conn, '', period='2024,2025:1-13')) == ['A', 'C']
+    # 不带年份的周次范围只取索引中最近的年份
+    assert _ids(search(conn, '调试', week_range=(27, 39))) == ['B']
+    assert [hit['year'] for hit in search(conn, '调试')] == [2024, 2025, 2025]
+
+
+def test_old_index_without_year_is_rebuilt(tmp_path, weekly_reports):
+    import sqlite3
+
+    path = str(tmp_path / 'index.sqlite')
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE records (id INTEGER PRIMARY KEY, record_id TEXT UNIQUE NOT NULL, week INTEGER)")
+    old.execute("INSERT INTO records (record_id, week) VALUES ('A', 1)")
+    old.commit()
+    old.close()
+
+    conn = open_index(path)
+    try:
+        assert search(conn, '') == []
+        update_index(conn, weekly_reports([{'record_id': 'A', 'content': '现场调试'}]))
+        assert [(hit['year'], hit['week']) for hit in search(conn, '调试')] == [(2025, 1)]
+    finally:
+        conn.close()
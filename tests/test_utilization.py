@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from utilization import check_utilization, load_state, project_breakdown, save_state, update_state
+
+
+def _cell(state, person, week):
+    row = list(state['persons']).index(person)
+    return state['days'][row, list(state['weeks']).index(week)]
+
+
+def test_matrix_and_checks(weekly_reports):
+    state = update_state(None, weekly_reports([
+        {'person': '张超', 'week': 1, 'days': 3.0, 'project': 'P1'},
+        {'person': '张超', 'week': 1, 'days': 3.0, 'project': 'P2'},
+        {'person': '张超', 'week': 3, 'days': 2.0},
+        {'person': '苏岚', 'week': 2, 'days': 5.0},
+    ]))
+
+    assert state['persons'].tolist() == ['张超', '苏岚']
+    assert state['weeks'].tolist() == [1, 2, 3]
+    assert state['days'].tolist() == [[6.0, 0.0, 2.0], [0.0, 5.0, 0.0]]
+    assert state['counts'].tolist() == [[2, 0, 1], [0, 1, 0]]
+
+    checks = check_utilization(state)
+    assert checks['over'].tolist() == [[True, False, False], [False, False, False]]
+    assert checks['under'].tolist() == [[False, False, True], [False, False, False]]
+    # 漏报只统计首次与最后一次填报之间的周次
+    assert checks['missing'].tolist() == [[False, True, False], [False, False, False]]
+
+
+def test_incremental_update_matches_full_rebuild(weekly_reports):
+    first = weekly_reports([
+        {'record_id': 'A', 'person': '张超', 'week': 1, 'days': 2.0},
+        {'record_id': 'B', 'person': '苏岚', 'week': 2, 'days': 5.0},
+    ])
+    # 第二批更正记录A（改到第2周、人天改变）并新增第3周
+    second = weekly_reports([
+        {'record_id': 'A', 'person': '张超', 'week': 2, 'days': 3.0},
+        {'record_id': 'C', 'person': '张超', 'week': 3, 'days': 5.0, 'project': 'P2'},
+    ])
+
+    incremental = update_state(update_state(None, first), second)
+    full = update_state(None, pd.concat([first, second], ignore_index=True))
+
+    for key in ('persons', 'years', 'weeks', 'days', 'counts', 'projects'):
+        assert np.array_equal(incremental[key], full[key]), key
+    # 第1周已没有记录，周次轴从第2周开始
+    assert incremental['weeks'].tolist() == [2, 3]
+    assert _cell(incremental, '张超', 2) == 3.0
+    assert len(incremental['record_ids']) == 3
+
+
+def test_rows_without_record_id_are_all_kept(weekly_reports):
+    state = update_state(None, weekly_reports([
+        {'record_id': None, 'days': 1.0},
+        {'record_id': None, 'days': 2.0},
+        {'record_id': 'A', 'days': 1.0},
+        {'record_id': 'A', 'days': 4.0},
+    ]))
+    assert state['days'].tolist() == [[7.0]]
+    assert state['counts'].tolist() == [[3]]
+
+
+def test_week_axis_continues_across_years(weekly_reports):
+    state = update_state(None, weekly_reports([
+        {'year': 2024, 'week': 52},
+        {'year': 2025, 'week': 1},
+    ]))
+    # 2024年按ISO周历共52周，两周相邻，不视为漏报
+    assert list(zip(state['years'], state['weeks'])) == [(2024, 52), (2025, 1)]
+    assert not check_utilization(state)['missing'].any()
+
+
+def test_project_breakdown(weekly_reports):
+    state = update_state(None, weekly_reports([
+        {'project': 'P1', 'days': 1.0},
+        {'project': 'P1', 'days': 2.0},
+        {'project': 'P2', 'days': 2.0},
+    ]))
+    person, week, project, totals = project_breakdown(state)
+    assert state['projects'][project].tolist() == ['P1', 'P2']
+    assert totals.tolist() == [3.0, 2.0]
+
+
+def test_state_round_trip(tmp_path, weekly_reports):
+    path = str(tmp_path / 'matrix.npz')
+    assert load_state(path) is None
+
+    state = update_state(None, weekly_reports([{'week': 2}, {'week': 4, 'person': '苏岚'}]))
+    save_state(state, path)
+    loaded = load_state(path)
+    assert loaded.keys() == state.keys()
+    assert all(np.array_equal(loaded[key], state[key]) for key in state)
+
+
+def test_old_state_without_years_is_rejected(weekly_reports):
+    state = update_state(None, weekly_reports([{}]))
+    del state['years']
+    with pytest.raises(ValueError):
+        update_state(state, weekly_reports([{}]))
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from validation import rule_masks, validate_frame
+
+
+def test_duplicate_records_need_a_record_id(weekly_reports):
+    df = weekly_reports([
+        {'record_id': 'A'},
+        {'record_id': 'A'},
+        {'record_id': None},
+        {'record_id': None},
+    ])
+    assert rule_masks(df)['DUPLICATE_RECORD'].tolist() == [False, True, False, False]
+
+
+def test_duplicates_are_judged_within_one_source(weekly_reports):
+    df = weekly_reports([{'record_id': 'A'}, {'record_id': 'A'}])
+    assert not rule_masks(df, ['a.csv', 'b.csv'])['DUPLICATE_RECORD'].any()
+
+
+def test_validate_frame_keeps_rows_without_record_id(weekly_reports):
+    df = weekly_reports([
+        {'record_id': None, 'days': 1.0},
+        {'record_id': None, 'days': 1.0},
+        {'record_id': 'B', 'days': 0.3},
+    ])
+    valid, quarantine, summary = validate_frame(df)
+    assert len(valid) == 2
+    assert len(quarantine) == 1
+    assert summary.get('DUPLICATE_RECORD', 0) == 0
+    assert summary['DAYS_NOT_HALF_DAY'] == 1
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+import work_item_clustering
+from work_item_clustering import (char_shingles, cluster_work_items, lsh_groups, minhash_signatures, normalize_item,
+                                  work_items_from_records)
+
+
+def test_normalize_item_strips_numbering_punctuation_and_fillers():
+    assert normalize_item('1、继续 开发，报表导出功能。') == '开发报表导出功能'
+    assert normalize_item('Fix  Bug!') == 'fixbug'
+
+
+def test_char_shingles():
+    assert char_shingles('开发接口') == {'开发', '发接', '接口'}
+    assert char_shingles('开') == {'开'}
+    assert char_shingles('') == set()
+
+
+def test_minhash_estimates_jaccard_similarity():
+    left = {f"a{i}" for i in range(100)}
+    right = {f"a{i}" for i in range(50, 150)}  # Jaccard = 50/150
+    signatures = minhash_signatures([left, right, set(left)])
+
+    assert (signatures[0] == signatures[2]).all()
+    assert abs((signatures[0] == signatures[1]).mean() - 1 / 3) < 0.15
+
+
+def test_minhash_signatures_do_not_depend_on_batch_size(monkeypatch):
+    sets = [char_shingles(text) for text in ['开发接口', '调试设备参数', '修复登录bug', '编写文档', '部署环境']]
+    expected = minhash_signatures(sets)
+    monkeypatch.setattr(work_item_clustering, 'SIGNATURE_BATCH', 2)
+    assert np.array_equal(minhash_signatures(sets), expected)
+
+
+def test_lsh_groups_near_duplicates_only():
+    texts = ['开发报表导出功能模块', '开发报表导出功能', '修复登录页面的异常', '开发报表导出的功能模块']
+    labels = lsh_groups(minhash_signatures([char_shingles(text) for text in texts]))
+    assert labels[0] == labels[1] == labels[3]
+    assert labels[2] != labels[0]
+
+
+def test_cluster_work_items_aggregates_days_weeks_and_people():
+    items = [
+        {'content': '1、开发报表导出功能', 'days': 1.0, 'week': 3, 'person': '张超'},
+        {'content': '修复登录页面的bug', 'days': 0.5, 'week': 4, 'person': '苏岚'},
+        {'content': '继续开发报表导出功能；', 'days': 2.0, 'week': 5, 'person': '苏岚'},
+        {'content': '开发报表导出功能', 'days': float('nan'), 'week': 1, 'person': '张超'},
+        {'content': '，。', 'days': 0.5, 'week': 2},
+    ]
+    clusters = cluster_work_items(items)
+
+    assert len(clusters) == 3
+    top = clusters[0]
+    assert top['representative'] == '1、开发报表导出功能'
+    assert top['item_count'] == 3
+    assert top['total_days'] == 3.0
+    assert (top['first_week'], top['last_week']) == (1, 5)
+    assert top['people'] == ['张超', '苏岚']
+    # 规范化后为空的工作项单独成类
+    assert [cluster['representative'] for cluster in clusters[1:]] == ['修复登录页面的bug', '，。']
+
+
+def test_work_items_from_records_share_days_between_items():
+    records = [
+        {'content': 'a；b', 'days': 1.0, 'week': 1, 'person': '张超', 'project': 'P'},
+        {'content': '', 'days': 1.0, 'week': 1, 'person': '张超', 'project': 'P'},
+    ]
+    items = work_items_from_records(records, lambda content: [part for part in content.split('；') if part])
+    assert [(item['content'], item['days']) for item in items] == [('a', 0.5), ('b', 0.5)]
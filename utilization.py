@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人员 × 周次 工时饱和度矩阵
+一次遍历导入数据构建稠密的 人员×周次 投入天数矩阵和填报次数矩阵，
+项目维度以坐标（COO）形式按记录保存；超负荷、填报不足、漏报周报等检查均为矩阵上的向量化运算。
+周次轴按 年份+周次 连续排列，跨年数据不会把不同年份的同一周次合并。
+矩阵持久化到文件，新周次导入时按记录ID替换后重建，检查可立即运行
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from ingest import DAYS_COLUMN, RECORD_ID_COLUMN, YEAR_COLUMN, load_weekly_reports, ordinal_weeks, week_ordinals
+
+# 默认持久化文件
+DEFAULT_STATE = 'utilization_matrix.npz'
+
+# 每周标准投入天数
+WEEKLY_CAPACITY = 5.0
+
+
+def _records_from_frame(df):
+    """从周报数据中取出构建矩阵所需的记录级字段，缺失的记录ID为空字符串"""
+    record_ids = df[RECORD_ID_COLUMN].astype(object)
+    records = pd.DataFrame({
+        'record_id': record_ids.where(record_ids.notna(), '').astype(str),
+        'person': df['周报人'],
+        'year': df[YEAR_COLUMN],
+        'week': pd.to_numeric(df['周次'], errors='coerce'),
+        'project': df['订单项目.立项项目'].fillna('未知项目'),
+        'days': pd.to_numeric(df[DAYS_COLUMN], errors='coerce').fillna(0.0),
+    })
+    return records.dropna(subset=['person', 'week'])
+
+
+def _deduplicate(records):
+    """同一记录ID保留最后一条；没有记录ID的记录全部保留（与 ingest.deduplicate_records 一致）"""
+    record_ids = records['record_id']
+    return records[(record_ids == '') | ~record_ids.duplicated(keep='last')]
+
+
+def build_state(records):
+    """由记录级数据构建矩阵状态（一次 bincount 完成聚合）"""
+    person_codes, persons = pd.factorize(records['person'], sort=True)
+    project_codes, projects = pd.factorize(records['project'], sort=True)
+    weeks_raw = week_ordinals(records['year'], records['week'])
+
+    if len(records):
+        first_week, last_week = int(weeks_raw.min()), int(weeks_raw.max())
+    else:
+        first_week, last_week = 1, 0
+    # 周次轴为连续的周序号，另存各列对应的年份和周次
+    years, weeks = ordinal_weeks(np.arange(first_week, last_week + 1))
+    week_codes = weeks_raw - first_week
+
+    shape = (len(persons), len(weeks))
+    flat = person_codes * shape[1] + week_codes
+    size = shape[0] * shape[1]
+    days = records['days'].to_numpy(dtype=np.float64)
+
+    return {
+        'persons': np.asarray(persons, dtype=str),
+        'years': years,
+        'weeks': weeks,
+        'projects': np.asarray(projects, dtype=str),
+        'days': np.bincount(flat, weights=days, minlength=size).reshape(shape),
+        'counts': np.bincount(flat, minlength=size).reshape(shape),
+        # 记录级坐标：人员、周次、项目三维的稀疏表示
+        'record_ids': records['record_id'].to_numpy(dtype=str),
+        'record_person': person_codes.astype(np.int32),
+        'record_week': week_codes.astype(np.int32),
+        'record_project': project_codes.astype(np.int32),
+        'record_days': days,
+    }
+
+
+def _state_records(state):
+    """将持久化状态还原为记录级数据，人员和项目由编码直接构成分类列，不逐条复制字符串"""
+    if 'years' not in state:
+        raise ValueError("饱和度矩阵为旧版格式（周次没有年份），请删除状态文件后重新导入周报")
+    return pd.DataFrame({
+        'record_id': state['record_ids'],
+        'person': pd.Categorical.from_codes(state['record_person'], state['persons']),
+        'year': state['years'][state['record_week']],
+        'week': state['weeks'][state['record_week']],
+        'project': pd.Categorical.from_codes(state['record_project'], state['projects']),
+        'days': state['record_days'],
+    })
+
+
+def update_state(state, df):
+    """将新导入的周报合并进已有状态，同一记录ID以新数据为准"""
+    new_records = _records_from_frame(df)
+    if state is None:
+        return build_state(_deduplicate(new_records))
+
+    combined = pd.concat([_state_records(state), new_records], ignore_index=True)
+    return build_state(_deduplicate(combined))
+
+
+def save_state(state, state_path=DEFAULT_STATE):
+    """保存矩阵状态"""
+    np.savez_compressed(state_path, **state)
+
+
+def load_state(state_path=DEFAULT_STATE):
+    """加载矩阵状态，文件不存在时返回 None"""
+    if not os.path.exists(state_path):
+        return None
+    with np.load(state_path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def project_breakdown(state):
+    """按 人员×周次×项目 聚合的稀疏数据（坐标形式）"""
+    shape = (len(state['persons']), len(state['weeks']), len(state['projects']))
+    flat = np.ravel_multi_index((state['record_person'], state['record_week'], state['record_project']), shape)
+    keys, inverse = np.unique(flat, return_inverse=True)
+    totals = np.bincount(inverse, weights=state['record_days'])
+    person, week, project = np.unravel_index(keys, shape)
+    return person, week, project, totals
+
+
+def check_utilization(state, capacity=WEEKLY_CAPACITY):
+    """向量化检查：超负荷、填报不足和漏报周报
+
+    漏报只统计该人员首次与最后一次填报之间缺少记录的周次。
+    """
+    days = state['days']
+    counts = state['counts']
+    reported = counts > 0
+
+    over = reported & (days > capacity)
+    under = reported & (days < capacity)
+
+    week_idx = np.arange(days.shape[1])
+    has_report = reported.any(axis=1)
+    first = np.where(has_report, reported.argmax(axis=1), days.shape[1])
+    last = np.where(has_report, days.shape[1] - 1 - reported[:, ::-1].argmax(axis=1), -1)
+    active = (week_idx >= first[:, None]) & (week_idx <= last[:, None])
+    missing = active & ~reported
+
+    return {'over': over, 'under': under, 'missing': missing}
+
+
+def _week_label(state, week_idx):
+    return f"{state['years'][week_idx]}年第{state['weeks'][week_idx]}周"
+
+
+def _print_cells(state, mask, label, show_days=True):
+    persons, days = state['persons'], state['days']
+    rows, cols = np.nonzero(mask)
+    print(f"\n【{label}】共 {len(rows)} 处")
+    for person, week_idx in zip(rows, cols):
+        if show_days:
+            print(f"   {persons[person]:<8} {_week_label(state, week_idx)}: {days[person, week_idx]:.1f} 天")
+        else:
+            print(f"   {persons[person]:<8} {_week_label(state, week_idx)}")
+
+
+def print_utilization_report(state, capacity=WEEKLY_CAPACITY):
+    """打印饱和度检查结果"""
+    checks = check_utilization(state, capacity)
+    days = state['days']
+
+    print(f"人员数: {len(state['persons'])}，周次: {_week_label(state, 0)} - {_week_label(state, -1)}，"
+          f"记录数: {len(state['record_ids'])}")
+    print(f"\n{'人员':<8} {'填报周数':<8} {'总人天':<8} {'周均人天':<8} {'超负荷':<6} {'不足':<6} {'漏报':<6}")
+    print("-" * 60)
+
+    reported_weeks = (state['counts'] > 0).sum(axis=1)
+    totals = days.sum(axis=1)
+    averages = np.divide(totals, reported_weeks, out=np.zeros_like(totals), where=reported_weeks > 0)
+    over_count = checks['over'].sum(axis=1)
+    under_count = checks['under'].sum(axis=1)
+    missing_count = checks['missing'].sum(axis=1)
+
+    for i, person in enumerate(state['persons']):
+        print(f"{person:<8} {reported_weeks[i]:<8} {totals[i]:<8.1f} {averages[i]:<8.2f} "
+              f"{over_count[i]:<6} {under_count[i]:<6} {missing_count[i]:<6}")
+
+    _print_cells(state, checks['over'], f"超负荷（周投入 > {capacity:g} 天）")
+    _print_cells(state, checks['under'], f"填报不足（周投入 < {capacity:g} 天）")
+    _print_cells(state, checks['missing'], "漏报周报", show_days=False)
+
+
+def main(source=None, state_path=DEFAULT_STATE, capacity=WEEKLY_CAPACITY):
+    state = load_state(state_path)
+
+    if source:
+        state = update_state(state, load_weekly_reports(source))
+        save_state(state, state_path)
+        print(f"饱和度矩阵已保存到: {state_path}")
+    elif state is None:
+        print(f"❌ 未找到 {state_path}，请先指定周报输入文件")
+        return
+
+    print_utilization_report(state, capacity)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="人员×周次工时饱和度检查")
+    parser.add_argument('input', nargs='?', help="周报CSV文件、目录或通配符；省略时直接使用已保存的矩阵")
+    parser.add_argument('--state', default=DEFAULT_STATE, help="矩阵持久化文件路径")
+    parser.add_argument('--capacity', type=float, default=WEEKLY_CAPACITY, help="每周标准投入天数")
+    args = parser.parse_args()
+    main(args.input, args.state, args.capacity)
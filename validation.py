@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入时的数据质量校验
+所有规则都是整张表上的向量化布尔掩码，违反规则的行连同问题代码隔离到单独的文件，
+并输出各规则的命中统计
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from ingest import DAYS_COLUMN, DEFAULT_INPUT, RECORD_ID_COLUMN
+
+# 默认隔离文件
+DEFAULT_QUARANTINE = 'quarantine_rows.csv'
+
+# 必填列及缺失时的问题代码
+REQUIRED_COLUMNS = {
+    '周报人': 'MISSING_PERSON',
+    '周次': 'MISSING_WEEK',
+    '订单项目.立项项目': 'MISSING_PROJECT',
+    '订单项目.归属中心': 'MISSING_DEPARTMENT',
+    DAYS_COLUMN: 'MISSING_DAYS',
+}
+
+# 周次和单条记录投入天数的合理范围
+WEEK_RANGE = (1, 53)
+MAX_DAYS_PER_RECORD = 7.0
+
+# 问题代码说明
+RULE_DESCRIPTIONS = {
+    'MISSING_PERSON': '周报人为空',
+    'MISSING_WEEK': '周次为空',
+    'MISSING_PROJECT': '立项项目为空',
+    'MISSING_DEPARTMENT': '归属中心为空',
+    'MISSING_DAYS': '投入天数为空',
+    'DAYS_NOT_NUMERIC': '投入天数不是数字',
+    'DAYS_NEGATIVE': '投入天数为负数',
+    'DAYS_NOT_HALF_DAY': '投入天数不是半天的整数倍',
+    'DAYS_OVER_WEEK': f'单条记录投入天数超过{MAX_DAYS_PER_RECORD:g}天',
+    'WEEK_OUT_OF_RANGE': f'周次不是{WEEK_RANGE[0]}-{WEEK_RANGE[1]}之间的整数',
+    'DUPLICATE_RECORD': '同一文件中（周报人, 周次, 记录ID）重复',
+}
+
+
+def rule_masks(df, source=None):
+    """计算每条规则的违规掩码，返回 {问题代码: 布尔数组}"""
+    masks = {}
+
+    for column, code in REQUIRED_COLUMNS.items():
+        masks[code] = df[column].isna().to_numpy()
+
+    days = pd.to_numeric(df[DAYS_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+    has_days = ~np.isnan(days)
+    masks['DAYS_NOT_NUMERIC'] = df[DAYS_COLUMN].notna().to_numpy() & ~has_days
+    masks['DAYS_NEGATIVE'] = has_days & (days < 0)
+    doubled = days * 2
+    masks['DAYS_NOT_HALF_DAY'] = has_days & (np.abs(doubled - np.round(doubled)) > 1e-9)
+    masks['DAYS_OVER_WEEK'] = has_days & (days > MAX_DAYS_PER_RECORD)
+
+    weeks = pd.to_numeric(df['周次'], errors='coerce').to_numpy(dtype=np.float64)
+    has_week = ~np.isnan(weeks)
+    masks['WEEK_OUT_OF_RANGE'] = df['周次'].notna().to_numpy() & (
+        ~has_week | (weeks < WEEK_RANGE[0]) | (weeks > WEEK_RANGE[1]) | (weeks != np.floor(weeks)))
+
+    # 重复只在同一导出文件内判断，跨文件的重叠由导入去重处理；
+    # 没有记录ID的行不视为重复（与 ingest.deduplicate_records 一致，全部保留）
+    keys = df[['周报人', '周次', RECORD_ID_COLUMN]]
+    if source is not None:
+        keys = keys.assign(_source=np.asarray(source))
+    masks['DUPLICATE_RECORD'] = df[RECORD_ID_COLUMN].notna().to_numpy() & keys.duplicated(keep='first').to_numpy()
+
+    return masks
+
+
+def validate_frame(df, source=None):
+    """校验数据表，返回 (通过校验的数据, 隔离数据, 各问题代码命中数)
+
+    隔离数据在原有列之外增加 来源文件 和 问题代码（多个代码以分号分隔）两列。
+    """
+    masks = rule_masks(df, source)
+    offending = np.logical_or.reduce(list(masks.values())) if masks else np.zeros(len(df), dtype=bool)
+    summary = {code: int(mask.sum()) for code, mask in masks.items()}
+
+    quarantine = df[offending].copy()
+    reasons = pd.Series('', index=quarantine.index)
+    for code, mask in masks.items():
+        hit = mask[offending]
+        if hit.any():
+            reasons = reasons.where(~hit, reasons + code + ';')
+    if source is not None:
+        quarantine.insert(0, '来源文件', np.asarray(source)[offending])
+    quarantine['问题代码'] = reasons.str.rstrip(';')
+
+    return df[~offending], quarantine, summary
+
+
+def write_quarantine(quarantine, output_file=DEFAULT_QUARANTINE):
+    """保存隔离数据"""
+    quarantine.to_csv(output_file, index=False, encoding='utf-8-sig')
+
+
+def print_validation_summary(summary, total_rows, quarantined_rows, output_file=DEFAULT_QUARANTINE):
+    """打印校验结果汇总"""
+    print(f"\n🔍 数据质量校验: 共 {total_rows} 行，隔离 {quarantined_rows} 行")
+    for code, count in summary.items():
+        if count:
+            print(f"   ⚠️  {code:<20} {RULE_DESCRIPTIONS[code]}: {count} 行")
+    if quarantined_rows:
+        print(f"   隔离数据已保存到: {output_file}")
+    else:
+        print("   ✅ 所有数据均通过校验")
+
+
+def main(source=DEFAULT_INPUT, quarantine_file=DEFAULT_QUARANTINE):
+    from ingest import load_weekly_reports
+
+    df = load_weekly_reports(source, validate=True, quarantine_file=quarantine_file)
+    print(f"通过校验的数据: {len(df)} 行")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="周报数据质量校验")
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT, help="周报CSV文件、目录或通配符")
+    parser.add_argument('--quarantine', default=DEFAULT_QUARANTINE, help="隔离数据输出路径")
+    args = parser.parse_args()
+    main(args.input, args.quarantine)
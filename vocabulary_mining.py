@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分类词表挖掘
+用增量JSON解析逐条读取分析结果（不把整个文件载入内存），一次流式遍历统计工作内容中的字符n-gram（中文2-4字、英文按单词，每条记录内去重）：
+未分类记录（other_work / unknown）用 Misra-Gries 算法保留出现最多的候选，
+各工作类型的已分类记录各用一个 Count-Min Sketch 计数，内存只取决于候选容量和草图大小，与记录数无关。
+候选先去掉停用词和词语片段，再按"在未分类记录中相对已分类记录的富集程度"排序，
+并按它在已分类记录中最常出现的工作类型给出应加入的关键词列表，代替人工翻阅 detailed_record_analysis.json
+"""
+
+import argparse
+import json
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+RECORD_FILE = 'detailed_record_analysis.json'
+DEFAULT_OUTPUT = '词表候选.csv'
+
+# 视为未分类的工作类型
+UNCLASSIFIED_TYPES = ('other_work', 'unknown')
+
+# 已分类的工作类型 -> 对应的关键词判断函数
+CATEGORY_HELPERS = {
+    'equipment_tuning': '_is_equipment_tuning',
+    'software_development': '_is_software_development',
+    'software_maintenance': '_is_maintenance_work',
+    'system_integration': '_is_system_integration',
+    'learning_research': '_is_learning_research',
+}
+NEW_CATEGORY = 'new'
+
+# 中文n-gram长度范围
+NGRAM_RANGE = (2, 4)
+
+# Misra-Gries 候选容量，以及 Count-Min Sketch 的行数和宽度
+CAPACITY = 2000
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 1 << 16
+
+# 每批更新草图的记录数
+BATCH_RECORDS = 1000
+
+# 候选至少出现的未分类记录数，以及平滑系数
+MIN_SUPPORT = 3
+SMOOTHING = 1.0
+
+# 较短候选的次数不超过已选较长候选的该倍数时视为其片段，不重复列出
+OVERLAP_RATIO = 1.25
+
+# 以这些虚词开头或结尾的候选不是完整的词语
+STOP_CHARS = set('的了和与或也都')
+# 周报中常见、不能区分工作类型的通用词
+STOP_GRAMS = {
+    '部分', '增加', '进行', '完成', '相关', '工作', '内容', '情况', '以及', '目前', '已经', '需要', '可以',
+    '本周', '下周', '继续', '开始', '一些', '方面', '其他', '处理', '问题', '主要', '正常', '一下',
+}
+
+# 增量读取JSON时每次读取的字符数
+READ_CHARS = 1 << 16
+
+# 每个类别输出的候选数
+TOP_N = 15
+
+_TOKEN_PATTERN = re.compile(r'[\u4e00-\u9fff]+|[a-z][a-z0-9_]+')
+
+
+def iter_json_array(path, read_chars=READ_CHARS):
+    """逐个解析JSON数组文件中的元素（元素为对象），内存中只保留未解析完的一段文本"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, pos, eof, opened = '', 0, False, False
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (opened and buffer[pos] == ',')):
+                pos += 1
+            if pos < len(buffer):
+                if not opened:
+                    if buffer[pos] != '[':
+                        raise ValueError(f"{path} 不是JSON数组")
+                    opened, pos = True, pos + 1
+                    continue
+                if buffer[pos] == ']':
+                    return
+                try:
+                    item, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # 元素跨越了读取块的边界，读入下一块后重试
+                    if eof:
+                        raise
+                else:
+                    yield item
+                    continue
+            elif eof:
+                raise ValueError(f"{path} 中的JSON数组不完整")
+            chunk = f.read(read_chars)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+
+def record_ngrams(content, ngram_range=NGRAM_RANGE):
+    """一条工作内容中出现的n-gram集合：中文连续片段取字符n-gram，英文取整个单词"""
+    if not isinstance(content, str):
+        return set()
+    grams = set()
+    low, high = ngram_range
+    for token in _TOKEN_PATTERN.findall(content.lower()):
+        if token.isascii():
+            grams.add(token)
+            continue
+        for n in range(low, min(high, len(token)) + 1):
+            grams.update(token[i:i + n] for i in range(len(token) - n + 1))
+    return grams
+
+
+class MisraGries:
+    """Misra-Gries 频繁项摘要：最多保留 capacity 个计数器，计数低估不超过 总数/(capacity+1)"""
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.counters = {}
+        self.total = 0
+
+    def update(self, items):
+        counters = self.counters
+        for item in items:
+            self.total += 1
+            if item in counters:
+                counters[item] += 1
+            elif len(counters) < self.capacity:
+                counters[item] = 1
+            else:
+                # 所有计数器减一，删除归零的计数器
+                for key in list(counters):
+                    counters[key] -= 1
+                    if not counters[key]:
+                        del counters[key]
+
+    def candidates(self):
+        return list(self.counters)
+
+
+class CountMinSketch:
+    """多个类别共用哈希的 Count-Min Sketch，表格形状为 (类别数, depth, width)，按批向量化更新"""
+
+    def __init__(self, n_categories, depth=SKETCH_DEPTH, width=SKETCH_WIDTH):
+        self.depth = depth
+        self.width = width
+        self.table = np.zeros((n_categories, depth, width), dtype=np.int32)
+        self._rows = np.arange(depth)[:, None]
+
+    def columns(self, items):
+        """各项在每一行的列号，形状为 (depth, 项数)；两个CRC32做双重哈希"""
+        data = [item.encode('utf-8') for item in items]
+        first = np.fromiter((zlib.crc32(d) for d in data), dtype=np.int64, count=len(data))
+        second = np.fromiter((zlib.crc32(d, 0x9E3779B9) | 1 for d in data), dtype=np.int64, count=len(data))
+        return (first[None, :] + self._rows * second[None, :]) % self.width
+
+    def add(self, categories, items):
+        """categories[i] 类别下 items[i] 计数加一"""
+        if not items:
+            return
+        columns = self.columns(items)
+        categories = np.broadcast_to(np.asarray(categories)[None, :], columns.shape)
+        np.add.at(self.table, (categories, np.broadcast_to(self._rows, columns.shape), columns), 1)
+
+    def estimate(self, items):
+        """各项在各类别下的计数估计（只会高估），形状为 (项数, 类别数)"""
+        if not items:
+            return np.zeros((0, self.table.shape[0]), dtype=np.int64)
+        columns = self.columns(items)
+        return self.table[:, self._rows, columns].min(axis=1).T
+
+
+def known_vocabulary():
+    """关键词判断函数中已有的全部关键词（小写）"""
+    import analyze_csv
+    from classifier_profile import collect_rules
+
+    vocabulary, _, _ = collect_rules(analyze_csv)
+    return {keyword.lower() for keywords in vocabulary.values() for keyword in keywords}
+
+
+class VocabularyMiner:
+    """一次遍历 (工作内容, 工作类型) 流，统计未分类与各类已分类记录中的n-gram"""
+
+    def __init__(self, capacity=CAPACITY, depth=SKETCH_DEPTH, width=SKETCH_WIDTH):
+        self.categories = list(CATEGORY_HELPERS)
+        self.heavy = MisraGries(capacity)
+        # 最后一个类别为未分类记录，用于修正 Misra-Gries 的低估
+        self.sketch = CountMinSketch(len(self.categories) + 1, depth, width)
+        self.record_counts = np.zeros(len(self.categories) + 1, dtype=np.int64)
+        self._batch_categories = []
+        self._batch_items = []
+        self._batch_records = 0
+
+    def add(self, content, work_type):
+        if work_type in UNCLASSIFIED_TYPES:
+            category = len(self.categories)
+        elif work_type in CATEGORY_HELPERS:
+            category = self.categories.index(work_type)
+        else:
+            return
+
+        grams = record_ngrams(content)
+        if category == len(self.categories):
+            self.heavy.update(grams)
+        self.record_counts[category] += 1
+        self._batch_categories.extend([category] * len(grams))
+        self._batch_items.extend(grams)
+        self._batch_records += 1
+        if self._batch_records >= BATCH_RECORDS:
+            self.flush()
+
+    def flush(self):
+        self.sketch.add(self._batch_categories, self._batch_items)
+        self._batch_categories, self._batch_items, self._batch_records = [], [], 0
+
+    def rank(self, min_support=MIN_SUPPORT, exclude=()):
+        """候选n-gram的富集排序表
+
+        得分为平滑后的对数比 log((未分类次数+α)/(未分类记录数+α)) - log((已分类次数+α)/(已分类记录数+α))；
+        已在词表中的关键词及其片段、停用词不列出，词语片段在计算得分前去掉
+        """
+        self.flush()
+        candidates = [gram for gram in self.heavy.candidates()
+                      if not any(gram in keyword for keyword in exclude) and _is_clean_gram(gram)]
+        counts = self.sketch.estimate(candidates)
+        unclassified_records = self.record_counts[-1]
+        classified_records = self.record_counts[:-1].sum()
+
+        table = pd.DataFrame(counts[:, :-1], columns=self.categories, index=pd.Index(candidates, name='候选词'))
+        table['未分类记录数'] = counts[:, -1]
+        table['已分类记录数'] = counts[:, :-1].sum(axis=1)
+        table = _drop_fragments(table[table['未分类记录数'] >= min_support])
+
+        alpha = SMOOTHING
+        table['得分'] = (np.log((table['未分类记录数'] + alpha) / (unclassified_records + alpha))
+                       - np.log((table['已分类记录数'] + alpha) / (classified_records + alpha)))
+        table = table[table['得分'] > 0]
+        # 建议加入已分类记录中出现最多的类别，从未出现在已分类记录中的单独列出
+        table['建议类别'] = table[self.categories].idxmax(axis=1).where(table['已分类记录数'] > 0, NEW_CATEGORY)
+        # 得分相同时出现次数多、较长的候选在前
+        lengths = table.index.str.len()
+        table = table.iloc[np.lexsort((-lengths, -table['未分类记录数'].to_numpy(), -table['得分'].to_numpy()))]
+        return table.reset_index()
+
+
+def _is_clean_gram(gram):
+    """停用词以及以虚词开头或结尾的n-gram不作为候选"""
+    return gram not in STOP_GRAMS and gram[0] not in STOP_CHARS and gram[-1] not in STOP_CHARS
+
+
+def _drop_fragments(table):
+    """去掉词语片段，只保留完整的短语
+
+    - 被较长候选包含且次数相近的（同一短语的重叠n-gram），从长到短检查；
+    - 与次数更多的等长候选错开一个字的（如 '件流程调' 与 '流程调试'，是更长短语中被截断的窗口）
+    """
+    counts = table['未分类记录数'].to_numpy()
+    lengths = table.index.str.len().to_numpy()
+
+    kept = []
+    for position in np.lexsort((-counts, -lengths)):
+        gram, count = table.index[position], counts[position]
+        if not any(gram in other and count <= OVERLAP_RATIO * other_count for other, other_count in kept):
+            kept.append((gram, count))
+
+    windows = []
+    for gram, count in sorted(kept, key=lambda item: (-item[1], -len(item[0]))):
+        if not any(len(gram) == len(other) and (gram[1:] == other[:-1] or gram[:-1] == other[1:])
+                   for other in windows):
+            windows.append(gram)
+    return table.loc[windows]
+
+
+def mine_vocabulary(records, capacity=CAPACITY, min_support=MIN_SUPPORT):
+    """records 为逐条分析结果的可迭代对象，返回 (候选表, 挖掘器)"""
+    miner = VocabularyMiner(capacity)
+    for record in records:
+        miner.add(record['content'], record['analysis']['type'])
+    return miner.rank(min_support, known_vocabulary()), miner
+
+
+def print_candidates(table, miner, top=TOP_N):
+    """按建议类别输出候选词"""
+    from analyze_csv import TYPE_NAMES
+
+    counts = miner.record_counts
+    print(f"\n🔎 词表挖掘: 未分类记录 {counts[-1]} 条，已分类记录 {counts[:-1].sum()} 条，"
+          f"Misra-Gries 候选 {len(miner.heavy.counters)}/{miner.heavy.capacity}，富集候选 {len(table)} 个")
+
+    for category in list(CATEGORY_HELPERS) + [NEW_CATEGORY]:
+        subset = table[table['建议类别'] == category].head(top)
+        if subset.empty:
+            continue
+        if category == NEW_CATEGORY:
+            print(f"\n🆕 只出现在未分类记录中（可能需要新的类别或规则）:")
+        else:
+            print(f"\n📌 {TYPE_NAMES[category]}（建议加入 {CATEGORY_HELPERS[category]} 的关键词）:")
+        for row in subset.itertuples(index=False):
+            print(f"   {row.候选词:<10} 未分类 {row.未分类记录数:>4} 条，已分类 {row.已分类记录数:>4} 条，得分 {row.得分:.2f}")
+
+
+def main(records_file=RECORD_FILE, output=DEFAULT_OUTPUT, capacity=CAPACITY, min_support=MIN_SUPPORT, top=TOP_N):
+    from output_writer import submit_write, wait_for_writes
+
+    print(f"读取逐条分析结果: {records_file}")
+    table, miner = mine_vocabulary(iter_json_array(records_file), capacity, min_support)
+    submit_write(output, lambda f: table.to_csv(f, index=False), encoding='utf-8-sig', newline='')
+    print_candidates(table, miner, top)
+
+    wait_for_writes()
+    print(f"\n✅ 词表候选已保存到: {output}")
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从未分类记录中挖掘关键词词表候选（Misra-Gries + Count-Min Sketch）")
+    parser.add_argument('--records', default=RECORD_FILE, help=f"逐条分析结果文件（默认 {RECORD_FILE}，由 analyze_csv.py 生成）")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"候选词CSV（默认 {DEFAULT_OUTPUT}）")
+    parser.add_argument('--capacity', type=int, default=CAPACITY, help=f"Misra-Gries 候选容量（默认{CAPACITY}）")
+    parser.add_argument('--min-support', type=int, default=MIN_SUPPORT,
+                        help=f"候选至少出现的未分类记录数（默认{MIN_SUPPORT}）")
+    parser.add_argument('--top', type=int, default=TOP_N, help=f"每个类别显示的候选数（默认{TOP_N}）")
+    args = parser.parse_args()
+    main(args.records, args.output, args.capacity, args.min_support, args.top)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监视导出目录，新的周报CSV落地后自动重建报告
+  - Linux下用inotify等待目录变化，不可用时退回定时轮询；
+  - 目录在 debounce 秒内没有新的写入、文件大小和修改时间都稳定后才开始重建，连续写入只触发一次；
+  - 重建期间到达的变化合并为下一次重建；
+  - 已解析的文件保留在内存中，只重新读取有变化的文件；
+  - 各阶段只在其依赖的列发生变化时重建：只改了投入天数不重建对照表，只改了工作内容不重建季度报告
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+import traceback
+
+from ingest import (CONTENT_COLUMN, DAYS_COLUMN, PARSER_ENGINES, YEAR_COLUMN, deduplicate_records, infer_year,
+                    read_weekly_csv, resolve_input_files, unify_categories)
+
+# 默认监视目录（不能是报告输出目录，否则输出的CSV会被当作输入）
+DEFAULT_WATCH_DIR = 'exports'
+
+# 写入停止多少秒后开始重建，以及无inotify时的轮询间隔
+DEBOUNCE_SECONDS = 2.0
+POLL_INTERVAL = 2.0
+
+# 各阶段依赖的输入列（None 表示全部列），依赖列的内容变化时才重建该阶段
+STAGE_COLUMNS = {
+    'analyze': None,
+    'table': [CONTENT_COLUMN, '订单项目.归属中心'],
+    'projects': ['订单项目.立项项目', '周报人', '周次', DAYS_COLUMN, CONTENT_COLUMN],
+    'dashboard': ['订单项目.归属中心', '订单项目.立项项目', '周报人', YEAR_COLUMN, '周次', DAYS_COLUMN, CONTENT_COLUMN],
+    'quarterly': ['订单项目.归属中心', '订单项目.立项项目', DAYS_COLUMN, '周报人', YEAR_COLUMN, '周次'],
+}
+STAGE_NAMES = {'analyze': '语义分析', 'table': '完整对照表', 'projects': '项目分析', 'dashboard': '看板',
+               'quarterly': '季度报告'}
+
+# 使用语义分析结果的阶段
+ANALYSIS_STAGES = ('table', 'projects', 'dashboard')
+
+# inotify 事件：写入、关闭、创建、删除和移入移出
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+
+class DirectoryWatcher:
+    """等待目录变化：优先使用inotify，不可用时按 poll_interval 轮询"""
+
+    def __init__(self, directory, poll_interval=POLL_INTERVAL, use_inotify=True):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.fd = self._open_inotify(directory) if use_inotify else None
+
+    @staticmethod
+    def _open_inotify(directory):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    @property
+    def mode(self):
+        return 'inotify' if self.fd is not None else f'轮询（每 {self.poll_interval:g} 秒）'
+
+    def wait(self, timeout=None):
+        """等待目录变化，返回是否收到了变化事件；轮询模式下等待一个轮询间隔后返回True，由调用方比较快照"""
+        if self.fd is None:
+            time.sleep(self.poll_interval if timeout is None else min(timeout, self.poll_interval))
+            return True
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        # 事件内容无需解析，是否有变化由文件快照判断；一次读空积压的事件
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def snapshot_files(directory):
+    """目录中CSV文件的 {路径: (修改时间, 大小)}"""
+    try:
+        files = resolve_input_files(directory)
+    except FileNotFoundError:
+        return {}
+    snapshot = {}
+    for path in files:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def wait_until_stable(watcher, directory, debounce=DEBOUNCE_SECONDS):
+    """等到 debounce 秒内目录没有新事件且文件快照不再变化，返回稳定后的快照"""
+    snapshot = snapshot_files(directory)
+    while True:
+        if watcher.fd is not None:
+            # 持续有写入时一直等待，直到 debounce 秒内没有新事件
+            while watcher.wait(debounce):
+                pass
+        else:
+            time.sleep(debounce)
+        current = snapshot_files(directory)
+        if current == snapshot:
+            return current
+        snapshot = current
+
+
+def _column_digest(df, columns):
+    """数据表指定列的逐行哈希，用于判断阶段的输入是否变化"""
+    import pandas as pd
+
+    frame = df if columns is None else df[[column for column in columns if column in df.columns]]
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+class ReportBuilder:
+    """常驻内存的报告重建：缓存各文件的解析结果和上次构建时各阶段输入的哈希"""
+
+    def __init__(self, directory, model_path=None, lean=False, engine='c', period_label=None):
+        from period_compare import aggregate_label
+
+        self.directory = directory
+        self.lean = lean
+        self.engine = engine
+        self.period_label = period_label or aggregate_label(directory)
+        self.model = None
+        if model_path:
+            from work_type_model import load_model
+
+            self.model = load_model(model_path)
+        self.frames = {}       # 路径 -> ((修改时间, 大小), 数据表)
+        self.digests = {}      # 阶段 -> 上次成功构建时的输入哈希
+        self.df = None
+        self.analyses = None
+
+    def refresh(self, snapshot):
+        """只重新读取快照中有变化的文件，返回合并去重后的数据表"""
+        import numpy as np
+        import pandas as pd
+
+        for path in list(self.frames):
+            if path not in snapshot:
+                del self.frames[path]
+                print(f"   移除 {path}")
+
+        for path, signature in snapshot.items():
+            cached = self.frames.get(path)
+            if cached is None or cached[0] != signature:
+                frame = read_weekly_csv(path, lean=self.lean, engine=self.engine)
+                # 与 load_weekly_reports 一样附加由文件名推断的年份
+                frame[YEAR_COLUMN] = np.full(len(frame), infer_year(path), dtype=np.int16)
+                self.frames[path] = (signature, frame)
+                print(f"   {'更新' if cached is not None else '读取'} {path}: {len(frame)} 行")
+
+        # resolve_input_files 已按修改时间排序，去重时较新的导出优先
+        frames = [self.frames[path][1] for path in snapshot]
+        if self.lean and len(frames) > 1:
+            frames = unify_categories(frames)
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return deduplicate_records(df)
+
+    def stale_stages(self, df):
+        """返回输入列相对上次构建发生变化的阶段及其新哈希"""
+        stale = {}
+        for stage, columns in STAGE_COLUMNS.items():
+            digest = _column_digest(df, columns)
+            previous = self.digests.get(stage)
+            if previous is None or len(previous) != len(digest) or (previous != digest).any():
+                stale[stage] = digest
+        return stale
+
+    def _run_stage(self, stage, df):
+        if stage == 'analyze':
+            from analyze_csv import run_analysis
+
+            self.analyses, _, _ = run_analysis(df, self.model)
+        elif stage == 'table':
+            from generate_full_table import generate_full_table, write_full_table_to_file
+            from output_writer import wait_for_writes
+
+            departments = generate_full_table(data=self.analyses)
+            write_full_table_to_file(departments)
+            wait_for_writes()
+        elif stage == 'projects':
+            from generate_project_analysis import main as generate_project_analysis
+
+            generate_project_analysis(records=self.analyses)
+        elif stage == 'dashboard':
+            from dashboard import build_dashboard
+            from output_writer import wait_for_writes
+
+            build_dashboard(df, self.analyses)
+            wait_for_writes()
+        elif stage == 'quarterly':
+            from generate_final_optimized_report import build_reports
+
+            build_reports(df, self.period_label)
+
+    def rebuild(self, snapshot):
+        """按快照重建有变化的阶段，返回 {阶段: 耗时秒数或None（失败）}"""
+        if not snapshot:
+            print(f"⚠️  {self.directory} 中没有CSV文件")
+            return {}
+
+        df = self.refresh(snapshot)
+        stale = self.stale_stages(df)
+        results = {}
+        for stage in STAGE_COLUMNS:
+            if stage not in stale:
+                continue
+            if stage in ANALYSIS_STAGES and self.analyses is None:
+                print(f"⚠️  语义分析未成功，跳过{STAGE_NAMES[stage]}")
+                continue
+            print(f"\n🔧 重建{STAGE_NAMES[stage]}...")
+            start = time.perf_counter()
+            try:
+                self._run_stage(stage, df)
+            except Exception:
+                traceback.print_exc()
+                results[stage] = None
+                if stage == 'analyze':
+                    self.analyses = None
+                continue
+            # 只在成功后记录哈希，失败的阶段在下次变化时重试
+            self.digests[stage] = stale[stage]
+            results[stage] = time.perf_counter() - start
+        self.df = df
+        return results
+
+
+def print_rebuild_summary(results, elapsed):
+    """输出一次重建的结果"""
+    if not results:
+        print(f"\n✅ 输入数据没有影响任何报告的变化（{elapsed:.1f} 秒）")
+        return
+    parts = [f"{STAGE_NAMES[stage]} {'失败' if seconds is None else f'{seconds:.1f}s'}"
+             for stage, seconds in results.items()]
+    skipped = [STAGE_NAMES[stage] for stage in STAGE_COLUMNS if stage not in results]
+    print(f"\n✅ 重建完成（共 {elapsed:.1f} 秒）: {'，'.join(parts)}"
+          + (f"；未变化: {'，'.join(skipped)}" if skipped else ''))
+
+
+def main(directory=DEFAULT_WATCH_DIR, model_path=None, lean=False, engine='c', period_label=None,
+         debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL, use_inotify=True, once=False):
+    if not os.path.isdir(directory):
+        raise SystemExit(f"监视目录不存在: {directory}")
+    if os.path.samefile(directory, os.getcwd()):
+        raise SystemExit("监视目录不能是报告输出目录（当前目录），请把导出文件放到单独的目录中")
+
+    builder = ReportBuilder(directory, model_path, lean, engine, period_label)
+    watcher = DirectoryWatcher(directory, poll_interval, use_inotify)
+    print(f"👀 监视目录: {directory}（{watcher.mode}，写入停止 {debounce:g} 秒后重建）")
+
+    built = None
+    try:
+        while True:
+            if built is not None:
+                watcher.wait()
+                if snapshot_files(directory) == built:
+                    continue
+            snapshot = wait_until_stable(watcher, directory, debounce)
+            if snapshot == built:
+                continue
+
+            print(f"\n📥 检测到 {len(snapshot)} 个导出文件，开始重建（{time.strftime('%H:%M:%S')}）")
+            start = time.perf_counter()
+            try:
+                results = builder.rebuild(snapshot)
+            except Exception:
+                # 文件可能仍在写入或格式有误，等待下一次变化后重试
+                traceback.print_exc()
+                print("❌ 读取导出文件失败，等待文件再次变化后重试")
+                built = snapshot
+                continue
+            built = snapshot
+            print_rebuild_summary(results, time.perf_counter() - start)
+            if once:
+                break
+    except KeyboardInterrupt:
+        print("\n已停止监视")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="监视导出目录，新的周报CSV落地后自动重建分析结果、对照表和季度报告")
+    parser.add_argument('directory', nargs='?', default=DEFAULT_WATCH_DIR, help=f"监视的导出目录（默认 {DEFAULT_WATCH_DIR}）")
+    parser.add_argument('--model', help="语义分析使用统计分类器（work_type_model.py 训练得到的模型文件）")
+    parser.add_argument('--lean', action='store_true', help="精简模式加载，降低常驻内存")
+    parser.add_argument('--engine', choices=PARSER_ENGINES, default='c', help="CSV解析引擎：c（默认）或 pyarrow")
+    parser.add_argument('--period-label', help="季度汇总快照名，默认取目录名")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS,
+                        help=f"写入停止多少秒后开始重建（默认{DEBOUNCE_SECONDS:g}）")
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL,
+                        help=f"无inotify时的轮询间隔秒数（默认{POLL_INTERVAL:g}）")
+    parser.add_argument('--poll', action='store_true', help="不使用inotify，强制轮询")
+    parser.add_argument('--once', action='store_true', help="构建一次后退出")
+    args = parser.parse_args()
+    main(args.directory, args.model, args.lean, args.engine, args.period_label,
+         args.debounce, args.poll_interval, not args.poll, args.once)
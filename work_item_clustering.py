@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近似重复工作项聚类
+周报中同一需求常以略有不同的措辞跨周、跨人员重复出现，
+使用字符n-gram的MinHash签名配合局部敏感哈希（LSH）分桶，
+在近似线性时间内把近似重复的工作项归为一类，并汇总人天和周次跨度
+"""
+
+import json
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+# MinHash参数：签名长度 = 分段数 × 每段行数
+NUM_PERM = 128
+LSH_BANDS = 32
+# 估计的Jaccard相似度达到该阈值才合并
+SIMILARITY_THRESHOLD = 0.5
+# 字符n-gram长度
+SHINGLE_SIZE = 2
+# 每批计算签名的工作项数量，控制中间矩阵大小
+SIGNATURE_BATCH = 4096
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+# 不影响工作内容含义的常见词
+_FILLER_WORDS = ['继续', '持续', '进行', '正在', '进一步']
+_NOISE_PATTERN = re.compile(r'^\s*\d+[\.、]\s*|[\s，,。.；;：:、（）()\[\]【】"“”\'‘’!！?？]+')
+
+
+def normalize_item(text):
+    """规范化工作项文本：去除编号、标点、空白和常见填充词，统一小写"""
+    text = _NOISE_PATTERN.sub('', str(text).lower())
+    for word in _FILLER_WORDS:
+        text = text.replace(word, '')
+    return text
+
+
+def char_shingles(text, k=SHINGLE_SIZE):
+    """生成字符n-gram集合，文本短于k时以整个文本作为唯一元素"""
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def _hash_permutations(num_perm, seed=1):
+    """生成MinHash使用的随机线性哈希参数"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+    b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+    return a, b
+
+
+def minhash_signatures(shingle_sets, num_perm=NUM_PERM, seed=1):
+    """批量计算MinHash签名，返回 (工作项数, num_perm) 的矩阵"""
+    a, b = _hash_permutations(num_perm, seed)
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.int64)
+    hash_cache = {}
+
+    for batch_start in range(0, len(shingle_sets), SIGNATURE_BATCH):
+        batch = shingle_sets[batch_start:batch_start + SIGNATURE_BATCH]
+        lengths = np.fromiter((len(s) for s in batch), dtype=np.int64, count=len(batch))
+        hashes = np.fromiter(
+            (hash_cache.setdefault(sh, zlib.crc32(sh.encode('utf-8')) % _MERSENNE_PRIME)
+             for shingles in batch for sh in shingles),
+            dtype=np.int64, count=int(lengths.sum()))
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        # (num_perm, 本批全部n-gram) 的哈希值，再按工作项分段取最小值
+        permuted = (a[:, None] * hashes[None, :] + b[:, None]) % _MERSENNE_PRIME
+        signatures[batch_start:batch_start + len(batch)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+
+    return signatures
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def lsh_groups(signatures, bands=LSH_BANDS, threshold=SIMILARITY_THRESHOLD):
+    """LSH分桶后合并候选对，返回每个工作项所属的类别编号"""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    parent = list(range(n))
+
+    for band in range(bands):
+        band_slice = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        buckets = defaultdict(list)
+        for i in range(n):
+            buckets[band_slice[i].tobytes()].append(i)
+
+        # 桶内每个成员只与桶首元素比较，保持线性复杂度
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            anchor = members[0]
+            others = np.asarray(members[1:])
+            similarity = (signatures[others] == signatures[anchor]).mean(axis=1)
+            for other in others[similarity >= threshold]:
+                root_a, root_b = _find(parent, anchor), _find(parent, int(other))
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    return [_find(parent, i) for i in range(n)]
+
+
+def cluster_work_items(items, threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM, bands=LSH_BANDS):
+    """将工作项聚类
+
+    items 为字典列表，至少包含 content，可选 days、week、person。
+    返回按总人天降序排列的类别列表，代表内容取该类中最早出现的工作项。
+    """
+    normalized = [normalize_item(item['content']) for item in items]
+    shingle_sets = [char_shingles(text) for text in normalized]
+
+    # 规范化后为空的工作项各自成类
+    valid = [i for i, shingles in enumerate(shingle_sets) if shingles]
+    labels = list(range(len(items)))
+    if valid:
+        signatures = minhash_signatures([shingle_sets[i] for i in valid], num_perm)
+        for i, label in zip(valid, lsh_groups(signatures, bands, threshold)):
+            labels[i] = valid[label]
+
+    clusters = {}
+    for item, label in zip(items, labels):
+        cluster = clusters.get(label)
+        if cluster is None:
+            cluster = clusters[label] = {
+                'representative': item['content'],
+                'item_count': 0,
+                'total_days': 0.0,
+                'first_week': None,
+                'last_week': None,
+                'people': set(),
+                'variants': set(),
+            }
+        cluster['item_count'] += 1
+        days = item.get('days')
+        if days is not None and days == days:
+            cluster['total_days'] += float(days)
+        week = item.get('week')
+        if week is not None:
+            cluster['first_week'] = week if cluster['first_week'] is None else min(cluster['first_week'], week)
+            cluster['last_week'] = week if cluster['last_week'] is None else max(cluster['last_week'], week)
+        if item.get('person'):
+            cluster['people'].add(item['person'])
+        cluster['variants'].add(item['content'])
+
+    result = []
+    for cluster in clusters.values():
+        cluster['people'] = sorted(cluster['people'])
+        cluster['variants'] = sorted(cluster['variants'])
+        result.append(cluster)
+
+    return sorted(result, key=lambda c: (-c['total_days'], -c['item_count']))
+
+
+def work_items_from_records(records, split_items):
+    """从逐条分析结果中拆分工作项，记录的人天在其工作项之间平均分摊"""
+    items = []
+    for record in records:
+        parts = split_items(record['content'])
+        if not parts:
+            continue
+        days = record['days']
+        share = days / len(parts) if days is not None and days == days else None
+        for part in parts:
+            items.append({
+                'content': part,
+                'days': share,
+                'week': record['week'],
+                'person': record['person'],
+                'project': record['project'],
+            })
+    return items
+
+
+def format_cluster_line(cluster):
+    """将一个类别格式化为单行描述"""
+    if cluster['first_week'] is None:
+        span = ''
+    elif cluster['first_week'] == cluster['last_week']:
+        span = f"，第{cluster['first_week']}周"
+    else:
+        span = f"，第{cluster['first_week']}-{cluster['last_week']}周"
+    return f"{cluster['representative']}（{cluster['item_count']}次，{cluster['total_days']:.1f}人天{span}）"
+
+
+def main():
+    from extract_requirements_bugs import extract_work_items
+
+    with open('detailed_record_analysis.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)
+
+    by_project = defaultdict(list)
+    for item in work_items_from_records(records, extract_work_items):
+        by_project[item['project']].append(item)
+
+    output = {}
+    total_items = 0
+    total_clusters = 0
+    for project, items in by_project.items():
+        clusters = cluster_work_items(items)
+        total_items += len(items)
+        total_clusters += len(clusters)
+        output[project] = [
+            {
+                'representative': c['representative'],
+                'item_count': c['item_count'],
+                'total_days': round(c['total_days'], 2),
+                'first_week': c['first_week'],
+                'last_week': c['last_week'],
+                'people': c['people'],
+                'variants': c['variants'],
+            }
+            for c in clusters
+        ]
+
+    with open('work_item_clusters.json', 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+
+    print(f"工作项总数: {total_items}，聚类后: {total_clusters} 类")
+    print("已保存聚类结果到 work_item_clusters.json")
+
+    print("\n重复次数最多的工作项:")
+    repeated = [c for clusters in output.values() for c in clusters if c['item_count'] > 1]
+    for cluster in sorted(repeated, key=lambda c: -c['item_count'])[:10]:
+        print(f"  {format_cluster_line(cluster)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可选的工作类型统计分类器
+字符n-gram经哈希映射为稀疏特征矩阵，配合多分类逻辑回归（线性模型）。
+模型离线训练：以规则分类结果为标签，可用人工更正的标签覆盖；
+预测时每批只需一次稀疏矩阵与权重的乘法，仅依赖NumPy，CPU离线运行
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from ingest import CONTENT_COLUMN, DEFAULT_INPUT, RECORD_ID_COLUMN, load_weekly_reports
+
+# 默认模型文件
+DEFAULT_MODEL = 'work_type_model.npz'
+
+# 哈希特征维度（2的幂）与n-gram范围
+HASH_BITS = 18
+NGRAM_RANGE = (1, 3)
+
+# 每批预测的行数，控制中间数组大小
+PREDICT_BATCH = 2000
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX = np.uint64(0xBF58476D1CE4E5B9)
+
+
+def hash_features(texts, hash_bits=HASH_BITS, ngram_range=NGRAM_RANGE):
+    """将文本批量转换为CSR格式的稀疏特征矩阵
+
+    所有文本拼接为一个码点数组，各阶n-gram的哈希值在整个数组上向量化计算，
+    跨越文本边界的n-gram被剔除。特征值为 log(1+词频) 并按行做L2归一化。
+    返回 (indptr, indices, data)。
+    """
+    texts = ['' if pd.isna(t) else str(t).lower() for t in texts]
+    n_rows = len(texts)
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=n_rows)
+    codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+    row_of_char = np.repeat(np.arange(n_rows, dtype=np.int64), lengths)
+    row_end = np.repeat(np.cumsum(lengths), lengths)
+    char_pos = np.arange(len(codes), dtype=np.int64)
+
+    keys = []
+    shift = np.uint64(64 - hash_bits)
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        start = np.flatnonzero(char_pos + n <= row_end)
+        h = np.full(len(start), np.uint64(n), dtype=np.uint64)
+        for offset in range(n):
+            h = (h ^ codes[start + offset]) * _GOLDEN
+        h = (h ^ (h >> np.uint64(31))) * _MIX
+        buckets = (h >> shift).astype(np.int64)
+        keys.append(row_of_char[start] * (1 << hash_bits) + buckets)
+
+    keys, counts = np.unique(np.concatenate(keys) if keys else np.empty(0, dtype=np.int64), return_counts=True)
+    rows = keys >> hash_bits
+    indices = keys & ((1 << hash_bits) - 1)
+    data = np.log1p(counts.astype(np.float64))
+
+    norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=n_rows))
+    data /= norms[rows]
+
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, indices, data
+
+
+def _sparse_dot(indptr, indices, data, weights):
+    """CSR矩阵乘以稠密权重矩阵"""
+    n_rows = len(indptr) - 1
+    result = np.zeros((n_rows, weights.shape[1]))
+    nonempty = np.flatnonzero(np.diff(indptr) > 0)
+    if len(nonempty):
+        products = data[:, None] * weights[indices]
+        result[nonempty] = np.add.reduceat(products, indptr[nonempty], axis=0)
+    return result
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+def train_model(texts, labels, hash_bits=HASH_BITS, epochs=300, learning_rate=2.0, l2=1e-4):
+    """训练多分类逻辑回归（全批量梯度下降，带动量）"""
+    classes, y = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    indptr, indices, data = hash_features(texts, hash_bits)
+    n_rows = len(y)
+    rows = np.repeat(np.arange(n_rows), np.diff(indptr))
+
+    # 只在训练集中出现过的特征上迭代，未出现的特征权重恒为0
+    active, local_indices = np.unique(indices, return_inverse=True)
+    weights = np.zeros((len(active), len(classes)))
+    bias = np.zeros(len(classes))
+    velocity = np.zeros_like(weights)
+    bias_velocity = np.zeros_like(bias)
+    onehot = np.eye(len(classes))[y]
+
+    # 按特征列排序后分段求和，每个出现过的特征恰好对应一段
+    column_order = np.argsort(local_indices, kind='stable')
+    column_starts = np.flatnonzero(np.r_[True, np.diff(local_indices[column_order]) != 0])
+    column_data = data[column_order, None]
+    column_rows = rows[column_order]
+
+    for _ in range(epochs):
+        probs = _softmax(_sparse_dot(indptr, local_indices, data, weights) + bias)
+        error = (probs - onehot) / n_rows
+
+        # X^T · error：按特征列累加
+        grad = np.add.reduceat(column_data * error[column_rows], column_starts, axis=0)
+        grad += l2 * weights
+
+        velocity = 0.9 * velocity - learning_rate * grad
+        bias_velocity = 0.9 * bias_velocity - learning_rate * error.sum(axis=0)
+        weights += velocity
+        bias += bias_velocity
+
+    probs = _softmax(_sparse_dot(indptr, local_indices, data, weights) + bias)
+    accuracy = float((probs.argmax(axis=1) == y).mean())
+
+    full_weights = np.zeros((1 << hash_bits, len(classes)), dtype=np.float32)
+    full_weights[active] = weights
+    return {
+        'weights': full_weights,
+        'bias': bias.astype(np.float32),
+        'classes': classes,
+        'hash_bits': np.int64(hash_bits),
+        'train_accuracy': np.float64(accuracy),
+    }
+
+
+def save_model(model, model_path=DEFAULT_MODEL):
+    """保存模型"""
+    np.savez_compressed(model_path, **model)
+
+
+def load_model(model_path=DEFAULT_MODEL):
+    """加载模型"""
+    with np.load(model_path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def predict(model, texts, batch_size=PREDICT_BATCH):
+    """批量预测工作类型，返回 (类别列表, 置信度数组)"""
+    texts = list(texts)
+    hash_bits = int(model['hash_bits'])
+    labels = np.empty(len(texts), dtype=model['classes'].dtype)
+    confidence = np.empty(len(texts))
+
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        indptr, indices, data = hash_features(batch, hash_bits)
+        probs = _softmax(_sparse_dot(indptr, indices, data, model['weights']) + model['bias'])
+        best = probs.argmax(axis=1)
+        labels[start:start + len(batch)] = model['classes'][best]
+        confidence[start:start + len(batch)] = probs[np.arange(len(batch)), best]
+
+    return labels.tolist(), confidence
+
+
+def load_corrections(corrections_file):
+    """读取人工更正的标签：包含记录ID列和 type 列的CSV文件"""
+    corrections = pd.read_csv(corrections_file, encoding='utf-8-sig')
+    return dict(zip(corrections[RECORD_ID_COLUMN].astype(str), corrections['type']))
+
+
+def build_training_labels(df, corrections=None):
+    """以规则分类结果为标签，人工更正的记录以更正标签为准"""
+    from analyze_csv import analyze_work_content_semantic
+
+    labels = [
+        analyze_work_content_semantic(content, None, None, None)['type']
+        for content in df[CONTENT_COLUMN]
+    ]
+    if corrections:
+        record_ids = df[RECORD_ID_COLUMN].astype(str)
+        labels = [corrections.get(record_id, label) for record_id, label in zip(record_ids, labels)]
+    return labels
+
+
+def main(source=DEFAULT_INPUT, model_path=DEFAULT_MODEL, corrections_file=None):
+    df = load_weekly_reports(source)
+    df = df[df[CONTENT_COLUMN].notna()]
+
+    corrections = load_corrections(corrections_file) if corrections_file else None
+    labels = build_training_labels(df, corrections)
+
+    model = train_model(df[CONTENT_COLUMN].tolist(), labels)
+    save_model(model, model_path)
+
+    print(f"✅ 模型已保存到: {model_path}")
+    print(f"   训练样本: {len(labels)} 条，类别: {', '.join(model['classes'])}")
+    print(f"   训练集准确率: {float(model['train_accuracy']):.3f}")
+    if corrections:
+        print(f"   使用人工更正标签: {len(corrections)} 条")
+    print(f"   模型大小: {os.path.getsize(model_path) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="训练工作类型统计分类器")
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT, help="周报CSV文件、目录或通配符")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="模型保存路径")
+    parser.add_argument('--corrections', help="人工更正标签CSV（记录ID列 + type列）")
+    args = parser.parse_args()
+    main(args.input, args.model, args.corrections)